@@ -0,0 +1,57 @@
+###### IMPORT ######
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import solvers
+from topology import colourSprings
+from solverScaling import gridLattice, forSolver
+
+
+###### SETUP ######
+
+RESOLUTIONS = [10, 20, 40] # initializePoints("grid") lattices of (2 * RESOLUTION + 1)^2 points
+STEPS = 20 # substeps timed per run
+RIGIDCOMPLIANCE = 1e-7 # near-rigid material, so the constraint error left after a step is the solver's, not the material's
+WORKERCOUNTS = sorted({1, 2, 4, os.cpu_count() or 1})
+
+###### FUNCTIONS ######
+
+def run(template, sweep, workers, steps=STEPS): # one XPBD sweep on one lattice
+    '''
+    ## run()
+    Steps a near-rigid copy of `template` with the XPBD `sweep` on `workers` threads. Outputs `(stepsPerSecond, meanError)`, the mean distance of the springs from their rest length at the end.
+    '''
+    sim = forSolver(template, "xpbd")
+    sim.compliance = {material: RIGIDCOMPLIANCE for material in sim.compliance}
+    sim.sweep = sweep
+    sim.workers = workers
+    sim.springColours() # coloured once up front, like a running world
+    start = time.perf_counter()
+    sim.step(steps)
+    seconds = time.perf_counter() - start
+    return steps / seconds, float(np.abs(sim.springLengths() - sim.restLengths).mean())
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the Jacobi and the coloured Gauss-Seidel XPBD sweeps on large grid lattices.")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=RESOLUTIONS, help="grid RESOLUTION values to measure")
+    parser.add_argument("--steps", type=int, default=STEPS, help="substeps timed per run")
+    arguments = parser.parse_args()
+
+    print("resolution  points  springs  colours  colouring (s)  sweep     workers  steps/s  mean error (px)")
+    for resolution in arguments.resolutions:
+        template = gridLattice(resolution)
+        start = time.perf_counter()
+        colours = colourSprings(template.springEnds, len(template.positions))
+        colouring = time.perf_counter() - start
+        prefix = str(resolution).ljust(12) + str(len(template.positions)).ljust(8) + str(len(template.springEnds)).ljust(9) + str(colours.max() + 1).ljust(9) + str(round(colouring, 3)).ljust(15)
+        for sweep in solvers.XPBDSWEEPS:
+            for workers in (WORKERCOUNTS if sweep == "coloured" else [1]):
+                stepsPerSecond, error = run(template, sweep, workers, arguments.steps)
+                print(prefix + sweep.ljust(10) + str(workers).ljust(9) + str(round(stepsPerSecond, 1)).ljust(9) + str(round(error, 5)))
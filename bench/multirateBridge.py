@@ -0,0 +1,76 @@
+###### IMPORT ######
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import multirate
+from simulation import Simulation, SIMSPEED, DAMPING, DT, SUBSTEPS
+from solverScaling import trussBridge
+
+
+###### SETUP ######
+
+FRAMETIME = DT * SUBSTEPS # simulated time per rendered frame, held constant while the substep count changes
+TRUSSES = [400, 1000, 4000] # N-truss bridges
+LIGHTSPAN = (0.49, 0.51) # fraction of the bridge's length whose points are light, the critical region
+LIGHTMASS = 0.01 # mass of the light points, the rest weigh 1
+KICK = 0.1 # spread of the random starting velocities, so unstable modes have something to grow from
+FRAMES = 30
+RUNS = [(10, 0), (20, 0), (40, 0), (80, 0), (10, 3)] # (substeps per frame, multirate levels)
+
+###### FUNCTIONS ######
+
+def lightBridge(template, substeps, levels): # a long bridge with a short light stretch
+    '''
+    ## lightBridge()
+    Copies the `template` bridge into a Simulation with `substeps` substeps per frame and `levels` multirate levels. The points within `LIGHTSPAN` of its length weigh `LIGHTMASS`. The time step, `simSpeed` and `damping` are rescaled so every substep count simulates the same frame time.
+    '''
+    dt = FRAMETIME / substeps
+    sim = Simulation(dt=dt, substeps=substeps, simSpeed=SIMSPEED * dt / DT, damping=DAMPING ** (dt / DT), groundLevel=template.groundLevel)
+    x = template.positions[:, 0]
+    along = (x - x.min()) / (x.max() - x.min())
+    masses = np.where((along > LIGHTSPAN[0]) & (along < LIGHTSPAN[1]), LIGHTMASS, 1.0)
+    sim.addPoints(template.positions, fixed=template.fixed, masses=masses)
+    sim.addSprings(template.springEnds, template.restLengths, template.springMaterials)
+    sim.ccd = False
+    sim.sleep = False # every point keeps moving, the comparison is about the integrator
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses}
+    sim.multirate = levels
+    free = ~sim.fixed
+    sim.velocities[free] = np.random.default_rng(0).normal(0, KICK, (free.sum(), 2))
+    return sim
+
+def run(template, substeps, levels, frames=FRAMES): # one bridge, one integrator setting
+    '''
+    ## run()
+    Runs the light bridge for `frames` frames. Outputs `(secondsPerFrame, maxStrain, levelCounts)`, with `maxStrain` infinite if it blew up and `levelCounts` the number of points in every rate class at the end.
+    '''
+    sim = lightBridge(template, substeps, levels)
+    start = time.perf_counter()
+    for frame in range(frames):
+        sim.stepFrame()
+        if not np.isfinite(sim.positions).all():
+            return (time.perf_counter() - start) / (frame + 1), np.inf, []
+    seconds = (time.perf_counter() - start) / frames
+    levelCounts = np.bincount(multirate.rateLevels(sim.velocities, sim.masses, sim.fixed, sim.springEnds, sim.restLengths, sim.stiffness, sim.simSpeed / sim.dt, sim.dt, levels), minlength=levels + 1)
+    return seconds, float(sim.springStress().max()), levelCounts.tolist()
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time uniform and multirate substepping on long bridges with a short stretch of light points.")
+    parser.add_argument("--trusses", type=int, nargs="+", default=TRUSSES, help="bridge lengths to measure")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="frames per run")
+    arguments = parser.parse_args()
+
+    print("trusses  points  substeps  levels  s/frame  max strain (px)  points per level")
+    with np.errstate(all="ignore"): # the runs that blow up are part of the table
+        for trusses in arguments.trusses:
+            template = trussBridge(trusses)
+            for substeps, levels in RUNS:
+                seconds, strain, levelCounts = run(template, substeps, levels, arguments.frames)
+                print(str(trusses).ljust(9) + str(len(template.positions)).ljust(8) + str(substeps).ljust(10) + str(levels).ljust(8) + str(round(seconds, 4)).ljust(9) + ("exploded" if strain == np.inf else str(round(strain, 4))).ljust(17) + str(levelCounts))
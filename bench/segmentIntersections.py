@@ -0,0 +1,49 @@
+###### IMPORT ######
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import getIntersectionPoint
+from intersection import batchIntersections, allPairIntersections
+
+
+###### SETUP ######
+
+PAIRS = 1000000 # pairs for the pairwise batch
+ALLPAIRS = 1000 # M = N for the all-pairs batch, so M x N = 1M pairs
+SCALARPAIRS = 100000 # the scalar loop is timed on fewer pairs and scaled up
+REPEATS = 5 # best of this many runs
+
+###### FUNCTIONS ######
+
+def bestTime(function): # best wall time of REPEATS calls
+    '''
+    ## bestTime()
+    Outputs the fastest of `REPEATS` wall clock timings of `function()`, in seconds.
+    '''
+    times = []
+    for repeat in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    generator = np.random.default_rng(0)
+    segments1 = generator.uniform(0, 1000, (PAIRS, 2, 2))
+    segments2 = generator.uniform(0, 1000, (PAIRS, 2, 2))
+    lines1 = segments1[:SCALARPAIRS].tolist()
+    lines2 = segments2[:SCALARPAIRS].tolist()
+
+    scalar = bestTime(lambda: [getIntersectionPoint(line1, line2) for line1, line2 in zip(lines1, lines2)]) * PAIRS / SCALARPAIRS
+    pairwise = bestTime(lambda: batchIntersections(segments1, segments2))
+    allPairs = bestTime(lambda: allPairIntersections(segments1[:ALLPAIRS], segments2[:ALLPAIRS]))
+
+    print("method                    ms per 1M pairs  M pairs/s  speedup")
+    for name, seconds in [("getIntersectionPoint loop", scalar), ("batchIntersections", pairwise), ("allPairIntersections", allPairs)]:
+        print(name.ljust(26) + str(round(seconds * 1000, 1)).ljust(17) + str(round(PAIRS / seconds / 1e6, 2)).ljust(11) + str(round(scalar / seconds, 1)) + "x")
@@ -0,0 +1,232 @@
+###### IMPORT ######
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import solvers
+from simulation import Simulation, SIMSPEED, DT, STIFFNESS
+
+
+###### SETUP ######
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results") # one JSON file per run, named after the git revision
+GRIDRESOLUTIONS = [2, 4, 8, 12] # initializePoints("grid") lattices of (2 * RESOLUTION + 1)^2 points
+TRUSSES = [5, 20, 80, 320] # N-truss bridges, 5 is the default bridge
+MESHPOINTS = [100, 400, 1600] # jittered random meshes
+QUICK = {"grid": [2, 4], "bridge": [5, 20], "mesh": [100]} # sizes for --quick
+MESHSPACING = 60 # px between the cells of a random mesh, each point sits somewhere inside its cell
+MESHJITTER = 15 # px, at most this far from its cell centre, so no two points start inside the close pressure range
+TRUSSWIDTH = 100 # px, like the default bridge
+STEPS = 300 # substeps timed per run
+MEMORYSTEPS = 10 # substeps traced for the peak memory, tracing slows the run so it is kept out of the timing
+DAMPING = 1.0 # undamped, so whatever energy a solver gains or loses is its own drift
+NOFLOOR = 1e9 # groundLevel far below everything, so the floor never takes energy out
+REGRESSION = 0.9 # --compare flags a run slower than this fraction of the baseline
+
+###### STRUCTURES ######
+
+def gridLattice(resolution): # the mode == "grid" lattice, hanging from its top row
+    '''
+    ## gridLattice()
+    Builds the `initializePoints("grid")` lattice at `resolution` with `createSprings()` and fixes its top row so it hangs instead of falling. Outputs the Simulation.
+    '''
+    sim = Simulation(resolution=resolution, groundLevel=NOFLOOR)
+    sim.initializePoints("grid")
+    sim.createSprings()
+    sim.fixed[sim.positions[:, 1] == sim.positions[:, 1].min()] = True
+    return sim
+
+def trussBridge(trusses): # the default bridge, N trusses long
+    '''
+    ## trussBridge()
+    Builds the default bridge layout of `initializePoints()` with `trusses` trusses instead of 5 (two fixed anchors, a bottom chord and a top chord), connected with `createSprings()`. Outputs the Simulation.
+    '''
+    sim = Simulation(groundLevel=NOFLOOR)
+    left, y = sim.width/2 - 250, sim.height/2 + 50
+    sim.addPoint(left, y, True)
+    for truss in range(1, trusses + 1):
+        if not truss == trusses:
+            sim.addPoint(left + truss*TRUSSWIDTH, y)
+        sim.addPoint(left + (truss - 0.5)*TRUSSWIDTH, y - 100)
+    sim.addPoint(left + trusses*TRUSSWIDTH, y, True)
+    sim.createSprings()
+    return sim
+
+def randomMesh(count, seed=0): # createSprings() over scattered points
+    '''
+    ## randomMesh()
+    Scatters `count` points, one at a random spot in each cell of a square grid of `MESHSPACING` cells, connects every pair within `SPRINGLIMIT` with `createSprings()` and fixes the top row of cells. Outputs the Simulation.
+    '''
+    sim = Simulation(groundLevel=NOFLOOR)
+    generator = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(count)))
+    cells = np.stack(np.divmod(np.arange(count), side), axis=1)[:, ::-1] * MESHSPACING
+    positions = cells + generator.uniform(-MESHJITTER, MESHJITTER, (count, 2))
+    sim.addPoints(positions, fixed=cells[:, 1] == 0)
+    sim.createSprings()
+    return sim
+
+STRUCTURES = {"grid": (gridLattice, GRIDRESOLUTIONS), "bridge": (trussBridge, TRUSSES), "mesh": (randomMesh, MESHPOINTS)}
+
+###### MEASUREMENTS ######
+
+def forSolver(template, solver): # same structure and material for every solver
+    '''
+    ## forSolver()
+    Copies the points and springs of `template` into a new undamped Simulation that uses `solver`, with the XPBD compliance set to the equivalent of `STIFFNESS` so every solver simulates the same material.
+    '''
+    sim = Simulation(damping=DAMPING, groundLevel=NOFLOOR, solver=solver)
+    compliance = solvers.equivalentCompliance(STIFFNESS, SIMSPEED, DT)
+    sim.compliance = {material: compliance for material in sim.compliance}
+    sim.ccd = False # nothing to collide with
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses} # the structure stays the same for the whole run
+    sim.addPoints(template.positions, fixed=template.fixed, masses=template.baseMasses)
+    sim.addSprings(template.springEnds, template.restLengths, template.springMaterials)
+    return sim
+
+def totalEnergy(sim, origin): # kinetic + spring + gravity, relative to the starting positions
+    '''
+    ## totalEnergy()
+    Outputs the mechanical energy of the free points: kinetic energy, spring energy `stiffness * stretch^2 / 2` and gravitational energy measured from `origin`. Velocities are stored per step, so they are converted to per unit time with the step length `sqrt(dt * simSpeed)` the integrator implies. Close pressure is left out, the structures here start out of its range.
+    '''
+    free = ~sim.fixed
+    velocities = sim.velocities[free] * np.sqrt(sim.dt / sim.simSpeed)
+    masses = sim.baseMasses[free]
+    kinetic = 0.5 * (masses * (velocities ** 2).sum(axis=1)).sum()
+    stretch = sim.springLengths() - sim.restLengths
+    springs = 0.5 * sim.stiffness * (stretch ** 2).sum()
+    gravity = -(masses * ((sim.positions[free] - origin[free]) @ np.array(sim.gravity, dtype=float))).sum()
+    return kinetic + springs + gravity
+
+def stateBytes(sim): # bytes held by the point, spring and adjacency arrays
+    '''
+    ## stateBytes()
+    Outputs the bytes held by every NumPy array of the point buffer, the spring buffer and the adjacency, spare capacity included, i.e. the memory the world's state takes whatever the solver.
+    '''
+    return sum(value.nbytes for owner in [sim.points, sim.springs, sim.adjacency] for value in vars(owner).values() if isinstance(value, np.ndarray))
+
+def measure(template, solver, steps=STEPS): # one structure under one solver
+    '''
+    ## measure()
+    Runs `template` under `solver` for `steps` substeps. Outputs a dictionary with the substeps per second, the energy drift (energy gained or lost by the end, as a fraction of the most gravitational energy exchanged during the run, 0 for a perfectly conservative solver), the peak memory allocated by a few traced substeps, the size of the state arrays, and whether the run blew up.
+    '''
+    sim = forSolver(template, solver)
+    origin = sim.positions.copy()
+    startEnergy = totalEnergy(sim, origin)
+    exchanged = 0.0
+    seconds = 0.0
+    for step in range(steps):
+        start = time.perf_counter()
+        sim.step()
+        seconds += time.perf_counter() - start
+        gravity = -(sim.baseMasses[~sim.fixed] * ((sim.positions - origin)[~sim.fixed] @ np.array(sim.gravity, dtype=float))).sum()
+        exchanged = max(exchanged, abs(gravity))
+    endEnergy = totalEnergy(sim, origin)
+    exploded = not np.isfinite(sim.positions).all()
+
+    tracemalloc.start()
+    for step in range(MEMORYSTEPS):
+        sim.step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "points": len(sim.positions),
+        "springs": len(sim.springEnds),
+        "solver": solver,
+        "stepsPerSecond": steps / seconds,
+        "energyDrift": None if exploded or exchanged == 0 else float((endEnergy - startEnergy) / exchanged),
+        "peakStepMB": peak / 1e6,
+        "stateMB": stateBytes(sim) / 1e6,
+        "exploded": exploded,
+    }
+
+def runSuite(structures, solverNames, steps=STEPS): # every structure, size and solver
+    '''
+    ## runSuite()
+    Builds every structure at every size in `structures` (name -> sizes) once and measures it under every solver in `solverNames`, printing each row as it finishes. Outputs the list of result dictionaries.
+    '''
+    results = []
+    print("structure  size  points  springs  solver    steps/s   energy drift  peak MB  state MB")
+    for name, sizes in structures.items():
+        build = STRUCTURES[name][0]
+        for size in sizes:
+            template = build(size)
+            for solver in solverNames:
+                result = {"structure": name, "size": size}
+                result.update(measure(template, solver, steps))
+                results.append(result)
+                drift = "exploded" if result["exploded"] else str(round(result["energyDrift"], 4)) if result["energyDrift"] is not None else "-"
+                print(name.ljust(11) + str(size).ljust(6) + str(result["points"]).ljust(8) + str(result["springs"]).ljust(9) + solver.ljust(10) + str(round(result["stepsPerSecond"], 1)).ljust(10) + drift.ljust(14) + str(round(result["peakStepMB"], 2)).ljust(9) + str(round(result["stateMB"], 2)))
+    return results
+
+def revision(): # git revision of the tree being measured
+    '''
+    ## revision()
+    Outputs the short git revision of the checkout this script lives in, which names the results file. Outputs `"unversioned"` outside a git checkout or without git.
+    '''
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unversioned"
+
+def compare(results, baselinePath): # regression check against a stored run
+    '''
+    ## compare()
+    Prints the speed of every run relative to the matching run (same structure, size and solver) in the stored results at `baselinePath`, flagging the ones below `REGRESSION`. Outputs the number of regressions.
+    '''
+    with open(baselinePath) as file:
+        baseline = {(row["structure"], row["size"], row["solver"]): row for row in json.load(file)["results"]}
+    regressions = 0
+    print("compared with " + baselinePath)
+    for row in results:
+        old = baseline.get((row["structure"], row["size"], row["solver"]))
+        if old is None:
+            continue
+        ratio = row["stepsPerSecond"] / old["stepsPerSecond"]
+        slower = ratio < REGRESSION
+        regressions += slower
+        print(row["structure"].ljust(11) + str(row["size"]).ljust(6) + row["solver"].ljust(10) + str(round(ratio, 2)) + "x" + ("  REGRESSION" if slower else ""))
+    return regressions
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every solver on parametric structures and store the results.")
+    parser.add_argument("--quick", action="store_true", help="only the smallest sizes")
+    parser.add_argument("--solvers", nargs="+", default=solvers.SOLVERS, choices=solvers.SOLVERS, help="solvers to measure")
+    parser.add_argument("--steps", type=int, default=STEPS, help="substeps timed per run")
+    parser.add_argument("--output", default=None, help="results file (default: bench/results/<git revision>.json)")
+    parser.add_argument("--compare", default=None, help="stored results to check for regressions, exits with 1 if any run got slower")
+    arguments = parser.parse_args()
+
+    structures = QUICK if arguments.quick else {name: sizes for name, (build, sizes) in STRUCTURES.items()}
+    results = runSuite(structures, arguments.solvers, arguments.steps)
+
+    label = revision()
+    output = arguments.output or os.path.join(RESULTS, label + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({
+            "revision": label,
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "quick": arguments.quick,
+            "steps": arguments.steps,
+            "results": results,
+        }, file, indent=1)
+    print("stored " + output)
+
+    if arguments.compare and compare(results, arguments.compare):
+        sys.exit(1)
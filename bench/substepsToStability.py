@@ -0,0 +1,84 @@
+###### IMPORT ######
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import solvers
+from simulation import Simulation, SIMSPEED, DAMPING, DT, SUBSTEPS
+
+
+###### SETUP ######
+
+FRAMETIME = DT * SUBSTEPS # simulated time per rendered frame, held constant while the substep count changes
+RIGIDSTIFFNESS = 6000 # 100x the default STIFFNESS, the "rigid" column of the README table
+FRAMES = 400 # frames each run gets to settle
+SETTLEWINDOW = 30 # the last frames that must all be calm
+SETTLESPEED = 0.05 # px per frame, a point slower than this counts as at rest
+MAXSTRAIN = 0.05 # px, a near-rigid bridge never stretches a member further than this
+SUBSTEPCOUNTS = [1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+
+###### FUNCTIONS ######
+
+def createBridge(solver, substeps): # default 5-truss bridge with a rigid material
+    '''
+    ## createBridge()
+    Builds the default 5-truss bridge from `initializePoints()` for `solver`, with `substeps` substeps per frame. The time step, `simSpeed` and `damping` are rescaled so every substep count simulates the same physical system over the same frame time.
+    '''
+    dt = FRAMETIME / substeps
+    sim = Simulation(dt=dt, substeps=substeps, simSpeed=SIMSPEED * dt / DT, damping=DAMPING ** (dt / DT), stiffness=RIGIDSTIFFNESS, solver=solver)
+    compliance = solvers.equivalentCompliance(RIGIDSTIFFNESS, SIMSPEED, DT) # same material in both solvers
+    sim.compliance = {material: compliance for material in sim.compliance}
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses} # runs past MAXSTRAIN are rejected anyway, breakage would only add debris points
+    sim.initializePoints()
+    sim.createSprings()
+    return sim
+
+def runBridge(solver, substeps): # simulates until settled, exploded or out of frames
+    '''
+    ## runBridge()
+    Runs the bridge for up to `FRAMES` frames and outputs `(settledFrame, maxStrain, seconds)`, where `settledFrame` is `None` if it never came to rest with every member within `MAXSTRAIN`.
+    '''
+    sim = createBridge(solver, substeps)
+    moving = ~sim.fixed
+    calmFrames = 0
+    maxStrain = 0
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        before = sim.positions.copy()
+        sim.step(substeps)
+        strain = sim.springStress().max()
+        speed = np.sqrt(((sim.positions - before)[moving] ** 2).sum(axis=1)).max()
+        if not np.isfinite(strain) or strain > MAXSTRAIN:
+            return None, strain, time.perf_counter() - start
+        maxStrain = max(maxStrain, strain)
+        calmFrames = calmFrames + 1 if speed < SETTLESPEED else 0
+        if calmFrames == SETTLEWINDOW:
+            return frame + 1, maxStrain, time.perf_counter() - start
+    return None, maxStrain, time.perf_counter() - start
+
+def substepsToStability(solver): # smallest substep count that settles
+    '''
+    ## substepsToStability()
+    Outputs the smallest substep count per frame at which the bridge settles under `solver`, with the run's results, or `None` if none of `SUBSTEPCOUNTS` does.
+    '''
+    for substeps in SUBSTEPCOUNTS:
+        settledFrame, maxStrain, seconds = runBridge(solver, substeps)
+        if settledFrame is not None:
+            return substeps, settledFrame, maxStrain, seconds
+    return None
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    print("Rigid 5-truss bridge, stiffness " + str(RIGIDSTIFFNESS) + ", " + str(FRAMES) + " frames max")
+    print("solver   substeps/frame  settled at frame  max strain (px)  wall time (s)")
+    for solver in solvers.SOLVERS:
+        result = substepsToStability(solver)
+        if result is None:
+            print(solver.ljust(9) + "never settled")
+        else:
+            substeps, settledFrame, maxStrain, seconds = result
+            print(solver.ljust(9) + str(substeps).ljust(16) + str(settledFrame).ljust(18) + str(round(maxStrain, 4)).ljust(17) + str(round(seconds, 2)))
@@ -0,0 +1,147 @@
+###### IMPORT ######
+
+import time
+from math import ceil, exp, log, sqrt
+import numpy as np
+
+
+###### CONSTANTS ######
+
+SAFETY = 0.5 # fraction of the estimated stability limit a substep may use
+CFL = 0.25 # fraction of the shortest rest length a point may move in one substep
+ENERGYGROWTH = 0.5 # a frame gaining more than this fraction of its moving energy is growing
+GROWTHFRAMES = 4 # frames in a row of growth that count as going unstable, a car landing on a road gains energy for two or three
+CALMFRAMES = 30 # frames without energy growth before the boost is halved again
+MINSUBSTEPS = 1
+MAXSUBSTEPS = 512
+TIMINGSMOOTHING = 0.2 # weight of the newest frame in the running seconds per substep
+
+###### FUNCTIONS ######
+
+def frameEnergy(sim, acceleration): # kinetic + spring + gravity energy of the free points
+    '''
+    ## frameEnergy()
+    Outputs `(total, moving)`: the mechanical energy of the free points (kinetic, spring and gravitational, in the units of the velocities) and its kinetic plus spring part, the scale its changes are measured against. `acceleration` is `simSpeed / dt`, which turns forces into accelerations per unit time.
+    '''
+    free = ~sim.fixed
+    masses = sim.masses[free] # with the car loads, or a loaded road seems to gain energy as it sags
+    kinetic = 0.5 * (masses * (sim.velocities[free] ** 2).sum(axis=1)).sum()
+    springs = 0.5 * sim.stiffness * acceleration * ((sim.springLengths() - sim.restLengths) ** 2).sum()
+    gravity = -acceleration * (masses * (sim.positions[free] @ np.array(sim.gravity, dtype=float))).sum()
+    return kinetic + springs + gravity, kinetic + springs
+
+###### CONTROLLER ######
+
+class SubstepController: # picks the substep count of every frame
+    '''
+    ## SubstepController
+    Replaces the fixed `substeps` of a Simulation with a count chosen every frame. The frame's length in simulated time stays what `sim` was created with (`dt * substeps`); `dt`, `simSpeed` and `damping` are rescaled to the chosen substep length, the same way `bench/substepsToStability.py` does, so every count simulates the same physics. The count is the largest of three limits:
+
+    - Stability: for the explicit `"force"` solver a substep must be below `2 / omega`, where `omega^2 = stiffness * acceleration * 2 * maxDegree / minMass` bounds the fastest spring mode (Gershgorin) from the current stiffness, the highest spring count at a point and the lightest free point. With `sim.multirate` levels, those points step up to `2^multirate` times per substep (see `multirate.py`), so the limit is that much longer. The masses are the ones `transformThings()` raised for the last substep's car loads. XPBD and implicit steps are stable at any length, so this limit only applies to `"force"`.
+    - CFL: no point may move more than `CFL` of the shortest rest length in one substep.
+    - Energy: `GROWTHFRAMES` frames in a row that each gain more than `ENERGYGROWTH` of their moving (kinetic plus spring) energy, with the moving energy itself growing, double a boost factor on the count. The boost is halved again after every `CALMFRAMES` calm frames. Unstable integration grows energy exponentially, frame after frame; a car leaving a road only changes the masses the energy is measured with.
+
+    With a `budget` (real seconds per frame), the count is capped at what the measured seconds per substep allow, and `stats["budgetLimited"]` says so. `stats` describes the last frame: the substep count and length, both step limits, the lightest mass, the fastest point, the boost, the energy growth, the wall time and which `limit` decided the count.
+    '''
+
+    def __init__(self, sim, budget=None, minSubsteps=MINSUBSTEPS, maxSubsteps=MAXSUBSTEPS):
+        self.frameTime = sim.dt * sim.substeps # simulated time per frame, held constant
+        self.acceleration = sim.simSpeed / sim.dt
+        self.dampingRate = log(sim.damping) / sim.dt if sim.damping > 0 else -np.inf
+        self.base = (sim.dt, sim.simSpeed, sim.damping, sim.substeps) # restored by detach()
+        self.budget = budget
+        self.minSubsteps = minSubsteps
+        self.maxSubsteps = maxSubsteps
+        self.boost = 1 # energy growth multiplier on the substep count
+        self.calmFrames = 0
+        self.growingFrames = 0
+        self.secondsPerSubstep = None
+        self.started = None
+        self.stats = {}
+
+    def stepLimits(self, sim): # longest stable and CFL substep
+        '''
+        ## stepLimits()
+        Outputs `(stableStep, cflStep, minMass, maxSpeed)` for the current state of `sim`, in simulated time. A limit that does not apply is infinite.
+        '''
+        free = ~sim.fixed
+        if not free.any() or len(sim.springEnds) == 0:
+            return np.inf, np.inf, None, 0.0
+        minMass = float(sim.masses[free].min())
+        stableStep = np.inf
+        if sim.solver == "force":
+            maxDegree = int(sim.adjacency.degrees().max())
+            omega = sqrt(sim.stiffness * self.acceleration * 2 * maxDegree / minMass)
+            stableStep = SAFETY * 2 / omega * 2 ** sim.multirate # the stiffest points may take 2^multirate steps per substep
+        maxSpeed = float(np.sqrt((sim.velocities[free] ** 2).sum(axis=1)).max())
+        if not np.isfinite(maxSpeed):
+            return stableStep, 0.0, minMass, maxSpeed
+        restLengths = sim.restLengths[sim.restLengths > 0]
+        cflStep = CFL * restLengths.min() / maxSpeed if maxSpeed > 0 and len(restLengths) != 0 else np.inf
+        return stableStep, cflStep, minMass, maxSpeed
+
+    def begin(self, sim): # picks this frame's substeps and rescales sim to them
+        '''
+        ## begin()
+        Chooses the substep count for the coming frame and sets `substeps`, `dt`, `simSpeed` and `damping` on `sim`.
+        '''
+        stableStep, cflStep, minMass, maxSpeed = self.stepLimits(sim)
+        step = min(stableStep, cflStep)
+        if not step > 0: # blown up, nothing left to estimate from
+            substeps = self.maxSubsteps
+        else:
+            substeps = self.minSubsteps if step == np.inf else ceil(self.frameTime / step)
+        substeps = min(max(substeps * self.boost, self.minSubsteps), self.maxSubsteps)
+        budgetLimited = False
+        if self.budget is not None and self.secondsPerSubstep:
+            affordable = max(int(self.budget / self.secondsPerSubstep), self.minSubsteps)
+            budgetLimited = affordable < substeps
+            substeps = min(substeps, affordable)
+
+        if budgetLimited:
+            limit = "budget"
+        elif self.boost > 1:
+            limit = "energy"
+        elif step == np.inf or substeps <= self.minSubsteps:
+            limit = "minimum"
+        else:
+            limit = "stability" if stableStep <= cflStep else "cfl"
+
+        sim.substeps = substeps
+        sim.dt = self.frameTime / substeps
+        sim.simSpeed = self.acceleration * sim.dt
+        sim.damping = exp(self.dampingRate * sim.dt)
+        self.energy = frameEnergy(sim, self.acceleration)
+        self.stats = {"frame": sim.frame, "substeps": substeps, "dt": sim.dt, "stableStep": stableStep, "cflStep": cflStep, "minMass": minMass, "maxSpeed": maxSpeed, "boost": self.boost, "budgetLimited": budgetLimited, "limit": limit}
+        self.started = time.perf_counter()
+
+    def end(self, sim): # watches the energy and the cost of the frame just run
+        '''
+        ## end()
+        Measures how much energy the frame gained and what a substep cost, and adjusts the boost for the next frame.
+        '''
+        seconds = time.perf_counter() - self.started
+        perSubstep = seconds / sim.substeps
+        self.secondsPerSubstep = perSubstep if self.secondsPerSubstep is None else (1 - TIMINGSMOOTHING) * self.secondsPerSubstep + TIMINGSMOOTHING * perSubstep
+        total, moving = frameEnergy(sim, self.acceleration)
+        growth = (total - self.energy[0]) / max(self.energy[1], moving, 1e-9)
+        if not np.isfinite(growth) or (growth > ENERGYGROWTH and moving > self.energy[1]):
+            self.growingFrames += 1
+            self.calmFrames = 0
+            if self.growingFrames >= GROWTHFRAMES:
+                self.boost = min(self.boost * 2, self.maxSubsteps)
+                self.growingFrames = 0
+        else:
+            self.growingFrames = 0
+            self.calmFrames += 1
+            if self.calmFrames >= CALMFRAMES and self.boost > 1:
+                self.boost //= 2
+                self.calmFrames = 0
+        self.stats.update({"energyGrowth": float(growth), "seconds": seconds})
+
+    def detach(self, sim): # back to the fixed substeps sim was created with
+        '''
+        ## detach()
+        Puts back the `dt`, `simSpeed`, `damping` and `substeps` that `sim` had when the controller was attached, so turning adaptive substepping off returns to the fixed count.
+        '''
+        sim.dt, sim.simSpeed, sim.damping, sim.substeps = self.base
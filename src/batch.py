@@ -0,0 +1,123 @@
+###### IMPORT ######
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scene import loadScene
+from profiler import Profiler
+from trajectory import TrajectoryRecorder
+from adaptive import SubstepController
+
+
+###### CONSTANTS ######
+
+FRAMES = 600 # frames each scenario is run for, 10 seconds at 60 fps
+
+###### FUNCTIONS ######
+
+def farAnchor(sim, thing): # x of the anchor the car is driving toward
+    '''
+    ## farAnchor()
+    Outputs the x coordinate of the fixed point the thing is driving toward (the rightmost one if it accelerates right, otherwise the leftmost one), or `None` if there are no fixed points.
+    '''
+    anchors = sim.positions[sim.fixed, 0]
+    if len(anchors) == 0:
+        return None
+    return anchors.max() if thing[6][0] >= 0 else anchors.min()
+
+def runScenario(path, frames=FRAMES, profileFolder=None, recordFolder=None, adaptive=False, solverWorkers=None): # one headless evaluation
+    '''
+    ## runScenario()
+    Loads a scene file and runs it headless for `frames` frames (stress breakage plus `substeps` substeps each). Outputs a dictionary of metrics: the highest spring stress seen, the number of breakages, whether every thing reached the far anchor, and the run time. With a `profileFolder`, the phases of every step are timed and the timeline is written there as `<scene name>.json` (see `profiler.py`), with the rolling stats also added to the metrics. With a `recordFolder`, every frame is streamed to `<scene name>.traj` there, to be replayed with `replay.py`. With `adaptive`, a `SubstepController` picks the substeps of every frame and the metrics get the mean and highest count and how many frames each limit decided. `solverWorkers` overrides the scene's island threads (`sim.workers`), `runBatch()` sets it to 1 so its processes do not each start a thread per core. Errors are reported in the dictionary instead of raised, so one broken design does not stop a batch; a recording cut off by one is still closed, up to its last frame.
+    '''
+    result = {"scenario": path, "frames": frames}
+    recorder = None
+    try:
+        start = time.perf_counter()
+        sim = loadScene(path)
+        if solverWorkers:
+            sim.workers = solverWorkers
+        if profileFolder:
+            sim.profiler = Profiler(enabled=True, timeline=True)
+        if adaptive:
+            sim.adaptive = SubstepController(sim)
+        substeps, limits = [], {}
+        name = os.path.splitext(os.path.basename(path))[0]
+        if recordFolder:
+            os.makedirs(recordFolder, exist_ok=True)
+            recorder = TrajectoryRecorder(os.path.join(recordFolder, name + ".traj"), sim)
+        targets = [farAnchor(sim, thing) for thing in sim.things]
+        maxStress = 0.0
+        reached = [False] * len(sim.things)
+        for frame in range(frames):
+            sim.stepFrame()
+            if adaptive:
+                substeps.append(sim.substeps)
+                limits[sim.adaptive.stats["limit"]] = limits.get(sim.adaptive.stats["limit"], 0) + 1
+            if recorder is not None:
+                recorder.write(sim)
+            if len(sim.springEnds) != 0:
+                maxStress = max(maxStress, float(sim.springStress().max()))
+            for index, thing in enumerate(sim.things):
+                if targets[index] is not None and not reached[index]:
+                    reached[index] = thing[0] >= targets[index] if thing[6][0] >= 0 else thing[0] <= targets[index]
+
+        result.update({
+            "maxStress": maxStress if np.isfinite(maxStress) else None, # None means the structure blew up
+            "breakages": sim.breakages,
+            "reachedFarAnchor": len(reached) != 0 and all(reached),
+            "seconds": time.perf_counter() - start,
+        })
+        if adaptive and len(substeps) != 0:
+            result["substeps"] = {"mean": float(np.mean(substeps)), "max": max(substeps), "limits": limits}
+        if profileFolder:
+            os.makedirs(profileFolder, exist_ok=True)
+            sim.profiler.dump(os.path.join(profileFolder, name + ".json"))
+            result["profile"] = sim.profiler.stats()
+    except Exception as error:
+        result["error"] = repr(error)
+    finally:
+        if recorder is not None:
+            recorder.close()
+    return result
+
+def runBatch(paths, frames=FRAMES, workers=None, profileFolder=None, recordFolder=None, adaptive=False): # many evaluations over every core
+    '''
+    ## runBatch()
+    Runs `runScenario()` on every scene file on a process pool (one worker per core unless `workers` is given) and outputs the metrics in the same order as `paths`. The processes already fill the cores, so each one steps its islands on a single thread.
+    '''
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        return [runScenario(path, frames, profileFolder, recordFolder, adaptive) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunk = max(1, len(paths) // (workers * 4)) # big enough to amortize the pickling, small enough to balance
+        return list(executor.map(runScenario, paths, [frames] * len(paths), [profileFolder] * len(paths), [recordFolder] * len(paths), [adaptive] * len(paths), [1] * len(paths), chunksize=chunk))
+
+###### MAIN ######
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run scene files headless and report per-scenario metrics.")
+    parser.add_argument("scenarios", nargs="+", help="scene files to evaluate")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="frames to simulate per scenario")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--output", default=None, help="write the metrics to this JSON file")
+    parser.add_argument("--profile", default=None, help="time every phase and write one timeline per scenario into this folder")
+    parser.add_argument("--record", default=None, help="stream every frame of every scenario to a trajectory file in this folder")
+    parser.add_argument("--adaptive", action="store_true", help="pick the substeps of every frame from a stability estimate instead of the scene's fixed count")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    results = runBatch(arguments.scenarios, arguments.frames, arguments.workers, arguments.profile, arguments.record, arguments.adaptive)
+    for result in results:
+        if "error" in result:
+            print(result["scenario"] + ": error " + result["error"])
+        else:
+            print(result["scenario"] + ": max stress " + str(result["maxStress"]) + ", breakages " + str(result["breakages"]) + ", reached far anchor " + str(result["reachedFarAnchor"]))
+    print(str(len(results)) + " scenarios in " + str(round(time.perf_counter() - start, 2)) + " s")
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
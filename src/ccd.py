@@ -0,0 +1,105 @@
+###### IMPORT ######
+
+import numpy as np
+from intersection import segmentIntersections, boxPairs, gridPairs
+
+
+###### CONSTANTS ######
+
+SKIN = 0.01 # how far in front of a surface a swept point is left, so the next sweep starts on the free side
+GROUNDRESTITUTION = 1 # ground lines reverse the normal velocity, like the groundLevel bounce
+ROADRESTITUTION = 0 # cars and points come to rest against road springs instead of bouncing off them
+ROADMOTION = 0.1 # points moving less than this fraction of the shortest road's rest length in a substep are not swept against roads, close pressure with its ends has time to push them
+
+###### FUNCTIONS ######
+
+def lineNormals(starts, ends, flipped): # normalsLibrary -> unit normals of the free side
+    '''
+    ## lineNormals()
+    Outputs the unit normal of every ground line, pointing to its free side. Like `side()` in `test/old.py`, the free side of a line from left to right is above it unless its `flipped` entry (its `normalsLibrary` value) is set.
+    '''
+    segment = ends - starts
+    normals = np.stack([segment[:, 1], -segment[:, 0]], axis=1)
+    normals /= np.maximum(np.sqrt((normals ** 2).sum(axis=1)), 1e-12)[:, None]
+    return np.where(np.asarray(flipped, dtype=bool)[:, None], -normals, normals)
+
+def otherGroups(points, segments, lows, highs, groups, segmentLows, segmentHighs, segmentGroups): # which points and segments can meet a different group
+    '''
+    ## otherGroups()
+    Narrows `points` and `segments` down to the ones that may overlap something of another group: the segments of every group are merged into one bounding box (ignoring NaN corners), `gridPairs()` pairs the points' boxes with those, and pairs within one group are dropped. Outputs the remaining `(points, segments)`.
+    '''
+    names, segmentBoxes = np.unique(segmentGroups[segments], return_inverse=True)
+    boxLows, boxHighs = np.full((len(names), 2), np.inf), np.full((len(names), 2), -np.inf)
+    np.fmin.at(boxLows, segmentBoxes, segmentLows[segments])
+    np.fmax.at(boxHighs, segmentBoxes, segmentHighs[segments])
+    found = gridPairs(lows[points], highs[points], boxLows, boxHighs)
+    pointGroups = groups[points[found[:, 0]]]
+    found = found[(pointGroups < 0) | (pointGroups != names[found[:, 1]])]
+    return points[np.unique(found[:, 0])], segments[np.isin(segmentBoxes, found[:, 1])]
+
+def sweep(previous, current, starts, ends, normals, radii=None, groups=None, segmentGroups=None, minMotion=0): # earliest crossing of every moving point
+    '''
+    ## sweep()
+    Swept-segment continuous collision detection. Every point's motion `previous -> current` is intersected with the segments `starts -> ends`. Rows of `normals` give a segment's free side; NaN rows are two-sided (road springs), whose free side is whichever side the point came from. Points with a radius (things) are kept that far off one-sided segments. Against two-sided segments only their centre is swept, since `contact.py` already handles a thing resting on a road, and a crossing puts them a radius in front of it.
+    One-sided segments (ground lines, few and long) get a `boxPairs()` broadphase against every point. Two-sided ones get a `gridPairs()` broadphase, and only against the points that moved more than `minMotion` this substep (`ROADMOTION` of the shortest road's rest length in `Simulation.sweepCollisions()`), since a point moving less than that cannot tunnel through a road. A point is not swept against a segment of its own group (`groups` and `segmentGroups`, ex: island labels, -1 for none), so a body's own road springs, which its points lie on inside a lattice, are never obstacles to it.
+    Outputs `(points, segments, hitPoints, hitNormals)` with one entry per point that crossed something, for the earliest crossing along its motion: where it should be put back and the normal of the surface. Only motion into a surface counts, so points can always leave.
+    '''
+    empty = np.zeros(0, dtype=np.int64)
+    if len(previous) == 0 or len(starts) == 0:
+        return empty, empty, np.zeros((0, 2)), np.zeros((0, 2))
+    radii = np.zeros(len(previous)) if radii is None else np.asarray(radii, dtype=float)
+    lows = np.minimum(previous, current) - radii[:, None]
+    highs = np.maximum(previous, current) + radii[:, None]
+    segmentLows, segmentHighs = np.minimum(starts, ends), np.maximum(starts, ends)
+    roads = np.isnan(normals[:, 0])
+    pairs = [np.zeros((0, 2), dtype=np.int64)]
+    lines = np.nonzero(~roads)[0]
+    if len(lines) != 0:
+        found = boxPairs(lows, highs, segmentLows[lines], segmentHighs[lines])
+        pairs.append(np.stack([found[:, 0], lines[found[:, 1]]], axis=1))
+    roads = np.nonzero(roads)[0]
+    if len(roads) != 0:
+        with np.errstate(invalid="ignore"):
+            movers = np.nonzero(np.sqrt(((current - previous) ** 2).sum(axis=1)) > minMotion)[0] # NaN motion moves nowhere
+        if groups is not None: # a cheap pass over one box per group first, so a body is never compared against its own roads
+            movers, roads = otherGroups(movers, roads, lows, highs, groups, segmentLows, segmentHighs, segmentGroups)
+        found = gridPairs(lows[movers], highs[movers], segmentLows[roads], segmentHighs[roads])
+        pairs.append(np.stack([movers[found[:, 0]], roads[found[:, 1]]], axis=1))
+    pairs = np.concatenate(pairs)
+    if groups is not None:
+        pointGroups = groups[pairs[:, 0]]
+        pairs = pairs[(pointGroups < 0) | (pointGroups != segmentGroups[pairs[:, 1]])]
+    point, segment = pairs[:, 0], pairs[:, 1]
+
+    pairNormals = normals[segment]
+    twoSided = np.isnan(pairNormals[:, 0])
+    if twoSided.any():
+        direction = ends[segment[twoSided]] - starts[segment[twoSided]]
+        perpendicular = np.stack([direction[:, 1], -direction[:, 0]], axis=1)
+        perpendicular /= np.maximum(np.sqrt((perpendicular ** 2).sum(axis=1)), 1e-12)[:, None]
+        cameFrom = ((previous[point[twoSided]] - starts[segment[twoSided]]) * perpendicular).sum(axis=1)
+        pairNormals[twoSided] = perpendicular * np.where(cameFrom < 0, -1, 1)[:, None]
+
+    motion = current[point] - previous[point]
+    into = (motion * pairNormals).sum(axis=1) < 0
+    offset = pairNormals * np.where(twoSided, 0, radii[point])[:, None]
+    hits, hitPoints, t, u = segmentIntersections(previous[point], current[point], starts[segment] + offset, ends[segment] + offset)
+    hits &= into
+    hitPoints = hitPoints + pairNormals * (np.where(twoSided, radii[point], 0) + SKIN)[:, None]
+
+    point, segment, hitPoints, pairNormals, t = point[hits], segment[hits], hitPoints[hits], pairNormals[hits], t[hits]
+    order = np.lexsort([t, point]) # by point, then earliest first
+    first = order[np.unique(point[order], return_index=True)[1]]
+    return point[first], segment[first], hitPoints[first], pairNormals[first]
+
+def resolveSweeps(positions, velocities, points, hitPoints, hitNormals, restitution): # moves crossed points back in front of the surface
+    '''
+    ## resolveSweeps()
+    Puts every swept point back where `sweep()` found it should be, just in front of the surface, and reflects the part of its velocity going into the surface, scaled by `restitution` (1 bounces fully, 0 stops it). Edits `positions` and `velocities` in place.
+    '''
+    if len(points) == 0:
+        return
+    positions[points] = hitPoints
+    normalSpeed = (velocities[points] * hitNormals).sum(axis=1)
+    bounce = (1 + restitution) * np.minimum(normalSpeed, 0)
+    velocities[points] -= hitNormals * bounce[:, None]
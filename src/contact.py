@@ -0,0 +1,65 @@
+###### IMPORT ######
+
+import numpy as np
+
+
+###### CONSTANTS ######
+
+CONTACTSTIFFNESS = 0.3 # push on a thing per pixel it overlaps a road, applied to both its position and its acceleration
+
+###### FUNCTIONS ######
+
+def closestOnSegments(points, starts, ends): # exact closest point on every segment
+    '''
+    ## closestOnSegments()
+    Outputs `(t, closest)`: the parameter in [0, 1] of the point on each segment `starts -> ends` closest to `points`, and that point. All inputs broadcast against each other, so one point can be tested against many segments or many worlds at once.
+    '''
+    segment = ends - starts
+    lengthSquared = segment[..., 0] ** 2 + segment[..., 1] ** 2
+    toPoint = points - starts
+    t = (toPoint[..., 0] * segment[..., 0] + toPoint[..., 1] * segment[..., 1]) / np.where(lengthSquared > 0, lengthSquared, 1)
+    t = np.clip(t, 0, 1)
+    return t, starts + segment * t[..., None]
+
+def boxFilter(center, radius, starts, ends): # cheap rejection before the exact test
+    '''
+    ## boxFilter()
+    Outputs a mask of the segments whose bounding box, grown by `radius`, contains `center`. Only these can touch a circle of that radius.
+    '''
+    low = np.minimum(starts, ends) - radius
+    high = np.maximum(starts, ends) + radius
+    return ((center >= low) & (center <= high)).all(axis=-1)
+
+def circleSegmentContacts(center, radius, starts, ends): # exact circle vs segment overlap
+    '''
+    ## circleSegmentContacts()
+    Tests a circle against segments and outputs `(t, normals, depths)` per segment: the barycentric parameter of the contact point, the unit normal pushing the circle away from the segment and how deep the circle overlaps it (0 where it does not touch). A circle centred exactly on a segment is pushed out along the segment's upward perpendicular.
+    '''
+    t, closest = closestOnSegments(center, starts, ends)
+    away = center - closest
+    distances = np.sqrt(away[..., 0] ** 2 + away[..., 1] ** 2)
+    segment = ends - starts
+    perpendicular = np.stack([segment[..., 1], -segment[..., 0]], axis=-1)
+    perpendicular *= np.where(perpendicular[..., 1] > 0, -1, 1)[..., None] # pointing up the screen
+    perpendicularLength = np.sqrt(perpendicular[..., 0] ** 2 + perpendicular[..., 1] ** 2)
+    normals = np.where((distances > 0)[..., None], away / np.where(distances > 0, distances, 1)[..., None], perpendicular / np.where(perpendicularLength > 0, perpendicularLength, 1)[..., None])
+    depths = np.maximum(radius - distances, 0)
+    return t, normals, depths
+
+def contactLoads(ends, t, depths, mass, count): # the thing's weight shared onto the road endpoints
+    '''
+    ## contactLoads()
+    Spreads `mass` over the endpoints of the touching segments and outputs the extra mass of each of `count` points. Every contact carries a share proportional to its depth, split between the two endpoints of its segment by the barycentric parameter `t`.
+    '''
+    total = depths.sum()
+    if total <= 0:
+        return np.zeros(count)
+    shares = mass * depths / total
+    return np.bincount(ends[:, 0], shares * (1 - t), count) + np.bincount(ends[:, 1], shares * t, count)
+
+def contactPush(normals, depths): # total push out of every touching segment
+    '''
+    ## contactPush()
+    Outputs the push on a thing from all of its contacts: each normal weighted by its depth, scaled by `CONTACTSTIFFNESS`.
+    '''
+    return (normals * depths[..., None]).sum(axis=-2) * CONTACTSTIFFNESS
@@ -0,0 +1,85 @@
+###### IMPORT ######
+
+import numpy as np
+
+
+###### CONSTANTS ######
+
+BREAKSTRESSES = {"wood": 5, "road": 5} # stretch (in px) past which a spring of each material snaps
+
+###### FUNCTIONS ######
+
+def breakThresholds(materials, springMaterials, breakStresses): # material names -> one threshold per spring
+    '''
+    ## breakThresholds()
+    Outputs the break stress of every spring from its material index, given the `materials` name list and a `breakStresses` dictionary.
+    '''
+    table = np.array([breakStresses[material] for material in materials], dtype=float)
+    return table[springMaterials]
+
+def overstressed(stress, thresholds, ends, degrees): # springs that should snap
+    '''
+    ## overstressed()
+    Outputs the indices of the springs stretched past their threshold that are still attached to something, ie: at least one of their ends is shared with another spring. Loose debris is never broken again.
+    '''
+    shared = (degrees[ends] > 1).any(axis=1)
+    return np.nonzero((stress > thresholds) & shared)[0]
+
+def detachSprings(points, springs, adjacency, snapped): # O(breaks) fracture, in place
+    '''
+    ## detachSprings()
+    Detaches every spring in `snapped` from the structure by moving each of its shared ends onto a new copy of that point (same position, velocity, mass and fixed flag), so the spring falls as loose debris. All copies are appended to `points` in one block, the spring ends are rewritten in place and `adjacency` is patched with `detachEnds()`, so the cost grows with the number of breaks, not the size of the world. Outputs the (B, 2) spring ends after detaching.
+    '''
+    if len(snapped) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    ends = springs.ends[snapped]
+    degrees = adjacency.rowCounts[ends]
+    owners, keeper, inverse, losing = np.unique(ends.ravel(), return_index=True, return_inverse=True, return_counts=True)
+    keeps = np.zeros(ends.size, dtype=bool) # a point whose springs all snap at once keeps one of them instead of being left empty
+    keeps[keeper] = True
+    degrees = np.where((losing[inverse].reshape(-1, 2) == degrees) & keeps.reshape(-1, 2), 1, degrees)
+    detach = degrees > 1
+    spring, end = np.nonzero(detach)
+    oldPoints = ends[spring, end]
+
+    first = points.extend(points.positions[oldPoints], points.velocities[oldPoints], points.fixed[oldPoints], points.baseMasses[oldPoints])
+    newPoints = first + np.arange(len(oldPoints))
+    adjacency.addPoints(len(oldPoints))
+
+    newEnds = ends.copy()
+    newEnds[spring, end] = newPoints
+    springs.ends[snapped] = newEnds
+    adjacency.detachEnds(snapped[spring], oldPoints, newPoints, newEnds[spring, 1 - end])
+    return newEnds
+
+###### FRACTURE QUEUE ######
+
+class FractureQueue: # springs waiting to snap
+    '''
+    ## FractureQueue
+    Springs found overstressed wait here until the next `drain()`, which detaches all of them at once; there is no limit on how many snap per substep. `push()` ignores springs that are already queued.
+    '''
+
+    def __init__(self):
+        self.pending = np.zeros(0, dtype=np.int64)
+        self.total = 0 # springs snapped so far
+
+    def __len__(self):
+        return len(self.pending)
+
+    def push(self, springs):
+        '''
+        ## push()
+        Queues spring indices to snap.
+        '''
+        self.pending = np.union1d(self.pending, springs).astype(np.int64)
+
+    def drain(self, points, springs, adjacency): # snaps everything queued
+        '''
+        ## drain()
+        Detaches every queued spring with `detachSprings()`, empties the queue and outputs the indices of the springs that snapped.
+        '''
+        snapped, self.pending = self.pending, np.zeros(0, dtype=np.int64)
+        detachSprings(points, springs, adjacency, snapped)
+        self.total += len(snapped)
+        return snapped
@@ -0,0 +1,102 @@
+###### IMPORT ######
+
+import numpy as np
+from spatial import SpatialGrid
+
+
+###### CONSTANTS ######
+
+GRIDSIZE = 2 # gridPairs() buckets boxes up to this many times the median size, bigger ones are swept and pruned
+
+
+###### FUNCTIONS ######
+
+def segmentIntersections(starts1, ends1, starts2, ends2): # vectorized getIntersectionPoint()
+    '''
+    ## segmentIntersections()
+    Vectorized `getIntersectionPoint()`: intersects the segments `starts1 -> ends1` with the segments `starts2 -> ends2` (arrays of shape (..., 2) that broadcast against each other). Outputs `(hits, points, t, u)`, where `t` and `u` are the parameters of the intersection along the first and second segments, and `hits` is where both lie in [0, 1]. Parallel segments never hit, and their `points`, `t` and `u` are NaN.
+    '''
+    x1, y1 = starts1[..., 0], starts1[..., 1]
+    x2, y2 = ends1[..., 0], ends1[..., 1]
+    x3, y3 = starts2[..., 0], starts2[..., 1]
+    x4, y4 = ends2[..., 0], ends2[..., 1]
+
+    denominator = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    parallel = denominator == 0
+    denominator = np.where(parallel, np.nan, denominator)
+
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denominator
+    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denominator
+    points = np.stack([x1 + t * (x2 - x1), y1 + t * (y2 - y1)], axis=-1)
+    hits = (t >= 0) & (t <= 1) & (u >= 0) & (u <= 1) # NaN compares False, so parallel pairs drop out here
+    return hits, points, t, u
+
+def batchIntersections(segments1, segments2): # getIntersectionPoint() on N pairs at once
+    '''
+    ## batchIntersections()
+    Intersects segment `i` of `segments1` with segment `i` of `segments2`, both (N, 2, 2) arrays in the `[[x1, y1], [x2, y2]]` format of `getIntersectionPoint()`. Outputs `(hits, points, t, u)` of shapes (N,), (N, 2), (N,) and (N,).
+    '''
+    segments1 = np.asarray(segments1, dtype=float).reshape(-1, 2, 2)
+    segments2 = np.asarray(segments2, dtype=float).reshape(-1, 2, 2)
+    return segmentIntersections(segments1[:, 0], segments1[:, 1], segments2[:, 0], segments2[:, 1])
+
+def allPairIntersections(segments1, segments2): # every segment of one set against every segment of another
+    '''
+    ## allPairIntersections()
+    Intersects every one of the M segments of `segments1` with every one of the N segments of `segments2` (both (M or N, 2, 2) arrays). Outputs `(hits, points, t, u)` of shapes (M, N), (M, N, 2), (M, N) and (M, N), where `t` is along the segment of `segments1`.
+    '''
+    segments1 = np.asarray(segments1, dtype=float).reshape(-1, 2, 2)
+    segments2 = np.asarray(segments2, dtype=float).reshape(-1, 2, 2)
+    return segmentIntersections(segments1[:, None, 0], segments1[:, None, 1], segments2[None, :, 0], segments2[None, :, 1])
+
+def boxPairs(lows1, highs1, lows2, highs2): # broadphase: which boxes of two sets overlap
+    '''
+    ## boxPairs()
+    Sweep and prune broadphase between two sets of axis-aligned boxes given by their (N, 2) low and high corners. Outputs an (P, 2) array of `[index1, index2]` pairs whose boxes overlap. The second set is sorted by its low x once; each box of the first set then only looks at the boxes of the second set whose low x lies within one box width of it.
+    '''
+    finite1 = np.nonzero(np.isfinite(lows1).all(axis=1) & np.isfinite(highs1).all(axis=1))[0] # a blown up point overlaps nothing
+    finite2 = np.nonzero(np.isfinite(lows2).all(axis=1) & np.isfinite(highs2).all(axis=1))[0]
+    if len(finite1) == 0 or len(finite2) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    lows1, highs1, lows2, highs2 = lows1[finite1], highs1[finite1], lows2[finite2], highs2[finite2]
+    order = np.argsort(lows2[:, 0], kind="stable")
+    sortedLows = lows2[order, 0]
+    widest = (highs2[:, 0] - lows2[:, 0]).max()
+    first = np.searchsorted(sortedLows, lows1[:, 0] - widest, side="left")
+    last = np.searchsorted(sortedLows, highs1[:, 0], side="right")
+    counts = last - first
+    index1 = np.repeat(np.arange(len(lows1)), counts)
+    index2 = order[np.repeat(first - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+    overlap = ((lows1[index1] <= highs2[index2]) & (lows2[index2] <= highs1[index1])).all(axis=1)
+    return np.stack([finite1[index1[overlap]], finite2[index2[overlap]]], axis=1)
+
+def gridPairs(lows1, highs1, lows2, highs2): # broadphase through a SpatialGrid, for many small boxes of about one size
+    '''
+    ## gridPairs()
+    Same output as `boxPairs()`, but sorted in two dimensions instead of along x only, so a column of boxes is not compared against everything above and below it. Boxes up to `GRIDSIZE` times the median half extent of the second set are small: the small boxes of the second set are bucketed by centre into a `SpatialGrid` and every small box of the first set only looks at the cells around its own centre. The few big boxes on either side (ex: a point that blew up, a debris spring stretched across the world) go through `boxPairs()`, so they cannot make the cells big for everyone.
+    '''
+    finite1 = np.nonzero(np.isfinite(lows1).all(axis=1) & np.isfinite(highs1).all(axis=1))[0]
+    finite2 = np.nonzero(np.isfinite(lows2).all(axis=1) & np.isfinite(highs2).all(axis=1))[0]
+    if len(finite1) == 0 or len(finite2) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    lows1, highs1, lows2, highs2 = lows1[finite1], highs1[finite1], lows2[finite2], highs2[finite2]
+    extents1 = ((highs1 - lows1) / 2).max(axis=1)
+    extents2 = ((highs2 - lows2) / 2).max(axis=1)
+    largest = max(GRIDSIZE * np.median(extents2), 1e-9) # half extent of the biggest box counted as small
+    small1, small2 = np.nonzero(extents1 <= largest)[0], np.nonzero(extents2 <= largest)[0]
+    big1, big2 = np.nonzero(extents1 > largest)[0], np.nonzero(extents2 > largest)[0]
+
+    pairs = [np.zeros((0, 2), dtype=np.int64)]
+    if len(small1) != 0 and len(small2) != 0:
+        reach = 1.5 * max(extents1[small1].max() + extents2[small2].max(), 1e-9) # overlapping boxes have centres at most sqrt(2) times their summed half extents apart
+        found = SpatialGrid((lows2[small2] + highs2[small2]) / 2, reach).queryPoints((lows1[small1] + highs1[small1]) / 2, reach)
+        pairs.append(np.stack([small1[found[:, 0]], small2[found[:, 1]]], axis=1))
+    if len(big1) != 0: # big boxes of the first set against everything
+        found = boxPairs(lows1[big1], highs1[big1], lows2, highs2)
+        pairs.append(np.stack([big1[found[:, 0]], found[:, 1]], axis=1))
+    if len(big2) != 0 and len(small1) != 0: # small boxes of the first set against the big ones of the second
+        found = boxPairs(lows1[small1], highs1[small1], lows2[big2], highs2[big2])
+        pairs.append(np.stack([small1[found[:, 0]], big2[found[:, 1]]], axis=1))
+    index1, index2 = np.concatenate(pairs).T
+    overlap = ((lows1[index1] <= highs2[index2]) & (lows2[index2] <= highs1[index1])).all(axis=1)
+    return np.stack([finite1[index1[overlap]], finite2[index2[overlap]]], axis=1)
@@ -0,0 +1,228 @@
+###### IMPORT ######
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from spatial import SpatialGrid
+
+
+###### CONSTANTS ######
+
+SLEEPENERGY = 1e-5 # kinetic energy (0.5 * mass * velocity^2) below which a point counts as still
+SLEEPSTRAINRATE = 1e-3 # px of length change per substep below which a spring counts as still
+SLEEPSTEPS = 60 # substeps an island has to stay still before it falls asleep
+WAKEDISTANCE = 50 # px, a breakage wakes sleeping points this close to the snapped spring
+PARALLELPOINTS = 2000 # fewer points than this are solved in one piece, thread dispatch would cost more than it saves
+WORKERS = os.cpu_count() or 1 # default number of solver threads
+
+###### FUNCTIONS ######
+
+def connectedComponents(count, ends): # island label of every point
+    '''
+    ## connectedComponents()
+    Labels the connected components of `count` points joined by the springs `ends`, vectorized: every round each spring hooks the larger of its two labels onto the smaller one, then the labels are compressed by pointer jumping, until nothing changes (a few rounds, growing with the log of the island size). Outputs `(labels, islandCount)` with labels numbered 0 to islandCount - 1 in order of each island's lowest point.
+    '''
+    labels = np.arange(count)
+    if len(ends) != 0:
+        while True:
+            first, second = labels[ends[:, 0]], labels[ends[:, 1]]
+            differ = first != second
+            if not differ.any():
+                break
+            np.minimum.at(labels, np.maximum(first, second)[differ], np.minimum(first, second)[differ])
+            while True: # pointer jumping, every point straight to its root
+                jumped = labels[labels]
+                if np.array_equal(jumped, labels):
+                    break
+                labels = jumped
+    roots, labels = np.unique(labels, return_inverse=True)
+    return labels.reshape(-1), len(roots)
+
+def balancedBins(groups, bins): # splits independent groups of points between workers
+    '''
+    ## balancedBins()
+    Takes the group of every point (points of one group must be solved together) and deals whole groups out to at most `bins` bins of about the same number of points: groups are laid end to end and cut where the running point count crosses each multiple of `total / bins`. Outputs one sorted array of point positions (indices into `groups`) per non-empty bin.
+    '''
+    order = np.argsort(groups, kind="stable")
+    ordered = groups[order]
+    starts = np.concatenate([[True], ordered[1:] != ordered[:-1]]) # first point of every group
+    groupStart = np.maximum.accumulate(np.where(starts, np.arange(len(order)), 0))
+    pointBins = (groupStart * bins) // max(len(order), 1) # every point goes with the first point of its group
+    cuts = np.nonzero(np.diff(pointBins))[0] + 1
+    return [np.sort(members) for members in np.split(order, cuts)]
+
+_pool = None # shared ThreadPoolExecutor, see pool()
+_poolWorkers = 0 # number of threads _pool was made with
+
+def pool(workers): # shared solver threads, created on first use
+    '''
+    ## pool()
+    Outputs the thread pool the solver spreads independent islands over, made on first use and remade (after shutting the old one down) when `workers` changes, so every Simulation shares one set of threads.
+    '''
+    global _pool, _poolWorkers
+    if _pool is None or _poolWorkers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ThreadPoolExecutor(max_workers=workers)
+        _poolWorkers = workers
+    return _pool
+
+###### ISLANDS ######
+
+class Islands: # connected pieces of the world and which of them are asleep
+    '''
+    ## Islands
+    Splits the world into islands, points connected by springs, with a union-find kept up to date as the world changes: `addPoints()` gives every new point its own island, `join()` merges the islands new springs connect and `split()` regroups only the islands a breakage cut. Every label is kept fully compressed (it is the island's lowest point index), so finding a point's island is one lookup, and per island state is stored at its root point.
+
+    It also tracks which islands are asleep. An island falls asleep once every point in it has stayed below `SLEEPENERGY` and every spring below `SLEEPSTRAINRATE` for `SLEEPSTEPS` substeps in a row; sleeping points and springs are left out of the solver, the breakage pass, the broadphase and the collision sweep until `wake()` is called for one of their points.
+    '''
+
+    def __init__(self):
+        self.labels = np.zeros(0, dtype=np.int64) # root (lowest point) of every point's island
+        self.awake = np.zeros(0, dtype=bool) # per root point
+        self.calm = np.zeros(0, dtype=np.int64) # per root point, substeps in a row its island has been still
+        self.cache = None # (points, springs, localEnds) of the awake islands
+        self.sleepingCache = None # (points, SpatialGrid) of the sleeping islands
+
+    @property
+    def count(self): # number of islands
+        return len(self.roots())
+
+    def roots(self):
+        return np.nonzero(self.labels == np.arange(len(self.labels)))[0]
+
+    ### TOPOLOGY
+
+    def addPoints(self, count): # new points, each its own awake island
+        '''
+        ## addPoints()
+        Grows the islands to `count` points; every point added is an awake island of its own until a spring joins it.
+        '''
+        first = len(self.labels)
+        if count <= first:
+            return
+        self.labels = np.concatenate([self.labels, np.arange(first, count)])
+        self.awake = np.concatenate([self.awake, np.ones(count - first, dtype=bool)])
+        self.calm = np.concatenate([self.calm, np.zeros(count - first, dtype=np.int64)])
+        self.changed()
+
+    def join(self, ends): # union of the islands springs connect
+        '''
+        ## join()
+        Merges the islands joined by the springs `ends`. Only the roots involved are worked on (`connectedComponents()` over them), then one relabelling pass points every point at its new root. The merged island is awake if any of its parts was.
+        '''
+        roots = self.labels[np.asarray(ends, dtype=np.int64).reshape(-1, 2)]
+        roots = roots[roots[:, 0] != roots[:, 1]]
+        if len(roots) == 0:
+            return
+        involved, local = np.unique(roots, return_inverse=True)
+        components = connectedComponents(len(involved), local.reshape(-1, 2))[0]
+        firsts = np.unique(components, return_index=True)[1] # involved is sorted, so each component's first entry is its lowest root
+        newRoots = involved[firsts][components]
+        merged = np.zeros(len(self.labels), dtype=bool)
+        np.logical_or.at(merged, newRoots, self.awake[involved])
+        self.awake[newRoots] = merged[newRoots]
+        self.calm[newRoots] = 0
+        target = np.arange(len(self.labels))
+        target[involved] = newRoots
+        self.labels = target[self.labels]
+        self.changed()
+
+    def split(self, points, ends, adjacency): # after springs were removed
+        '''
+        ## split()
+        Regroups the islands of `points` (the ends of springs that were removed or detached) from their remaining springs, found through `adjacency`, so a breakage costs time in proportion to the islands it cut, not to the world. Every piece keeps the awake state of the island it came from.
+        '''
+        roots = np.unique(self.labels[np.asarray(points, dtype=np.int64)])
+        members = np.nonzero(np.isin(self.labels, roots))[0]
+        self.awake[members] = self.awake[self.labels[members]]
+        self.calm[members] = 0
+        self.labels[members] = members
+        springs = np.unique(adjacency.springBuffer[adjacency.rowSlots(members)[1]])
+        self.join(ends[springs])
+        self.changed()
+
+    ### SLEEPING
+
+    def changed(self): # the awake set changed, drop the cached subsets
+        self.cache = None
+        self.sleepingCache = None
+
+    def allAwake(self):
+        return bool(self.awake[self.labels].all())
+
+    def wake(self, points): # wakes the islands of some points
+        '''
+        ## wake()
+        Wakes every island that contains one of `points` and restarts its stillness count. Outputs True if any of them was asleep.
+        '''
+        points = np.asarray(points, dtype=np.int64)
+        islands = self.labels[points[points < len(self.labels)]]
+        if len(islands) == 0:
+            return False
+        self.calm[islands] = 0
+        if self.awake[islands].all():
+            return False
+        self.awake[islands] = True
+        self.changed()
+        return True
+
+    def wakeAll(self): # ex: after the rest lengths change
+        self.calm[:] = 0
+        if not self.awake.all():
+            self.awake[:] = True
+            self.changed()
+
+    def active(self, ends): # awake points and the springs between them
+        '''
+        ## active()
+        Outputs `(points, springs, localEnds)`: the sorted indices of the awake points, the indices of the springs inside awake islands, and those springs' ends renumbered into `points`. Cached until the awake set changes.
+        '''
+        if self.cache is None:
+            points = np.nonzero(self.awake[self.labels])[0]
+            springs = np.nonzero(self.awake[self.labels[ends[:, 0]]])[0] # both ends are in the same island
+            self.cache = (points, springs, np.searchsorted(points, ends[springs]))
+        return self.cache
+
+    def sleeping(self, positions, cellSize): # sleeping points and a grid over them
+        '''
+        ## sleeping()
+        Outputs `(points, grid)`: the indices of the sleeping points and a `SpatialGrid` over them, so cars and breakages can find the sleeping islands they touch. Sleeping points do not move, so this is only rebuilt when the awake set changes.
+        '''
+        if self.sleepingCache is None:
+            points = np.nonzero(~self.awake[self.labels])[0]
+            self.sleepingCache = (points, SpatialGrid(positions[points], cellSize))
+        return self.sleepingCache
+
+    def update(self, points, energies, springs, strainRates, ends): # counts still substeps, outputs the islands that fall asleep
+        '''
+        ## update()
+        Takes the kinetic energy of the awake `points` and the length change of the awake `springs` over the last substep and advances the stillness count of every awake island. Outputs the points of the islands that have now been still for `SLEEPSTEPS` substeps, which are put to sleep.
+        '''
+        moving = np.zeros(len(self.labels), dtype=bool)
+        moving[self.labels[points[energies >= SLEEPENERGY]]] = True
+        moving[self.labels[ends[springs[strainRates >= SLEEPSTRAINRATE], 0]]] = True
+        roots = self.roots()
+        awake = roots[self.awake[roots]]
+        self.calm[awake] = np.where(moving[awake], 0, self.calm[awake] + 1)
+        asleep = awake[self.calm[awake] >= SLEEPSTEPS]
+        if len(asleep) == 0:
+            return np.zeros(0, dtype=np.int64)
+        self.awake[asleep] = False
+        self.changed()
+        return points[~self.awake[self.labels[points]]]
+
+    ### PARALLEL SOLVING
+
+    def solverBins(self, points, closePairs, bins): # independent pieces of work for one substep
+        '''
+        ## solverBins()
+        Groups the `points` solved this substep (whole islands, sorted, with `closePairs` numbered into them) into pieces that share neither a spring nor a close pair; islands within close pressure range of each other are merged for the substep, since one pushes the other. Outputs `balancedBins()` of those groups.
+        '''
+        groups = np.searchsorted(points, self.labels[points]) # an island's root is its lowest point, so it is among the points
+        if len(closePairs) != 0:
+            touching = groups[closePairs]
+            touching = touching[touching[:, 0] != touching[:, 1]]
+            if len(touching) != 0:
+                groups = connectedComponents(len(points), touching)[0][groups]
+        return balancedBins(groups, bins)
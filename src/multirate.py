@@ -0,0 +1,102 @@
+###### IMPORT ######
+
+import numpy as np
+import physics
+from adaptive import SAFETY, CFL
+
+
+###### FUNCTIONS ######
+
+def rateLevels(velocities, masses, fixed, ends, restLengths, stiffness, acceleration, dt, maxLevel): # rate class of every point
+    '''
+    ## rateLevels()
+    Sorts the points into rate classes by their local stiffness to mass ratio. A point at level `r` is stepped `2^r` times per substep of length `dt`. A point needs more steps when `omega^2 = stiffness * acceleration * 2 * degree / mass` bounds a fast spring mode around it (the Gershgorin row of the point, as in `adaptive.SubstepController`). It also needs more when it moves more than `CFL` of its shortest spring in one step. Levels are capped at `maxLevel`, and fixed points stay at level 0. Neighbouring free points are then graded to differ by at most one level, so every interface couples two neighbouring rates; fixed points never move, so they can border any level.
+    '''
+    count = len(masses)
+    levels = np.zeros(count, dtype=np.int64)
+    if count == 0 or len(ends) == 0 or maxLevel <= 0:
+        return levels
+    degrees = np.bincount(ends.ravel(), minlength=count)
+    steps = dt * np.sqrt(stiffness * acceleration * 2 * degrees / masses) / (2 * SAFETY) # steps per substep that keep every spring mode stable
+    shortest = np.full(count, np.inf)
+    stretched = restLengths > 0
+    np.minimum.at(shortest, ends[stretched].ravel(), np.repeat(restLengths[stretched], 2))
+    speeds = np.sqrt((velocities ** 2).sum(axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.maximum(steps, np.where(speeds > 0, dt * speeds / (CFL * shortest), 0))
+        levels = np.where(np.isfinite(steps), np.ceil(np.log2(np.maximum(steps, 1))), maxLevel)
+    levels = np.clip(levels, 0, maxLevel).astype(np.int64)
+    levels[fixed] = 0
+    for _ in range(maxLevel): # grading, a level spreads to its neighbours one lower at a time
+        graded = levels.copy()
+        np.maximum.at(graded, ends[:, 0], levels[ends[:, 1]] - 1)
+        np.maximum.at(graded, ends[:, 1], levels[ends[:, 0]] - 1)
+        graded[fixed] = 0
+        if np.array_equal(graded, levels):
+            break
+        levels = graded
+    return levels
+
+def levelPlan(level, levels, ends, endLevels, pairs): # what one rate class steps on
+    '''
+    ## levelPlan()
+    Outputs `(members, local, springs, localEnds, localPairs)` for the rate class `level` of `levels`, where `endLevels` is `levels[ends]`: `members` are its points, `local` the members followed by their halo (the other ends of their springs and close pairs), `springs` the springs that touch a member and `localEnds`/`localPairs` the springs and close pairs that touch a member, renumbered into `local`.
+    '''
+    isMember = levels == level
+    members = np.nonzero(isMember)[0]
+    springs = np.nonzero((endLevels == level).any(axis=1))[0]
+    pairs = pairs[isMember[pairs].any(axis=1)] if len(pairs) != 0 else pairs
+    isHalo = np.zeros(len(levels), dtype=bool)
+    isHalo[ends[springs]] = True
+    isHalo[pairs] = True
+    isHalo[members] = False
+    local = np.concatenate([members, np.nonzero(isHalo)[0]])
+    renumber = np.empty(len(levels), dtype=np.int64)
+    renumber[local] = np.arange(len(local))
+    return members, local, springs, renumber[ends[springs]], renumber[pairs]
+
+def stepPointsMultirate(positions, velocities, masses, fixed, ends, restLengths, gravity, stiffness, damping, simSpeed, dt, closeLimit, groundLevel, pairs, levels, outPositions=None, outVelocities=None): # physics.stepPoints() at a rate per point
+    '''
+    ## stepPointsMultirate()
+    Advances the points by one substep of length `dt` like `physics.stepPoints()`, but a point at level `r` of `levels` (see `rateLevels()`) takes `2^r` steps of `dt / 2^r`, with `simSpeed` and `damping` scaled to that step length. The finest steps are the ticks of the substep. At every tick, the classes due to step go slowest first. Each one is stepped with `physics.stepPoints()` over its members and their halo, with the halo held still. Interface coupling: a halo point of a slower class is read at its position interpolated between the start and end of its own step, which is already known. A halo point of a faster class is read where it is at that tick. Only the points of the fast classes, their springs and their halo are stepped more than once, so the cost of a stiff region stays with that region. Springs across an interface are evaluated at both rates, so momentum is only conserved to the order of the step.
+    '''
+    if outPositions is None:
+        outPositions = np.empty_like(positions)
+    if outVelocities is None:
+        outVelocities = np.empty_like(velocities)
+    top = int(levels.max()) if len(levels) != 0 else 0
+    if top == 0:
+        return physics.stepPoints(positions, velocities, masses, fixed, ends, restLengths, gravity, stiffness, damping, simSpeed, dt, closeLimit, groundLevel, pairs, outPositions, outVelocities)
+
+    slow = levels == 0 # the slowest class steps first, from the start of the substep, so it needs no plan: the rest is held where it is
+    outVelocities[:] = velocities
+    startPositions, endPositions = positions.copy(), positions.copy() # every point's last step, from startTimes to endTimes in fractions of the substep
+    startTimes, endTimes = np.zeros(len(positions)), np.zeros(len(positions))
+    if slow.any():
+        newPositions, newVelocities = physics.stepPoints(positions, velocities, masses, fixed | ~slow, ends, restLengths, gravity, stiffness, damping, simSpeed, dt, closeLimit, groundLevel, pairs)
+        endPositions[slow] = newPositions[slow]
+        outVelocities[slow] = newVelocities[slow]
+        endTimes[slow] = 1
+    endLevels = levels[ends]
+    plans = [levelPlan(level, levels, ends, endLevels, pairs) for level in range(1, top + 1)]
+    ticks = 2 ** top
+    for tick in range(ticks):
+        time = tick / ticks
+        for level in range(1, top + 1):
+            members, local, springs, localEnds, localPairs = plans[level - 1]
+            if len(members) == 0 or tick % 2 ** (top - level) != 0:
+                continue
+            span = endTimes[local] - startTimes[local]
+            fraction = np.where(span > 0, (time - startTimes[local]) / np.where(span > 0, span, 1), 1)
+            localPositions = startPositions[local] + (endPositions[local] - startPositions[local]) * fraction[:, None]
+            held = fixed[local].copy()
+            held[len(members):] = True # the halo is read, not stepped
+            step = 1 / 2 ** level
+            newPositions, newVelocities = physics.stepPoints(localPositions, outVelocities[local], masses[local], held, localEnds, restLengths[springs], gravity, stiffness, damping ** step, simSpeed * step, dt * step, closeLimit, groundLevel, localPairs)
+            startPositions[members] = endPositions[members]
+            endPositions[members] = newPositions[:len(members)]
+            outVelocities[members] = newVelocities[:len(members)]
+            startTimes[members] = time
+            endTimes[members] = time + step
+    outPositions[:] = endPositions
+    return outPositions, outVelocities
@@ -0,0 +1,134 @@
+###### IMPORT ######
+
+import numpy as np
+from spatial import SpatialGrid
+
+
+###### CONVERSION FUNCTIONS ######
+
+def pointsToArrays(listOfPoints): # splits the list-of-lists point format into flat arrays
+    '''
+    ## pointsToArrays()
+    Converts a list of `[x, y, vx, vy, fixed, mass]` points into a position array, a velocity array, a mass array and a fixed-flag array.
+    '''
+    if len(listOfPoints) == 0:
+        return np.zeros((0, 2)), np.zeros((0, 2)), np.zeros(0), np.zeros(0, dtype=bool)
+    table = np.array([point[0:4] + [point[5]] for point in listOfPoints], dtype=float)
+    fixed = np.array([point[4] for point in listOfPoints], dtype=bool)
+    return table[:, 0:2].copy(), table[:, 2:4].copy(), table[:, 4].copy(), fixed
+
+def arraysToPoints(positions, velocities, masses, fixed): # inverse of pointsToArrays
+    '''
+    ## arraysToPoints()
+    Converts position, velocity, mass and fixed-flag arrays back into the list-of-lists `[x, y, vx, vy, fixed, mass]` point format.
+    '''
+    return [[x, y, vx, vy, isFixed, mass] for (x, y), (vx, vy), mass, isFixed in zip(positions.tolist(), velocities.tolist(), masses.tolist(), fixed.tolist())]
+
+def springsToArrays(springs): # splits the list-of-lists spring format into flat arrays
+    '''
+    ## springsToArrays()
+    Converts a list of `[index1, index2, restLength, material]` springs into an (M, 2) index array and a rest length array.
+    '''
+    if len(springs) == 0:
+        return np.zeros((0, 2), dtype=np.int64), np.zeros(0)
+    ends = np.array([spring[0:2] for spring in springs], dtype=np.int64)
+    restLengths = np.array([spring[2] for spring in springs], dtype=float)
+    return ends, restLengths
+
+
+###### KERNEL FUNCTIONS ######
+
+def springForces(positions, ends, restLengths, stiffness): # Hooke's law over every spring at once
+    '''
+    ## springForces()
+    Computes the net spring force on every point in one vectorized pass. The direction of each spring is taken from its normalized difference vector (no trig), and the per-spring forces are scattered onto both endpoints with `np.bincount`.
+    '''
+    count = len(positions)
+    forces = np.zeros((count, 2))
+    if len(ends) == 0:
+        return forces
+
+    delta = positions[ends[:, 1]] - positions[ends[:, 0]] # vector pointing from the first end to the second end
+    lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    safeLengths = np.where(lengths > 0, lengths, 1)
+    direction = delta / safeLengths[:, None] * (lengths > 0)[:, None] # zero-length springs have no direction, so they push nothing
+    springVectors = direction * (stiffness * (restLengths - lengths))[:, None] # force on the second end, the first end gets the opposite
+
+    for axis in range(2):
+        forces[:, axis] = np.bincount(ends[:, 1], springVectors[:, axis], count) - np.bincount(ends[:, 0], springVectors[:, axis], count)
+    return forces
+
+def pointSpringForce(index, positions, neighbours, springIds, restLengths, stiffness): # Hooke's law over one point's springs only
+    '''
+    ## pointSpringForce()
+    Computes the net spring force on a single point from its adjacency row (the `neighbours` and `springIds` of that point, see `SpringAdjacency`), so the cost is the point's degree rather than the number of springs.
+    '''
+    delta = positions[index] - positions[neighbours] # vectors pointing from each neighbour to this point
+    lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    safeLengths = np.where(lengths > 0, lengths, 1)
+    direction = delta / safeLengths[:, None] * (lengths > 0)[:, None]
+    return (direction * (stiffness * (restLengths[springIds] - lengths))[:, None]).sum(axis=0)
+
+def allPairs(count): # every unordered pair of point indices
+    '''
+    ## allPairs()
+    Outputs an (P, 2) array of every unordered pair of point indices. This is the brute-force candidate list for `closePressure()`, kept as a reference for the `SpatialGrid` broadphase.
+    '''
+    first, second = np.triu_indices(count, 1)
+    return np.stack([first, second], axis=1)
+
+def closePressure(positions, pairs, closeLimit): # "close pressure" between candidate pairs, vectorized
+    '''
+    ## closePressure()
+    Computes the "close pressure" acceleration that pushes points apart when they come within `closeLimit + 5` of each other, checking only the candidate pairs that are passed in.
+    '''
+    count = len(positions)
+    pressure = np.zeros((count, 2))
+    if len(pairs) == 0:
+        return pressure
+
+    delta = positions[pairs[:, 1]] - positions[pairs[:, 0]]
+    distances = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    close = (distances < closeLimit + 5) & (distances > 0) & (distances != closeLimit)
+    if not close.any():
+        return pressure
+
+    pairs = pairs[close]
+    delta = delta[close]
+    distances = distances[close]
+    closeVectors = delta / distances[:, None] * (1 / (distances - closeLimit) - 1/5)[:, None] # pulls the first point toward the second, the second gets the opposite
+
+    for axis in range(2):
+        pressure[:, axis] = np.bincount(pairs[:, 0], closeVectors[:, axis], count) - np.bincount(pairs[:, 1], closeVectors[:, axis], count)
+    return pressure
+
+def stepPoints(positions, velocities, masses, fixed, ends, restLengths, gravity, stiffness, damping, simSpeed, dt, closeLimit, groundLevel, pairs=None, outPositions=None, outVelocities=None): # batched version of transformPoint()
+    '''
+    ## stepPoints()
+    Batched solver step that transforms every point at once. Does the same work as the old per-point `transformPoint()` (ground bounce, spring forces, close pressure, Verlet integration) and outputs the new position and velocity arrays. The close pressure candidates come from `pairs`, or from a fresh `SpatialGrid` when none are given. When `outPositions`/`outVelocities` are given (ex: the back buffers of a `PointBuffer`) the new state is written into them instead of new arrays.
+    '''
+    if pairs is None:
+        pairs = SpatialGrid(positions, closeLimit + 5).neighbourPairs(closeLimit + 5)
+    if outPositions is None:
+        outPositions = np.empty_like(positions)
+    if outVelocities is None:
+        outVelocities = np.empty_like(velocities)
+
+    acceleration = springForces(positions, ends, restLengths, stiffness) / masses[:, None]
+    acceleration += closePressure(positions, pairs, closeLimit)
+    acceleration += gravity
+
+    outPositions[:] = positions
+    outVelocities[:] = velocities
+    grounded = outPositions[:, 1] >= groundLevel # ground bounce
+    outPositions[grounded, 1] = groundLevel
+    outVelocities[grounded, 1] *= -1
+
+    acceleration *= simSpeed
+    outVelocities += acceleration
+    outVelocities *= damping
+
+    movement = outVelocities * dt + 0.5 * acceleration * dt**2 # VERLET integration
+    movement[fixed] = 0 # edge case where point is considered "fixed", if so do not change position
+    outPositions += movement
+    return outPositions, outVelocities
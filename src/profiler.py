@@ -0,0 +1,119 @@
+###### IMPORT ######
+
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+import numpy as np
+
+
+###### CONSTANTS ######
+
+WINDOW = 300 # samples per scope kept for the rolling percentiles, 5 seconds at 60 fps
+PERCENTILES = [50, 95] # reported besides the max
+NULLSCOPE = nullcontext() # handed out by every scope() while profiling is off
+JSONEXTENSION = ".json"
+
+###### SCOPE ######
+
+class Scope: # times one with-block
+    __slots__ = ["profiler", "name", "start"]
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+###### PROFILER ######
+
+class Profiler: # named timing scopes with rolling percentiles
+    '''
+    ## Profiler
+    Times named phases, ex: `with profiler.scope("solver"):`. Every scope keeps its last `WINDOW` durations for rolling p50/p95/max (`stats()`), and with `timeline` on every sample is also kept with its frame, start time and thread so the whole run can be written out with `dump()`. While `enabled` is False, `scope()` hands back one shared do-nothing context, so the instrumentation can stay in the code for good at the cost of an attribute check per phase. Safe to share between the physics and render threads.
+    '''
+
+    def __init__(self, enabled=False, timeline=False, window=WINDOW):
+        self.enabled = enabled
+        self.timeline = timeline # keep every sample for dump(), not just the rolling window
+        self.window = window
+        self.samples = {} # scope name -> deque of recent durations in seconds
+        self.events = [] # (frame, scope, start, duration, thread) when timeline is on
+        self.frame = 0
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def scope(self, name): # ex: with profiler.scope("transformThings"):
+        '''
+        ## scope()
+        Outputs a context manager that times its block under `name`, or a shared no-op one while profiling is off.
+        '''
+        if not self.enabled:
+            return NULLSCOPE
+        return Scope(self, name)
+
+    def record(self, name, start, duration):
+        '''
+        ## record()
+        Adds one sample of `duration` seconds, started at `start` (a `time.perf_counter()` value), to scope `name`.
+        '''
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(duration)
+            if self.timeline:
+                self.events.append((self.frame, name, start - self.origin, duration, threading.current_thread().name))
+
+    def endFrame(self): # frame boundary for the timeline
+        self.frame += 1
+
+    def reset(self):
+        '''
+        ## reset()
+        Forgets every sample and the timeline.
+        '''
+        with self.lock:
+            self.samples = {}
+            self.events = []
+            self.frame = 0
+            self.origin = time.perf_counter()
+
+    def stats(self): # rolling histogram summary of every scope
+        '''
+        ## stats()
+        Outputs a dictionary of scope name -> `{"count", "p50", "p95", "max"}` over the rolling window, times in milliseconds.
+        '''
+        with self.lock:
+            samples = {name: np.array(durations) for name, durations in self.samples.items()}
+        stats = {}
+        for name, durations in samples.items():
+            if len(durations) == 0:
+                continue
+            percentiles = np.percentile(durations, PERCENTILES) * 1000
+            stats[name] = {"count": len(durations), "p50": float(percentiles[0]), "p95": float(percentiles[1]), "max": float(durations.max() * 1000)}
+        return stats
+
+    def dump(self, path): # headless timeline export
+        '''
+        ## dump()
+        Writes the timeline (one row per sample: frame, scope, start and duration in milliseconds, thread) and the rolling stats to `path`. A `.json` path gets both as one JSON object, any other extension gets the timeline as CSV.
+        '''
+        with self.lock:
+            events = list(self.events)
+        rows = [{"frame": frame, "scope": name, "startMs": start * 1000, "durationMs": duration * 1000, "thread": thread} for frame, name, start, duration, thread in events]
+        if path.endswith(JSONEXTENSION):
+            with open(path, "w") as file:
+                json.dump({"stats": self.stats(), "timeline": rows}, file, indent=1)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=["frame", "scope", "startMs", "durationMs", "thread"])
+                writer.writeheader()
+                writer.writerows(rows)
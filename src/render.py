@@ -0,0 +1,152 @@
+###### IMPORT ######
+
+import numpy as np
+import pygame
+
+
+###### CONSTANTS ######
+
+SPRINGWIDTH = 5 # px, thickness of a drawn spring
+MATERIALCOLORS = {"wood": [60, 60, 60], "road": [30, 30, 30]} # unstressed spring colour of each material
+STRESSCOLOR = [255, 0, 0] # colour of a fully stressed spring
+STRESSGAIN = 220 # colour units per px of stress
+RASTERSPRINGS = 20000 # from this many springs up drawSprings() rasterizes them in bulk, below it one C draw.line call per spring is faster
+CHUNKSAMPLES = 1 << 20 # line samples rasterized per batch, bounds the temporary arrays
+POINTRADIUS = 7 # outer radius of the point sprite
+POINTCOLORS = [(150, 150, 150), (0, 0, 0)] # outer ring and inner dot of the point sprite
+OVERLAYCOLOR = (20, 20, 160) # text colour of the profiler overlay
+
+###### FUNCTIONS ######
+
+def materialColors(materials, springMaterials, colors=MATERIALCOLORS): # one base colour per spring
+    '''
+    ## materialColors()
+    Outputs an (M, 3) array with the base colour of every spring from its material index.
+    '''
+    table = np.array([colors[material] for material in materials], dtype=float).reshape(-1, 3)
+    return table[springMaterials]
+
+def stressColors(baseColors, stress): # linear blend toward red for every spring at once
+    '''
+    ## stressColors()
+    Blends every spring's base colour toward `STRESSCOLOR` by its stress, with the same clamped, truncated blend factor the per-spring loop used. Outputs an (M, 3) uint8 array.
+    '''
+    factor = np.floor(np.clip(STRESSGAIN * np.nan_to_num(stress, nan=255 / STRESSGAIN), 0, 255)) / 255
+    colors = baseColors * (1 - factor[:, None]) + np.array(STRESSCOLOR, dtype=float) * factor[:, None]
+    return colors.astype(np.uint8)
+
+def packColors(surface, colors): # (M, 3) rgb -> the surface's pixel integers
+    '''
+    ## packColors()
+    Vectorized `surface.map_rgb()`: packs an (M, 3) uint8 colour array into the integer pixel format of `surface`, so colours can be written straight into `pygame.surfarray.pixels2d()`.
+    '''
+    shifts, losses, masks = surface.get_shifts(), surface.get_losses(), surface.get_masks()
+    packed = np.zeros(len(colors), dtype=np.int64)
+    for channel in range(3):
+        packed |= (colors[:, channel].astype(np.int64) >> losses[channel]) << shifts[channel]
+    return packed | masks[3] # opaque where there is an alpha channel
+
+def rasterizeSegments(pixels, starts, ends, colors, width=SPRINGWIDTH): # every line in a few whole-array passes
+    '''
+    ## rasterizeSegments()
+    Draws thick lines straight into a (W, H) packed pixel array, ex: `pygame.surfarray.pixels2d(screen)`, with one packed colour per segment from `packColors()`. Every segment is sampled once per pixel along its major axis and its index is scattered into a 1 px wide id buffer, which is then widened to `width` by a separable max filter (so later segments stay on top, like repeated `pygame.draw.line` calls). Lastly the colours are gathered by id in one pass. The cost is a handful of whole-screen array operations plus one write per sample, instead of one Python call per line. Segments with a non-finite end are skipped and very long ones are sampled more sparsely so a blown-up structure cannot run out of memory.
+    '''
+    finite = np.isfinite(starts).all(axis=1) & np.isfinite(ends).all(axis=1)
+    segmentIds = np.nonzero(finite)[0]
+    if len(segmentIds) == 0:
+        return
+    size = np.array(pixels.shape[:2])
+    pad = width // 2
+    ids = np.zeros((size[1] + 2 * pad, size[0] + 2 * pad), dtype=np.int32) # row-major like the screen, 0 is empty
+
+    delta = ends[segmentIds] - starts[segmentIds]
+    steps = np.minimum(np.ceil(np.abs(delta).max(axis=1)), size.sum()).astype(np.int64) + 1
+    bounds = np.searchsorted(np.cumsum(steps), np.arange(CHUNKSAMPLES, steps.sum(), CHUNKSAMPLES)) # chunk by sample count
+    for chunk in np.split(np.arange(len(segmentIds)), np.unique(bounds)):
+        if len(chunk) == 0:
+            continue
+        chunkSteps = steps[chunk]
+        segment = np.repeat(chunk, chunkSteps)
+        t = (np.arange(chunkSteps.sum()) - np.repeat(np.cumsum(chunkSteps) - chunkSteps, chunkSteps)) / np.repeat(np.maximum(chunkSteps - 1, 1), chunkSteps)
+        x = np.rint(starts[segmentIds[segment], 0] + delta[segment, 0] * t).astype(np.int64) + pad
+        y = np.rint(starts[segmentIds[segment], 1] + delta[segment, 1] * t).astype(np.int64) + pad
+        inside = (x >= 0) & (x < ids.shape[1]) & (y >= 0) & (y < ids.shape[0])
+        ids[y[inside], x[inside]] = segment[inside] + 1
+
+    for axis in range(2): # max filter of radius pad, one axis at a time
+        source = ids.copy()
+        for shift in range(1, pad + 1):
+            if axis == 0:
+                np.maximum(ids[shift:], source[:-shift], out=ids[shift:])
+                np.maximum(ids[:-shift], source[shift:], out=ids[:-shift])
+            else:
+                np.maximum(ids[:, shift:], source[:, :-shift], out=ids[:, shift:])
+                np.maximum(ids[:, :-shift], source[:, shift:], out=ids[:, :-shift])
+
+    ids = ids[pad:ids.shape[0] - pad, pad:ids.shape[1] - pad]
+    drawn = ids > 0
+    rows = pixels.T # pygame arrays are (x, y) views of the row-major screen
+    rows[drawn] = colors[segmentIds][ids[drawn] - 1]
+
+def drawSprings(surface, positions, ends, colors, width=SPRINGWIDTH): # all springs, bulk above RASTERSPRINGS
+    '''
+    ## drawSprings()
+    Draws every spring `ends` between `positions` onto `surface` with its row of (M, 3) uint8 `colors`. From `RASTERSPRINGS` springs up they are rasterized in bulk with `rasterizeSegments()` on the surface's pixel array; smaller scenes (or surfaces without a directly addressable pixel array) use one `pygame.draw.line` per spring with everything precomputed, which is faster there.
+    '''
+    if len(ends) == 0:
+        return
+    starts, finishes = positions[ends[:, 0]], positions[ends[:, 1]]
+    if len(ends) >= RASTERSPRINGS:
+        try:
+            pixels = pygame.surfarray.pixels2d(surface)
+        except (ValueError, pygame.error):
+            pixels = None
+        if pixels is not None:
+            rasterizeSegments(pixels, starts, finishes, packColors(surface, colors), width)
+            del pixels # unlocks the surface
+            return
+    finite = np.isfinite(starts).all(axis=1) & np.isfinite(finishes).all(axis=1)
+    line = pygame.draw.line
+    for start, finish, color in zip(starts[finite].tolist(), finishes[finite].tolist(), colors[finite].tolist()):
+        line(surface, color, start, finish, width)
+
+def pointSprite(radius=POINTRADIUS, colors=POINTCOLORS): # drawn once, blitted for every point
+    '''
+    ## pointSprite()
+    Outputs a transparent surface with the point look (a grey disc with a black centre), to be blitted instead of drawing two circles per point.
+    '''
+    sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, colors[0], (radius, radius), radius)
+    pygame.draw.circle(sprite, colors[1], (radius, radius), radius * 4 // 7)
+    return sprite
+
+def drawPoints(surface, positions, sprite): # all points, one blits() call
+    '''
+    ## drawPoints()
+    Blits `sprite` centred on every finite position with a single `Surface.blits()` call.
+    '''
+    half = sprite.get_width() // 2
+    corners = np.rint(positions[np.isfinite(positions).all(axis=1)]).astype(np.int64) - half
+    surface.blits([(sprite, corner) for corner in corners.tolist()], doreturn=False)
+
+def drawAdaptive(surface, font, stats, position=(10, 10)): # adaptive substepping overlay
+    '''
+    ## drawAdaptive()
+    Draws the substep count a `SubstepController` chose for the last frame, its length and what decided it, from its `stats`.
+    '''
+    text = "substeps " + str(stats["substeps"]) + "  dt " + str(round(stats["dt"], 4)) + "  (" + stats["limit"] + ")"
+    surface.blit(font.render(text, True, OVERLAYCOLOR), position)
+
+def drawProfile(surface, font, stats, position=(10, 70), columns=(0, 220, 310, 400)): # profiler overlay
+    '''
+    ## drawProfile()
+    Draws a table of `Profiler.stats()`, one row per timing scope with its p50, p95 and max in milliseconds, slowest p95 first, from `position` down. `columns` are the x offsets of the four columns, since `font` is not monospaced.
+    '''
+    rows = [["scope", "p50", "p95", "max ms"]]
+    for name, row in sorted(stats.items(), key=lambda item: -item[1]["p95"]):
+        rows.append([name] + [str(round(row[key], 2)) for key in ["p50", "p95", "max"]])
+    y = position[1]
+    for row in rows:
+        for offset, cell in zip(columns, row):
+            surface.blit(font.render(cell, True, OVERLAYCOLOR), (position[0] + offset, y))
+        y += font.get_linesize()
@@ -0,0 +1,105 @@
+###### IMPORT ######
+
+import argparse
+import pygame
+import numpy as np
+from trajectory import Trajectory
+import render
+
+
+###### SETUP ######
+
+parser = argparse.ArgumentParser(description="Scrub through a recorded trajectory file.")
+parser.add_argument("trajectory", help="file written by trajectory.TrajectoryRecorder, ex: from batch.py --record")
+arguments = parser.parse_args()
+
+trajectory = Trajectory(arguments.trajectory)
+constants = trajectory.header["constants"]
+materials = trajectory.header["materials"]
+springMaterials = np.asarray(trajectory.scene["springMaterials"], dtype=np.int64)
+thingRadii = [thing[5] for thing in trajectory.header["things"]]
+groundLines = [line[0:4] for line in trajectory.header["ground"]]
+
+pygame.init()
+
+width = constants["width"]
+height = constants["height"]
+windowSize = (width, height)
+
+pygame.display.set_caption("Soft Body Replay") # Sets title of window
+screen = pygame.display.set_mode(windowSize) # Sets the dimensions of the window to the windowSize
+
+font = pygame.font.Font(None, 36)
+
+fps = 60
+clock = pygame.time.Clock()
+
+###### VARIABLES ######
+
+pointSprite = render.pointSprite()
+timeline = pygame.Rect(10, height - 30, width - 20, 20) # click or drag here to seek
+current = 0
+playing = False
+running = True
+
+###### MAINLOOP ######
+
+while running:
+    screen.fill((255, 255, 255))
+    if len(trajectory) != 0:
+        state = trajectory.frame(current)
+
+        ### DRAWS THE RECORDED FRAME
+        for x1, y1, x2, y2 in groundLines:
+            pygame.draw.line(screen, [120, 100, 80], (x1, y1), (x2, y2), 3)
+        colors = render.stressColors(render.materialColors(materials, springMaterials[:len(state["springEnds"])]), state["stress"])
+        render.drawSprings(screen, state["positions"], state["springEnds"], colors)
+        render.drawPoints(screen, state["positions"], pointSprite)
+        for (x, y), radius in zip(state["things"].tolist(), thingRadii):
+            pygame.draw.circle(screen, [90, 90, 90], (x, y), radius)
+        for start, end in state["springEnds"][state["snapped"]].tolist(): # springs that snapped on this frame
+            pygame.draw.line(screen, [240, 180, 40], state["positions"][start], state["positions"][end], 3)
+
+        ### DRAWS THE TIMELINE
+        pygame.draw.rect(screen, [220, 220, 220], timeline)
+        for index in trajectory.breakFrames.tolist(): # ticks where something broke
+            x = timeline.x + timeline.width * index // max(len(trajectory) - 1, 1)
+            pygame.draw.line(screen, [240, 180, 40], (x, timeline.top), (x, timeline.bottom))
+        x = timeline.x + timeline.width * current // max(len(trajectory) - 1, 1)
+        pygame.draw.line(screen, [20, 20, 160], (x, timeline.top - 4), (x, timeline.bottom + 4), 3)
+        screen.blit(font.render("frame " + str(state["frame"]) + " (" + str(current + 1) + "/" + str(len(trajectory)) + ")", True, [20, 20, 160]), (10, 10))
+
+    if pygame.mouse.get_pressed()[0] and timeline.collidepoint(pygame.mouse.get_pos()) and len(trajectory) != 0: # scrubbing
+        current = round((pygame.mouse.get_pos()[0] - timeline.x) / timeline.width * (len(trajectory) - 1))
+        playing = False
+
+    for event in pygame.event.get(): # checks if program is quit, if so stops the code
+        if event.type == pygame.QUIT:
+            running = False
+        if event.type == pygame.KEYDOWN:
+            step = 10 if event.mod & pygame.KMOD_SHIFT else 1
+            if event.key == pygame.K_SPACE:
+                playing = not playing
+            if event.key == pygame.K_RIGHT:
+                current += step
+            if event.key == pygame.K_LEFT:
+                current -= step
+            if event.key == pygame.K_HOME:
+                current = 0
+            if event.key == pygame.K_END:
+                current = len(trajectory) - 1
+            if event.key == pygame.K_b and len(trajectory.breakFrames) != 0: # jumps to the next breakage
+                later = trajectory.breakFrames[trajectory.breakFrames > current]
+                current = int(later[0]) if len(later) != 0 else int(trajectory.breakFrames[0])
+
+    if playing:
+        current += 1
+        if current >= len(trajectory) - 1:
+            playing = False
+    current = min(max(current, 0), max(len(trajectory) - 1, 0))
+    # runs framerate wait time
+    clock.tick(fps)
+    # update the screen
+    pygame.display.update()
+# quit Pygame
+pygame.quit()
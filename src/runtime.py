@@ -0,0 +1,162 @@
+###### IMPORT ######
+
+import queue
+import threading
+import time
+import numpy as np
+from trajectory import TrajectoryRecorder
+
+
+###### CONSTANTS ######
+
+FRAMETIME = 1 / 60 # real seconds simulated by one stepFrame(), the physics rate
+MAXCATCHUP = 5 # most frames simulated per tick when behind, older backlog is dropped so the display never waits for physics
+IDLETIME = 0.001 # seconds the worker sleeps when no frame is due
+
+###### PHYSICS RUNTIME ######
+
+class PhysicsRuntime: # runs a Simulation on its own thread
+    '''
+    ## PhysicsRuntime
+    Runs `sim.stepFrame()` on a worker thread at a fixed rate of one frame per `FRAMETIME` real seconds, using an accumulator so the physics rate does not depend on the display rate. After every frame the worker publishes a `sim.snapshot()` into a double buffer (the previous and the latest snapshot), and `interpolated()` blends the two by how far real time has moved into the next frame, so rendering is smooth at any display rate. If the physics falls behind real time it simulates at most `MAXCATCHUP` frames per tick and drops the rest, so the display stays responsive and the world just runs slower.
+    Everything that changes the world while the worker runs (grabbing, saving, editing) goes through `submit()`, which runs it on the worker thread between frames. The NumPy kernels release the GIL for most of a step, so the render thread keeps running meanwhile.
+    '''
+
+    def __init__(self, sim, frameTime=FRAMETIME):
+        self.sim = sim
+        self.frameTime = frameTime
+        self.commands = queue.Queue() # functions to run on the worker between frames
+        self.lock = threading.Lock() # guards the snapshot double buffer
+        snapshot = sim.snapshot()
+        self.snapshots = [snapshot, snapshot] # previous, latest
+        self.publishedAt = time.perf_counter()
+        self.droppedFrames = 0 # frames skipped because the physics could not keep up
+        self.recorder = None # TrajectoryRecorder fed after every frame, see startRecording()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        '''
+        ## start()
+        Starts the worker thread.
+        '''
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        '''
+        ## stop()
+        Stops the worker thread after its current frame and waits for it.
+        '''
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.runCommands() # nothing submitted is lost
+        self.stopRecording()
+
+    def submit(self, function, *arguments): # ex: runtime.submit(sim.grab, index, position)
+        '''
+        ## submit()
+        Queues `function(*arguments)` to run on the worker thread before the next frame.
+        '''
+        self.commands.put((function, arguments))
+
+    def runCommands(self):
+        while True:
+            try:
+                function, arguments = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            function(*arguments)
+
+    def publish(self): # double buffer swap
+        snapshot = self.sim.snapshot()
+        with self.lock:
+            self.snapshots = [self.snapshots[1], snapshot]
+            self.publishedAt = time.perf_counter()
+
+    def run(self): # worker loop, fixed timestep accumulator
+        '''
+        ## run()
+        The worker loop: adds the real time that passed to an accumulator and simulates one frame for every `frameTime` in it.
+        '''
+        accumulator = 0.0
+        last = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            accumulator += now - last
+            last = now
+            if accumulator < self.frameTime:
+                self.runCommands()
+                time.sleep(IDLETIME)
+                continue
+            frames = int(accumulator / self.frameTime)
+            if frames > MAXCATCHUP:
+                self.droppedFrames += frames - MAXCATCHUP
+                accumulator -= (frames - MAXCATCHUP) * self.frameTime
+                frames = MAXCATCHUP
+            for frame in range(frames):
+                self.runCommands()
+                self.sim.stepFrame()
+                if self.recorder is not None:
+                    self.recorder.write(self.sim)
+                accumulator -= self.frameTime
+                self.publish()
+
+    def startRecording(self, path, compression="delta"): # ex: runtime.submit(runtime.startRecording, path)
+        '''
+        ## startRecording()
+        Starts streaming every frame to a trajectory file at `path` (see `trajectory.py`). Reads the world, so call it through `submit()` while the worker runs.
+        '''
+        self.stopRecording()
+        self.recorder = TrajectoryRecorder(path, self.sim, compression)
+
+    def stopRecording(self):
+        '''
+        ## stopRecording()
+        Finishes the trajectory file being recorded, if any.
+        '''
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def latest(self):
+        '''
+        ## latest()
+        Outputs the most recent snapshot.
+        '''
+        with self.lock:
+            return self.snapshots[1]
+
+    def interpolated(self): # state to draw this display frame
+        '''
+        ## interpolated()
+        Outputs `(state, alpha)`: a copy of the latest snapshot whose point positions and thing positions are blended between the previous and latest snapshots, and the blend factor `alpha` in [0, 1] (how far real time is into the frame after the latest one). Points that only exist in the latest snapshot, ex: from a breakage, are drawn where they are.
+        '''
+        with self.lock:
+            previous, latest = self.snapshots
+            alpha = min(max((time.perf_counter() - self.publishedAt) / self.frameTime, 0.0), 1.0)
+        state = dict(latest)
+        positions = latest["positions"].copy()
+        shared = min(len(previous["positions"]), len(positions))
+        positions[:shared] += (previous["positions"][:shared] - positions[:shared]) * (1 - alpha)
+        state["positions"] = positions
+        if len(previous["things"]) == len(latest["things"]):
+            state["things"] = [[before[axis] + (after[axis] - before[axis]) * alpha for axis in range(2)] + list(after[2:]) for before, after in zip(previous["things"], latest["things"])]
+        return state, alpha
+
+    def pick(self, position, radius=8): # sim.pick() against the latest snapshot, safe from the render thread
+        '''
+        ## pick()
+        Outputs the index of the closest point of the latest snapshot within `radius` of `position`, or `None`.
+        '''
+        positions = self.latest()["positions"]
+        if len(positions) == 0:
+            return None
+        distances = np.sqrt(((positions - np.asarray(position, dtype=float)) ** 2).sum(axis=1))
+        closest = int(np.nanargmin(np.where(np.isfinite(distances), distances, np.inf)))
+        return closest if distances[closest] <= radius else None
@@ -0,0 +1,202 @@
+###### IMPORT ######
+
+import json
+import os
+import numpy as np
+from simulation import Simulation, MATERIALS
+
+
+###### CONSTANTS ######
+
+CONSTANTS = ["width", "height", "simSpeed", "gravity", "spacing", "closeLimit", "resolution", "springLimit", "stiffness", "damping", "groundLevel", "dt", "substeps", "solver"] # Simulation settings stored with a scene
+SETTINGS = ["iterations", "sweep", "compliance", "breakStresses", "sleep", "ccd", "multirate"] # solver switches stored with a scene, set as attributes after the Simulation is made
+
+MAGIC = b"BRIDGE\x00\x01" # first 8 bytes of a binary scene file, the last byte is the format version
+ALIGNMENT = 64 # every array starts on a multiple of this many bytes so it can be memory-mapped directly
+JSONEXTENSION = ".json" # scene files with this extension are written as readable JSON, everything else is binary
+
+###### FUNCTIONS ######
+
+def sceneToDict(sim): # world -> plain lists, in the same formats new.py always used
+    '''
+    ## sceneToDict()
+    Outputs a JSON-friendly dictionary of a world: its constants and settings, its points as `[x, y, vx, vy, fixed, mass]`, its springs as `[index1, index2, restLength, material]`, its things as `[x, y, vx, vy, mass, radius, internalAcceleration]` and its ground lines as `[x1, y1, x2, y2, flipNormal]`.
+    '''
+    points = [[x, y, vx, vy, fixed, mass] for (x, y), (vx, vy), fixed, mass in zip(sim.positions.tolist(), sim.velocities.tolist(), sim.fixed.tolist(), sim.baseMasses.tolist())]
+    springs = [[index1, index2, restLength, MATERIALS[material]] for (index1, index2), restLength, material in zip(sim.springEnds.tolist(), sim.restLengths.tolist(), sim.springMaterials.tolist())]
+    return {
+        "constants": {name: getattr(sim, name) for name in CONSTANTS},
+        "settings": settingsOf(sim),
+        "points": points,
+        "springs": springs,
+        "things": [list(thing) for thing in sim.things],
+        "ground": groundToList(sim),
+    }
+
+def sceneFromDict(data): # plain lists -> world
+    '''
+    ## sceneFromDict()
+    Builds a `Simulation` from a dictionary made by `sceneToDict()`. Constants and settings that are missing keep their defaults. Points and springs are added as one block each, so the adjacency and the islands are built once instead of once per spring.
+    '''
+    sim = Simulation(**{name: value for name, value in data.get("constants", {}).items() if name in CONSTANTS})
+    applySettings(sim, data.get("settings", {}))
+    points = np.array(data.get("points", []), dtype=float).reshape(-1, 6)
+    sim.addPoints(points[:, 0:2], points[:, 2:4], points[:, 4].astype(bool), points[:, 5])
+    springs = data.get("springs", [])
+    sim.addSprings([spring[0:2] for spring in springs], [spring[2] for spring in springs], [MATERIALS.index(spring[3]) for spring in springs])
+    for x, y, vx, vy, mass, radius, internalAcceleration in data.get("things", []):
+        sim.addThing(x, y, mass, radius, internalAcceleration, (vx, vy))
+    for x1, y1, x2, y2, flipNormal in data.get("ground", []):
+        sim.addGroundLine(x1, y1, x2, y2, flipNormal)
+    return sim
+
+def settingsOf(sim): # the SETTINGS of a world, dictionaries copied
+    return {name: dict(getattr(sim, name)) if isinstance(getattr(sim, name), dict) else getattr(sim, name) for name in SETTINGS}
+
+def applySettings(sim, settings): # sets the stored SETTINGS on a world, unknown names are ignored
+    for name, value in settings.items():
+        if name in SETTINGS:
+            setattr(sim, name, dict(value) if isinstance(value, dict) else value)
+
+def groundToList(sim): # ground lines as [x1, y1, x2, y2, flipNormal], like lineLibrary plus normalsLibrary
+    return [line + [flipped] for line, flipped in zip(sim.groundLines.reshape(-1, 4).tolist(), sim.groundFlipped.tolist())]
+
+def sceneToArrays(sim): # world -> flat arrays for the binary format
+    '''
+    ## sceneToArrays()
+    Outputs the point and spring state of a world as a dictionary of compact little-endian arrays. Spring ends are stored as 32-bit indices when they fit and materials as one byte each.
+    '''
+    indexType = "<i4" if len(sim.positions) < 2**31 else "<i8"
+    return {
+        "positions": sim.positions.astype("<f8"),
+        "velocities": sim.velocities.astype("<f8"),
+        "fixed": sim.fixed.astype("|b1"),
+        "masses": sim.baseMasses.astype("<f8"),
+        "springEnds": sim.springEnds.astype(indexType),
+        "restLengths": sim.restLengths.astype("<f8"),
+        "springMaterials": sim.springMaterials.astype("|u1"),
+    }
+
+def aligned(size): # rounds a byte count up to the next multiple of ALIGNMENT
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+def writeBlock(file, header, arrays): # JSON header + aligned raw arrays, the unit of every binary file here
+    '''
+    ## writeBlock()
+    Writes an 8 byte header length, the JSON `header` with an `"arrays"` table (dtype/shape/offset of every array) and `"size"` (bytes of data) added, and then the raw `arrays`. The data starts at the first multiple of `ALIGNMENT` after the header, every array offset is relative to it and aligned too, and the block is padded to end aligned, so blocks can follow each other in one file.
+    '''
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += aligned(array.nbytes)
+    header = json.dumps(dict(header, arrays=table, size=offset)).encode()
+    file.write(np.array(len(header), dtype="<u8").tobytes())
+    file.write(header)
+    dataStart = aligned(file.tell())
+    for name, array in arrays.items():
+        file.write(bytes(dataStart + table[name]["offset"] - file.tell())) # padding
+        file.write(np.ascontiguousarray(array).tobytes())
+    file.write(bytes(dataStart + offset - file.tell()))
+
+def readBlockHeader(file): # the header of the block at the file position, without its data
+    '''
+    ## readBlockHeader()
+    Reads the header of the block written by `writeBlock()` at the current position of `file` and outputs `(header, dataStart)`, leaving the file positioned at the end of the block. Outputs `None` if the file ends before the block does, ex: a recording cut off mid-write.
+    '''
+    length = file.read(8)
+    if len(length) < 8:
+        return None
+    try:
+        header = json.loads(file.read(int(np.frombuffer(length, dtype="<u8")[0])))
+    except ValueError:
+        return None
+    dataStart = aligned(file.tell())
+    end = dataStart + header.get("size", 0)
+    if end > os.fstat(file.fileno()).st_size:
+        return None
+    file.seek(end)
+    return header, dataStart
+
+def blockArrays(buffer, header, dataStart): # views of a block's arrays in a mapped file
+    '''
+    ## blockArrays()
+    Outputs the arrays of a block as views into `buffer`, a uint8 `np.memmap` of the whole file, so nothing is read until it is used.
+    '''
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        start = dataStart + entry["offset"]
+        shape = tuple(entry["shape"])
+        arrays[name] = buffer[start:start + dtype.itemsize * int(np.prod(shape))].view(dtype).reshape(shape)
+    return arrays
+
+def sceneHeader(sim): # everything of a world that is not a big array
+    return {
+        "constants": {name: getattr(sim, name) for name in CONSTANTS},
+        "settings": settingsOf(sim),
+        "things": [list(thing) for thing in sim.things],
+        "ground": groundToList(sim),
+        "materials": MATERIALS,
+    }
+
+def saveBinaryScene(sim, path): # writes a compact, memory-mappable scene file
+    '''
+    ## saveBinaryScene()
+    Writes a world as `MAGIC` followed by one `writeBlock()`: a JSON header (constants, settings, things, ground lines, materials and the array table) and then the raw point and spring arrays.
+    '''
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        writeBlock(file, sceneHeader(sim), sceneToArrays(sim))
+
+def readBinaryScene(path): # header plus memory-mapped arrays, nothing is parsed or copied
+    '''
+    ## readBinaryScene()
+    Reads the header of a binary scene file and outputs `(header, arrays)`, where every array is a read-only view into a memory map of the file, so even a million-spring structure opens instantly.
+    '''
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(path + " is not a binary scene file")
+        block = readBlockHeader(file)
+    if block is None:
+        raise ValueError(path + " is truncated")
+    header, dataStart = block
+    return header, blockArrays(np.memmap(path, dtype=np.uint8, mode="r"), header, dataStart)
+
+def loadBinaryScene(path): # reads a binary scene into a Simulation
+    '''
+    ## loadBinaryScene()
+    Builds a `Simulation` from a binary scene file, copying each memory-mapped array into the world's buffers in one go.
+    '''
+    header, arrays = readBinaryScene(path)
+    sim = Simulation(**{name: value for name, value in header.get("constants", {}).items() if name in CONSTANTS})
+    applySettings(sim, header.get("settings", {}))
+    sim.addPoints(arrays["positions"], arrays["velocities"], arrays["fixed"], arrays["masses"])
+    materials = np.array([MATERIALS.index(material) for material in header.get("materials", MATERIALS)], dtype=np.int64) # file material index -> current index
+    sim.addSprings(arrays["springEnds"], arrays["restLengths"], materials[arrays["springMaterials"]])
+    for x, y, vx, vy, mass, radius, internalAcceleration in header.get("things", []):
+        sim.addThing(x, y, mass, radius, internalAcceleration, (vx, vy))
+    for x1, y1, x2, y2, flipNormal in header.get("ground", []):
+        sim.addGroundLine(x1, y1, x2, y2, flipNormal)
+    return sim
+
+def saveScene(sim, path): # writes a scene file
+    '''
+    ## saveScene()
+    Writes a world to a scene file: readable JSON if `path` ends in `.json`, otherwise the compact binary format.
+    '''
+    if os.path.splitext(path)[1].lower() != JSONEXTENSION:
+        saveBinaryScene(sim, path)
+        return
+    with open(path, "w") as file:
+        json.dump(sceneToDict(sim), file)
+
+def loadScene(path): # reads a scene file
+    '''
+    ## loadScene()
+    Reads a scene file written by `saveScene()`, JSON or binary by its extension, and outputs a `Simulation`.
+    '''
+    if os.path.splitext(path)[1].lower() != JSONEXTENSION:
+        return loadBinaryScene(path)
+    with open(path) as file:
+        return sceneFromDict(json.load(file))
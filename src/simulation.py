@@ -0,0 +1,680 @@
+###### IMPORT ######
+
+import copy
+from math import *
+import numpy as np
+import physics
+import contact
+import ccd
+import fracture
+import islands
+import multirate
+import solvers
+from profiler import Profiler
+from spatial import SpatialGrid
+from state import PointBuffer, SpringBuffer
+from topology import SpringAdjacency, colourSprings, newPairs
+
+
+###### CONSTANTS ######
+
+WIDTH = 1280
+HEIGHT = 720
+
+SIMSPEED = 0.01
+GRAVITY = [0, 2]
+SPACING = 40
+CLOSELIMIT = 20
+RESOLUTION = 3
+#SPRINGLIMIT = SPACING * 1.5
+SPRINGLIMIT = 125
+STIFFNESS = 60
+DAMPING = 0.998
+GROUNDLEVEL = 550
+DT = 1/10
+SUBSTEPS = 10 # simulation steps per rendered frame, known as fpsMultiplier in the front-end
+
+MATERIALS = [
+    "wood",
+    "road"
+]
+
+###### OPERATOR FUNCTIONS ######
+
+def dist(point1, point2): # abstracted distance function
+    '''
+    ## dist()
+    Abstracted function for finding the distance from one point to another.
+    '''
+    return sqrt((point2[0] - point1[0]) ** 2 + (point2[1] - point1[1]) ** 2)
+
+def dirTo(point1, point2): # abstracted direction function
+    '''
+    ## dirTo()
+    Abstracted function for finding the direction (in absolute radians) from one point to another.
+    '''
+    return atan2((point2[1] - point1[1]), (point2[0] - point1[0]))
+
+def clamp(value, range): # range clamping function
+    '''
+    ## clamp()
+    Outputs the upper limit of the range if the value is greater than it, and the lower limit of the range if the value is less than it.
+    '''
+    return min(max(value, range[0]), range[1])
+
+def addVectors(listOfVectors): # function for adding all tuples in a list as vectors
+    '''
+    ## addVectors()
+    Takes in a list of vectors and outputs the sums of the X values and Y values in a vector.
+    '''
+    xVec = 0
+    for item in range(len(listOfVectors)):
+        xVec = xVec + listOfVectors[item][0]
+
+    yVec = 0
+    for item in range(len(listOfVectors)):
+        yVec = yVec + listOfVectors[item][1]
+
+    return [xVec,yVec]
+
+def getIntersectionPoint(line1, line2):
+    '''
+    ## getIntersectionPoint()
+    Computes the coordinate of intersection between two line segments, outputting `None` if the line segments do not intersect.
+    '''
+    x1 = line1[0][0]
+    y1 = line1[0][1]
+    x2 = line1[1][0]
+    y2 = line1[1][1]
+
+    x3 = line2[0][0]
+    y3 = line2[0][1]
+    x4 = line2[1][0]
+    y4 = line2[1][1]
+
+    denominator = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+
+    if denominator == 0:
+        return None  # No intersection (lines are parallel)
+
+    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / denominator
+    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / denominator
+
+    x = x1 + t * (x2 - x1)
+    y = y1 + t * (y2 - y1)
+
+    if 0 <= t <= 1 and 0 <= u <= 1:
+        return (x, y)  # Return the intersection point
+    else:
+        return None  # No intersection within line segments (lines are not parallel, but they don't intersect in the specified segments)
+
+###### SIMULATION ######
+
+class Simulation: # headless world that owns the points, springs and things
+    '''
+    ## Simulation
+    Headless mass-spring world. Owns the points (as position/velocity/mass/fixed arrays), the springs (as index/rest length/material arrays) and the things, and advances them with `step()`. Has no pygame dependency, so it can be batch-run, profiled and tested without a display.
+    '''
+
+    def __init__(self, width=WIDTH, height=HEIGHT, simSpeed=SIMSPEED, gravity=GRAVITY, spacing=SPACING, closeLimit=CLOSELIMIT, resolution=RESOLUTION, springLimit=SPRINGLIMIT, stiffness=STIFFNESS, damping=DAMPING, groundLevel=GROUNDLEVEL, dt=DT, substeps=SUBSTEPS, solver="force"):
+        self.width = width
+        self.height = height
+        self.simSpeed = simSpeed
+        self.gravity = list(gravity)
+        self.spacing = spacing
+        self.closeLimit = closeLimit
+        self.resolution = resolution
+        self.springLimit = springLimit
+        self.stiffness = stiffness
+        self.damping = damping
+        self.groundLevel = groundLevel
+        self.dt = dt
+        self.substeps = substeps
+        self.solver = solver # one of solvers.SOLVERS
+        self.iterations = solvers.XPBDITERATIONS
+        self.sweep = "jacobi" # one of solvers.XPBDSWEEPS, how the "xpbd" solver sweeps its springs
+        self.compliance = dict(solvers.COMPLIANCE) # per-material compliance used by the "xpbd" solver
+        self.breakStresses = dict(fracture.BREAKSTRESSES) # per-material stretch (in px) past which a spring snaps
+        self.fractures = fracture.FractureQueue()
+
+        self.points = PointBuffer() # double-buffered struct-of-arrays state, see state.py
+        self.springs = SpringBuffer()
+        self.adjacency = SpringAdjacency() # springs of every point, kept in sync by addPoint(), addSpring() and the fracture queue
+        self.colours = None # colour of every spring, see springColours()
+
+        self.things = [] # [x, y, vx, vy, mass, radius, internalAcceleration]
+        self.groundLines = np.zeros((0, 2, 2)) # terrain on top of the groundLevel floor, like lineLibrary in test/old.py
+        self.groundFlipped = np.zeros(0, dtype=bool) # like normalsLibrary, True where a line's free side is below it
+        self.groundNormals = np.zeros((0, 2)) # unit normals of the free sides, see ccd.lineNormals()
+        self.ccd = True # sweeps points and things against the ground lines and road springs every substep
+        self.sleep = True # islands that have come to rest are skipped until something wakes them, see islands.py
+        self.islands = islands.Islands()
+        self.adaptive = None # an adaptive.SubstepController that picks substeps and dt every frame, None keeps them fixed
+        self.multirate = 0 # rate levels the "force" solver may step stiff points at, up to 2^multirate steps per substep, see multirate.py
+        self.workers = islands.WORKERS # threads the solver spreads independent islands over, 1 solves the world in one piece
+
+        self.grid = SpatialGrid(self.positions, closeLimit + 5) # broadphase shared by close pressure, car/road contact and picking
+        self.selected = None # point held by the mouse, if any
+        self.dragPosition = None
+        self.dragVelocity = [0, 0]
+        self.frame = 0
+        self.breakages = 0
+        self.profiler = Profiler() # off unless enabled, times the phases of step()
+
+    # views of the live point and spring arrays, these change after every substep so always read them fresh
+
+    @property
+    def positions(self):
+        return self.points.positions
+
+    @property
+    def velocities(self):
+        return self.points.velocities
+
+    @property
+    def masses(self):
+        return self.points.masses
+
+    @property
+    def baseMasses(self):
+        return self.points.baseMasses
+
+    @property
+    def fixed(self):
+        return self.points.fixed
+
+    @property
+    def springEnds(self):
+        return self.springs.ends
+
+    @property
+    def restLengths(self):
+        return self.springs.restLengths
+
+    @property
+    def springMaterials(self):
+        return self.springs.materials
+
+    ### BUILDING
+
+    def addPoint(self, x, y, fixed=False, mass=1, velocity=(0, 0)): # appends one point
+        '''
+        ## addPoint()
+        Appends a point to the world and outputs its index.
+        '''
+        self.adjacency.addPoint()
+        index = self.points.append(x, y, fixed, mass, velocity)
+        self.islands.addPoints(self.points.count)
+        return index
+
+    def addSpring(self, index1, index2, restLength=None, material="wood"): # appends one spring
+        '''
+        ## addSpring()
+        Appends a spring between two point indices and outputs its index. The rest length defaults to the current distance between the points. If the two points are already joined, nothing is added and the existing spring's index is output, so a pair never gets double stiffness.
+        '''
+        neighbours = self.adjacency.neighboursOf(index1)
+        if (neighbours == index2).any():
+            return int(self.adjacency.springsOf(index1)[np.argmax(neighbours == index2)])
+        if restLength is None:
+            restLength = dist(self.positions[index1], self.positions[index2])
+        spring = self.springs.append(index1, index2, restLength, MATERIALS.index(material))
+        self.adjacency.addSpring(spring, index1, index2)
+        self.colours = None
+        self.islands.join([[index1, index2]])
+        return spring
+
+    def addPoints(self, positions, velocities=None, fixed=None, masses=None): # appends many points at once, ex: when loading a scene
+        '''
+        ## addPoints()
+        Appends a block of points from arrays and outputs the index of the first one. Velocities default to 0, `fixed` to False and masses to 1.
+        '''
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        count = len(positions)
+        velocities = np.zeros((count, 2)) if velocities is None else velocities
+        fixed = np.zeros(count, dtype=bool) if fixed is None else fixed
+        masses = np.ones(count) if masses is None else masses
+        start = self.points.extend(positions, velocities, fixed, masses)
+        self.adjacency.addPoints(count)
+        self.islands.addPoints(self.points.count)
+        return start
+
+    def addSprings(self, ends, restLengths, materials): # appends many springs at once
+        '''
+        ## addSprings()
+        Appends a block of springs from an (M, 2) endpoint array, rest lengths and material indices, rebuilding the adjacency once instead of per spring. Outputs the index of the first one. Like `addSpring()`, a pair of points that is already joined, or joined earlier in the block, is skipped, so old scene files that stored every spring twice load with single ones.
+        '''
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        keep = newPairs(ends, self.springEnds, self.points.count)
+        start = self.springs.extend(ends[keep], np.asarray(restLengths)[keep], np.asarray(materials)[keep])
+        self.adjacency.rebuild(self.springEnds, self.points.count)
+        self.colours = None
+        self.islands.join(self.springEnds[start:])
+        return start
+
+    def addThing(self, x, y, mass, radius, internalAcceleration, velocity=(0, 0)): # appends one object, ex: a car
+        '''
+        ## addThing()
+        Appends an object that interacts with the road springs, ex: a car.
+        '''
+        self.things.append([x, y, velocity[0], velocity[1], mass, radius, list(internalAcceleration)])
+
+    def addGroundLine(self, x1, y1, x2, y2, flipNormal=False): # appends one line of terrain
+        '''
+        ## addGroundLine()
+        Appends a static ground line from (x1, y1) to (x2, y2). Its free side is above it (for a line drawn left to right) unless `flipNormal` is set.
+        '''
+        self.groundLines = np.concatenate([self.groundLines, [[[x1, y1], [x2, y2]]]])
+        self.groundFlipped = np.append(self.groundFlipped, bool(flipNormal))
+        self.groundNormals = ccd.lineNormals(self.groundLines[:, 0], self.groundLines[:, 1], self.groundFlipped)
+
+    def resetRestLengths(self): # makes the current shape the resting shape
+        '''
+        ## resetRestLengths()
+        Sets every spring's rest length to its current length, so that the structure as drawn in the editor is its resting shape.
+        '''
+        self.restLengths[:] = self.springLengths()
+        self.islands.wakeAll()
+
+    def initializePoints(self, mode="test", editor=False): # function to create the points in a grid setup
+        '''
+        ## initializePoints()
+        Function for creating points in a grid setup. Uses `spacing` and `resolution` to control the shape in `"grid"` mode, otherwise builds the two anchors (editor) or the default 5-truss bridge.
+        '''
+        width, height = self.width, self.height
+        if mode == "grid":
+            for x in range(-self.resolution, self.resolution + 1):
+                for y in range(-self.resolution, self.resolution + 1):
+                    self.addPoint(width/2 + x*self.spacing, height/2 + y*self.spacing)
+        else:
+            if editor:
+                self.addPoint(width/2 - 250, height/2 + 50, True)
+                self.addPoint(width/2 + 250, height/2 + 50, True)
+            else:
+                self.addPoint(width/2 - 250, height/2 + 50, True)
+                for truss in range(1,6):
+                    if not truss == 5:
+                        self.addPoint(width/2 - 250 + (truss)*100, height/2 + 50)
+                    self.addPoint(width/2 - 250 + (truss - 0.5)*100, height/2 - 50)
+                self.addPoint(width/2 + 250, height/2 + 50, True)
+
+    def createSprings(self): # function to create springs between the points that have a resting distance
+        '''
+        ## createSprings()
+        Function for creating springs between points. Connects every pair of points closer than `springLimit` with one spring, with springs below the middle of the screen made of road. The pairs come from a `SpatialGrid` radius query with cells of `springLimit`, so only neighbouring cells are compared and meshing grows with the number of points instead of its square; rest lengths and materials are computed for every pair at once and the springs are added in one block.
+        '''
+        positions = self.positions
+        pairs = np.sort(SpatialGrid(positions, self.springLimit).neighbourPairs(self.springLimit), axis=1) # undirected, lower index first
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))] # same order whatever the cell layout
+        delta = positions[pairs[:, 1]] - positions[pairs[:, 0]]
+        restLengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        road = (positions[pairs, 1] > self.height/2).all(axis=1)
+        materials = np.where(road, MATERIALS.index("road"), MATERIALS.index("wood"))
+        self.addSprings(pairs, restLengths, materials)
+
+    def createThings(self):
+        '''
+        ## createThings()
+        Function for creating objects that interact with the scene. Ex: Cars
+        '''
+        ## Location, Initial Velocity
+        #CENTER = random.randint(300, 900), 100
+        CENTER = self.width/2 - 150, self.height/2 + 50
+        SIZE = 50
+
+        self.addThing(CENTER[0] - SIZE, CENTER[1] - SIZE, 30, 50, [0.3, 2])
+
+    ### INTERACTION
+
+    def pick(self, position, radius=8): # finds the point under the mouse
+        '''
+        ## pick()
+        Outputs the index of the closest point within `radius` of `position`, or `None`.
+        '''
+        self.grid.rebuild(self.positions)
+        return self.grid.nearest(position, radius)
+
+    def grab(self, index, position, velocity=(0, 0)): # holds a point at the mouse position
+        '''
+        ## grab()
+        Holds point `index` at `position` with `velocity` during the following substeps, until `release()` is called.
+        '''
+        self.selected = index
+        self.islands.wake([index])
+        self.dragPosition = list(position)
+        self.dragVelocity = list(velocity)
+
+    def release(self):
+        '''
+        ## release()
+        Lets go of the point held by `grab()`.
+        '''
+        self.selected = None
+        self.dragPosition = None
+
+    def movePoint(self, index, position): # editor move, teleports a point without simulating
+        '''
+        ## movePoint()
+        Teleports a point to `position` (editor "move" tool).
+        '''
+        self.positions[index] = position
+        self.islands.wake([index])
+
+    ### QUERIES
+
+    def springLengths(self, springs=slice(None), positions=None):
+        '''
+        ## springLengths()
+        Outputs the current length of every spring, or of the `springs` given (with the points at `positions` if given).
+        '''
+        positions = self.positions if positions is None else positions
+        ends = self.springEnds[springs]
+        delta = positions[ends[:, 1]] - positions[ends[:, 0]]
+        return np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+
+    def springStress(self, springs=slice(None)):
+        '''
+        ## springStress()
+        Outputs how far (in px) every spring, or the `springs` given, is stretched or compressed away from its rest length.
+        '''
+        return np.abs(self.springLengths(springs) - self.restLengths[springs])
+
+    def springsAt(self, index):
+        '''
+        ## springsAt()
+        Outputs the indices of every spring attached to point `index`, in O(degree).
+        '''
+        return self.adjacency.springsOf(index)
+
+    def springColours(self): # spring colouring for the coloured XPBD sweep
+        '''
+        ## springColours()
+        Outputs the colour of every spring from `topology.colourSprings()`, computed on first use and again after springs are added. A breakage only gives springs new, unshared ends, so the colouring stays valid through any number of them.
+        '''
+        if self.colours is None or len(self.colours) != len(self.springEnds):
+            self.colours = colourSprings(self.springEnds, len(self.positions))
+        return self.colours
+
+    def pointForce(self, index):
+        '''
+        ## pointForce()
+        Outputs the net spring force currently acting on point `index`, gathered from its own springs only.
+        '''
+        return physics.pointSpringForce(index, self.positions, self.adjacency.neighboursOf(index), self.adjacency.springsOf(index), self.restLengths, self.stiffness)
+
+    def pointStress(self, index):
+        '''
+        ## pointStress()
+        Outputs the stress of the most stressed spring attached to point `index`, or 0 if it has none.
+        '''
+        springs = self.adjacency.springsOf(index)
+        if len(springs) == 0:
+            return 0
+        delta = self.positions[self.springEnds[springs, 1]] - self.positions[self.springEnds[springs, 0]]
+        return float(np.abs(np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2) - self.restLengths[springs]).max())
+
+    def snapshot(self): # copy of the state, safe to keep across steps
+        '''
+        ## snapshot()
+        Outputs a dictionary copy of the world state (points, springs, stress and things) that is not affected by later steps.
+        '''
+        with self.profiler.scope("snapshot"):
+            return {
+                "frame": self.frame,
+                "positions": self.positions.copy(),
+                "velocities": self.velocities.copy(),
+                "masses": self.masses.copy(),
+                "fixed": self.fixed.copy(),
+                "springEnds": self.springEnds.copy(),
+                "restLengths": self.restLengths.copy(),
+                "springMaterials": self.springMaterials.copy(),
+                "stress": self.springStress(),
+                "things": copy.deepcopy(self.things),
+                "breakages": self.breakages,
+            }
+
+    ### STEPPING
+
+    def activeSet(self): # what this substep has to simulate
+        '''
+        ## activeSet()
+        Outputs `(points, springs, localEnds)` of the awake islands (see `Islands.active()`), or `None` when nothing is asleep (or `sleep` is off) and the whole world is stepped as one.
+        '''
+        if not self.sleep or self.islands.allAwake():
+            return None
+        return self.islands.active(self.springEnds)
+
+    def breakSprings(self, active=None): # stress breakage pass
+        '''
+        ## breakSprings()
+        Queues every spring stretched past the break stress of its material and snaps them all (see `fracture.py`). A snapped spring is detached from the structure by giving it its own copies of its shared endpoints, so it falls as loose debris. Only the springs of the awake islands in `active` are checked, sleeping islands near a break are woken and the islands that were cut are regrouped. Outputs the indices of the springs that snapped.
+        '''
+        if len(self.springEnds) == 0:
+            return np.zeros(0, dtype=np.int64)
+        springs = slice(None) if active is None else active[1]
+        thresholds = fracture.breakThresholds(MATERIALS, self.springMaterials[springs], self.breakStresses)
+        candidates = fracture.overstressed(self.springStress(springs), thresholds, self.springEnds[springs], self.adjacency.rowCounts)
+        self.fractures.push(candidates if active is None else active[1][candidates])
+        oldEnds = self.springEnds[self.fractures.pending]
+        snapped = self.fractures.drain(self.points, self.springs, self.adjacency)
+        self.breakages += len(snapped)
+        if len(snapped) != 0:
+            if active is not None: # a break shakes the sleeping islands around it
+                sleepingPoints, sleepingGrid = self.islands.sleeping(self.positions, islands.WAKEDISTANCE)
+                for position in self.positions[np.unique(self.springEnds[snapped])]:
+                    self.islands.wake(sleepingPoints[sleepingGrid.queryRadius(position, islands.WAKEDISTANCE)])
+            self.islands.addPoints(self.points.count) # the detached copies
+            self.islands.split(np.concatenate([oldEnds.ravel(), self.springEnds[snapped].ravel()]), self.springEnds, self.adjacency)
+        return snapped
+
+    def transformThings(self, active=None):
+        '''
+        ## transformThings()
+        Master function for transforming objects. Road springs near each thing are found with the spatial grid (and, with islands asleep, the grid of the sleeping points), narrowed down by bounding box and then tested exactly with `contact.circleSegmentContacts()`; the thing is pushed out of them, its mass is shared onto their endpoints and their islands are woken.
+        '''
+        self.masses[:] = self.baseMasses
+        roadSprings = np.nonzero(self.springMaterials == MATERIALS.index("road"))[0]
+        if len(roadSprings) != 0:
+            longestRoad = self.springLengths(roadSprings).max()
+        if active is not None:
+            sleepingPoints, sleepingGrid = self.islands.sleeping(self.positions, self.closeLimit + 5)
+        positions = self.positions
+        for index in range(len(self.things)):
+            [x, y, vx, vy, mass, radius, internalAcceleration] = self.things[index]
+            position = np.array([x, y], dtype=float)
+            velocity = np.array([vx, vy], dtype=float)
+            acceleration = np.array(internalAcceleration, dtype=float)
+            if position[1] >= self.groundLevel - radius:
+                position[1] = self.groundLevel - radius
+                velocity[1] = -velocity[1]
+
+            if len(roadSprings) != 0: # a road within reach of the car has an endpoint within half its length of the contact
+                nearbyPoints = self.grid.queryRadius(position, radius + longestRoad / 2)
+                if active is not None: # the grid only holds the awake points
+                    nearbyPoints = np.concatenate([active[0][nearbyPoints], sleepingPoints[sleepingGrid.queryRadius(position, radius + longestRoad / 2)]])
+                nearbySprings = roadSprings[np.isin(self.springEnds[roadSprings], nearbyPoints).any(axis=1)]
+                ends = self.springEnds[nearbySprings]
+                ends = ends[contact.boxFilter(position, radius, positions[ends[:, 0]], positions[ends[:, 1]])]
+                t, normals, depths = contact.circleSegmentContacts(position, radius, positions[ends[:, 0]], positions[ends[:, 1]])
+                self.islands.wake(ends[depths > 0].ravel())
+                push = contact.contactPush(normals, depths)
+                position += push
+                acceleration += push
+                self.masses[:] += contact.contactLoads(ends, t, depths, mass, len(positions))
+
+            acceleration *= self.simSpeed
+            velocity += acceleration
+            velocity *= self.damping
+            position += velocity * self.dt + 0.5 * acceleration * self.dt**2 # VERLET integration, reduces jitter and we can get away with less sim steps/frame
+
+            self.things[index] = [float(position[0]), float(position[1]), float(velocity[0]), float(velocity[1]), mass, radius, internalAcceleration]
+
+    def wakeTouched(self, active): # moving points pushing into sleeping islands wake them
+        '''
+        ## wakeTouched()
+        Sleeping points are left out of the close pressure broadphase, so an awake point would pass through a sleeping island. Every awake free point that is moving (above `islands.SLEEPENERGY`) looks for sleeping points within close pressure range on the grid of the sleeping points, and wakes their islands, the same way a car wakes the roads it touches. Still points do not, so two resting islands side by side can both fall asleep.
+        '''
+        points = active[0]
+        moving = points[(0.5 * self.baseMasses[points] * (self.velocities[points] ** 2).sum(axis=1) >= islands.SLEEPENERGY) & ~self.fixed[points]]
+        if len(moving) == 0:
+            return
+        sleepingPoints, sleepingGrid = self.islands.sleeping(self.positions, self.closeLimit + 5)
+        touching = sleepingGrid.queryPoints(self.positions[moving], self.closeLimit + 5)
+        if len(touching) != 0:
+            self.islands.wake(sleepingPoints[touching[:, 1]])
+
+    def solvePoints(self, points, springs, ends, closePairs, outPositions, outVelocities, workers=1): # one solver step over some points
+        '''
+        ## solvePoints()
+        Runs the selected solver over the points `points` (an index array, or `slice(None)` for all of them) and the springs `springs` between them, whose `ends` are numbered into `points`, writing the new state into `outPositions`/`outVelocities`. `workers` threads may share the coloured XPBD sweep. With `multirate` above 0, the `"force"` solver steps the points in rate classes by their local stiffness to mass ratio (see `multirate.py`).
+        '''
+        positions, velocities, masses, fixed = self.positions[points], self.velocities[points], self.masses[points], self.fixed[points]
+        restLengths = self.restLengths[springs]
+        if self.solver == "xpbd":
+            compliances = solvers.materialCompliances(MATERIALS, self.springMaterials[springs], self.compliance)
+            colours = self.springColours()[springs] if self.sweep == "coloured" else None
+            solvers.stepPointsXPBD(positions, velocities, masses, fixed, ends, restLengths, compliances, self.gravity, self.damping, self.simSpeed, self.dt, self.closeLimit, self.groundLevel, closePairs, self.iterations, outPositions, outVelocities, colours, workers)
+        elif self.solver == "implicit":
+            solvers.stepPointsImplicit(positions, velocities, masses, fixed, ends, restLengths, self.stiffness, self.gravity, self.damping, self.simSpeed, self.dt, self.closeLimit, self.groundLevel, closePairs, outPositions, outVelocities)
+        elif self.multirate > 0:
+            levels = multirate.rateLevels(velocities, masses, fixed, ends, restLengths, self.stiffness, self.simSpeed / self.dt, self.dt, self.multirate)
+            multirate.stepPointsMultirate(positions, velocities, masses, fixed, ends, restLengths, self.gravity, self.stiffness, self.damping, self.simSpeed, self.dt, self.closeLimit, self.groundLevel, closePairs, levels, outPositions, outVelocities)
+        else:
+            physics.stepPoints(positions, velocities, masses, fixed, ends, restLengths, self.gravity, self.stiffness, self.damping, self.simSpeed, self.dt, self.closeLimit, self.groundLevel, closePairs, outPositions, outVelocities)
+
+    def solveIslands(self, active, closePairs): # solvePoints() for a subset, spread over threads
+        '''
+        ## solveIslands()
+        Solves the points, springs and localEnds in `active` (whole islands, see `Islands.active()`) into the back buffers. With more than one worker and at least `islands.PARALLELPOINTS` points, the islands are grouped into bins that share no spring or close pair (`Islands.solverBins()`) and every bin is solved on its own thread; the NumPy kernels release the GIL, so a debris field after a collapse runs on every core.
+        '''
+        points, springs, localEnds = active
+        bins = [] if self.workers == 1 or len(points) < islands.PARALLELPOINTS else self.islands.solverBins(points, closePairs, self.workers)
+        if len(bins) <= 1:
+            outPositions, outVelocities = np.empty((len(points), 2)), np.empty((len(points), 2))
+            self.solvePoints(points, springs, localEnds, closePairs, outPositions, outVelocities, self.workers)
+            self.points.nextPositions[points] = outPositions
+            self.points.nextVelocities[points] = outVelocities
+            return
+        pointBins = np.empty(len(points), dtype=np.int64)
+        for index, members in enumerate(bins):
+            pointBins[members] = index
+        springBins = pointBins[localEnds[:, 0]]
+        pairBins = pointBins[closePairs[:, 0]] if len(closePairs) != 0 else np.zeros(0, dtype=np.int64)
+
+        def solveBin(index, members): # renumbers one bin into its own arrays and solves it
+            local = np.empty(len(points), dtype=np.int64)
+            local[members] = np.arange(len(members))
+            binSprings = np.nonzero(springBins == index)[0]
+            pairs = local[closePairs[pairBins == index]] if len(closePairs) != 0 else closePairs
+            outPositions, outVelocities = np.empty((len(members), 2)), np.empty((len(members), 2))
+            self.solvePoints(points[members], springs[binSprings], local[localEnds[binSprings]], pairs, outPositions, outVelocities) # already on a thread, its colours are swept serially
+            return outPositions, outVelocities
+
+        futures = [islands.pool(self.workers).submit(solveBin, index, members) for index, members in enumerate(bins)]
+        for members, future in zip(bins, futures):
+            outPositions, outVelocities = future.result()
+            self.points.nextPositions[points[members]] = outPositions
+            self.points.nextVelocities[points[members]] = outVelocities
+
+    def sweepCollisions(self, previousPositions, previousThings, points=slice(None)): # continuous collision detection for this substep
+        '''
+        ## sweepCollisions()
+        Sweeps `points` (all of them by default) from `previousPositions` and every thing from `previousThings` to where it is now against the ground lines and the road springs in one `ccd.sweep()`, so nothing tunnels through them however few substeps are used. Points are only swept against the roads of other islands, the structure's own springs are held apart by the solver, and only if they moved more than `ccd.ROADMOTION` of the shortest road this substep. Crossed points are put back in front of the surface; ground lines bounce them and roads stop them.
+        '''
+        road = self.springMaterials == MATERIALS.index("road")
+        roadEnds = self.springEnds[road]
+        lines = len(self.groundLines)
+        if lines == 0 and len(roadEnds) == 0:
+            return
+        positions = np.concatenate([self.positions[points], np.reshape([thing[0:2] for thing in self.things], (-1, 2))]) # things are swept as extra points with a radius
+        count = len(positions) - len(self.things)
+        velocities = np.concatenate([self.velocities[points], np.reshape([thing[2:4] for thing in self.things], (-1, 2))])
+        previous = np.concatenate([previousPositions[points], np.reshape(previousThings, (-1, 2))])
+        radii = np.concatenate([np.zeros(count), [thing[5] for thing in self.things]])
+
+        starts = np.concatenate([self.groundLines[:, 0], self.positions[roadEnds[:, 0]]])
+        ends = np.concatenate([self.groundLines[:, 1], self.positions[roadEnds[:, 1]]])
+        normals = np.concatenate([self.groundNormals, np.full((len(roadEnds), 2), np.nan)])
+        groups = np.concatenate([self.islands.labels[points], np.full(len(self.things), -1)]) # a point never collides with its own island's roads
+        segmentGroups = np.concatenate([np.full(lines, -1), self.islands.labels[roadEnds[:, 0]]])
+        restitution = np.concatenate([np.full(lines, ccd.GROUNDRESTITUTION), np.full(len(roadEnds), ccd.ROADRESTITUTION)])
+        hitPoints, segments, hitPositions, hitNormals = ccd.sweep(previous, positions, starts, ends, normals, radii, groups, segmentGroups, ccd.ROADMOTION * self.restLengths[road].min(initial=np.inf))
+        if len(hitPoints) == 0:
+            return
+        ccd.resolveSweeps(positions, velocities, hitPoints, hitPositions, hitNormals, restitution[segments])
+        self.positions[points] = positions[:count]
+        self.velocities[points] = velocities[:count]
+        for index in hitPoints[hitPoints >= count].tolist():
+            self.things[index - count][0:4] = positions[index].tolist() + velocities[index].tolist()
+
+    def updateSleep(self, active): # puts islands that have come to rest to sleep
+        '''
+        ## updateSleep()
+        Measures the kinetic energy of the awake free points and how much the awake springs changed length this substep (against the back buffers, which hold the previous state), and lets `Islands.update()` put the still islands to sleep. Sleeping points get zero velocity and identical front and back buffers, so buffer swaps leave them where they are.
+        '''
+        if active is None:
+            points, springs = np.arange(len(self.positions)), np.arange(len(self.springEnds))
+        else:
+            points, springs = active[0], active[1]
+        energies = 0.5 * self.baseMasses[points] * (self.velocities[points] ** 2).sum(axis=1)
+        energies[self.fixed[points]] = 0 # anchors keep a velocity they never move with
+        strainRates = np.abs(self.springLengths(springs) - self.springLengths(springs, self.points.nextPositions))
+        asleep = self.islands.update(points, energies, springs, strainRates, self.springEnds)
+        if len(asleep) != 0:
+            self.velocities[asleep] = 0
+            self.points.nextPositions[asleep] = self.positions[asleep]
+            self.points.nextVelocities[asleep] = 0
+
+    def step(self, n=1): # advances the world by n substeps
+        '''
+        ## step()
+        Advances the world by `n` substeps: snaps overstressed springs, moves the things, then transforms every point with the selected solver (`"force"`, `"xpbd"` or `"implicit"`), sweeps for collisions and re-applies any mouse grab. With `sleep` on, islands at rest are left out of all of it (see `islands.py`), so the cost follows the part of the world that moves.
+        '''
+        profile = self.profiler.scope
+        for substep in range(n):
+            active = self.activeSet()
+            with profile("breakSprings"):
+                if len(self.breakSprings(active)) != 0:
+                    active = self.activeSet()
+            with profile("grid"):
+                self.grid.rebuild(self.positions if active is None else self.positions[active[0]])
+            previousThings = [thing[0:2] for thing in self.things]
+            with profile("transformThings"):
+                self.transformThings(active)
+            if active is not None:
+                with profile("sleep"):
+                    self.wakeTouched(active)
+            if active is not None and self.islands.cache is None: # a car or a moving point woke an island, its points join this substep
+                active = self.activeSet()
+                self.grid.rebuild(self.positions if active is None else self.positions[active[0]])
+            with profile("closePairs"):
+                closePairs = self.grid.neighbourPairs(self.closeLimit + 5)
+            with profile("solver"): # transformPoint() for every point
+                if active is None and (self.workers == 1 or len(self.positions) < islands.PARALLELPOINTS):
+                    self.solvePoints(slice(None), slice(None), self.springEnds, closePairs, self.points.nextPositions, self.points.nextVelocities, self.workers)
+                else:
+                    self.solveIslands(active or (np.arange(len(self.positions)), np.arange(len(self.springEnds)), self.springEnds), closePairs)
+            self.points.swap()
+            if self.ccd:
+                with profile("ccd"):
+                    self.sweepCollisions(self.points.nextPositions, previousThings, slice(None) if active is None else active[0]) # the back buffers hold the previous state after swap()
+            if self.selected != None:
+                self.islands.wake([self.selected])
+                self.positions[self.selected] = self.dragPosition
+                self.velocities[self.selected] = self.dragVelocity
+            if self.sleep:
+                with profile("sleep"):
+                    self.updateSleep(active)
+
+    def stepFrame(self): # one rendered frame worth of simulation
+        '''
+        ## stepFrame()
+        Runs `substeps` substeps, which is what the front-end does once per rendered frame. With an `adaptive` controller the substep count and length are chosen for the frame first (see `adaptive.py`).
+        '''
+        with self.profiler.scope("stepFrame"):
+            if self.adaptive is not None:
+                self.adaptive.begin(self)
+            self.step(self.substeps)
+            if self.adaptive is not None:
+                self.adaptive.end(self)
+        self.frame += 1
+        self.profiler.endFrame()
@@ -0,0 +1,276 @@
+###### IMPORT ######
+
+import numpy as np
+import physics
+import islands
+from topology import colourBatches
+
+
+###### CONSTANTS ######
+
+SOLVERS = [
+    "force", # explicit spring forces + Verlet, see physics.stepPoints()
+    "xpbd", # springs as compliant distance constraints, see stepPointsXPBD()
+    "implicit" # backward Euler with a sparse conjugate gradient solve, see stepPointsImplicit()
+]
+
+XPBDITERATIONS = 10 # constraint sweeps per substep
+XPBDRELAXATION = 1.0 # scale on the averaged (Jacobi) constraint corrections, above 1 the sweep gains energy on soft lattices
+XPBDSWEEPS = [
+    "jacobi", # every spring projected from the same positions, corrections averaged per point
+    "coloured" # Gauss-Seidel, one spring colour at a time (see topology.colourSprings()), each colour sees the last one's corrections
+]
+COLOURCHUNK = 4096 # springs per thread when a colour is split between workers
+
+CGTOLERANCE = 1e-8 # relative residual at which conjugate gradient stops
+CGITERATIONS = 500 # hard cap on conjugate gradient iterations per step
+
+# compliance is the inverse of stiffness (px per unit force, per mass). The force solver's STIFFNESS = 60 at the default SIMSPEED and DT is a compliance of about 0.17, these are two orders of magnitude stiffer
+COMPLIANCE = {
+    "wood": 1e-3,
+    "road": 2e-3
+}
+
+###### OPERATOR FUNCTIONS ######
+
+def equivalentCompliance(stiffness, simSpeed, dt): # converts the force solver's STIFFNESS into an XPBD compliance
+    '''
+    ## equivalentCompliance()
+    Outputs the XPBD compliance that behaves like a force-solver spring of `stiffness`. The force solver adds `stiffness * stretch * simSpeed` to the velocity each step of length `dt`, so its stiffness per unit time is `stiffness * simSpeed / dt`.
+    '''
+    return dt / (stiffness * simSpeed)
+
+def materialCompliances(materials, springMaterials, compliance=COMPLIANCE): # per-spring compliance from the material table
+    '''
+    ## materialCompliances()
+    Looks up the compliance of every spring from its material index, using the `compliance` table (material name -> compliance).
+    '''
+    table = np.array([compliance[material] for material in materials], dtype=float)
+    return table[springMaterials]
+
+###### SPARSE MATRIX FUNCTIONS ######
+
+def assembleCSR(rows, columns, values, size): # COO triplets -> CSR, summing duplicates
+    '''
+    ## assembleCSR()
+    Builds a `size` x `size` sparse matrix in compressed sparse row form from COO triplets, adding together entries that land on the same spot. Outputs `(indptr, indices, data)`.
+    '''
+    keys = rows * size + columns
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    values = values[order]
+    uniqueKeys, firstSlots = np.unique(keys, return_index=True)
+    data = np.add.reduceat(values, firstSlots) if len(values) else np.zeros(0)
+    uniqueRows = uniqueKeys // size
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(uniqueRows, minlength=size))])
+    return indptr, uniqueKeys % size, data
+
+def csrMultiply(matrix, vector): # sparse matrix-vector product
+    '''
+    ## csrMultiply()
+    Multiplies a `(indptr, indices, data)` CSR matrix by a vector.
+    '''
+    indptr, indices, data = matrix
+    rowOfEntry = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    return np.bincount(rowOfEntry, data * vector[indices], len(indptr) - 1)
+
+def csrDiagonal(matrix): # main diagonal of a CSR matrix
+    '''
+    ## csrDiagonal()
+    Outputs the main diagonal of a CSR matrix, used as the Jacobi preconditioner of `conjugateGradient()`.
+    '''
+    indptr, indices, data = matrix
+    rowOfEntry = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    onDiagonal = rowOfEntry == indices
+    return np.bincount(rowOfEntry[onDiagonal], data[onDiagonal], len(indptr) - 1)
+
+def conjugateGradient(matrix, rightHandSide, guess=None, tolerance=CGTOLERANCE, maxIterations=CGITERATIONS): # Jacobi-preconditioned CG
+    '''
+    ## conjugateGradient()
+    Solves `matrix @ x = rightHandSide` for a symmetric positive definite CSR matrix with Jacobi-preconditioned conjugate gradient. Outputs `(x, iterations)`.
+    '''
+    x = np.zeros_like(rightHandSide) if guess is None else guess.copy()
+    diagonal = csrDiagonal(matrix)
+    inverseDiagonal = np.where(diagonal != 0, 1 / np.where(diagonal != 0, diagonal, 1), 1)
+    residual = rightHandSide - csrMultiply(matrix, x)
+    preconditioned = inverseDiagonal * residual
+    direction = preconditioned.copy()
+    residualDot = residual @ preconditioned
+    stop = tolerance * max(np.sqrt(rightHandSide @ rightHandSide), 1e-30)
+    for iteration in range(maxIterations):
+        if np.sqrt(residual @ residual) <= stop:
+            return x, iteration
+        product = csrMultiply(matrix, direction)
+        stepSize = residualDot / (direction @ product)
+        x += stepSize * direction
+        residual -= stepSize * product
+        preconditioned = inverseDiagonal * residual
+        newResidualDot = residual @ preconditioned
+        direction = preconditioned + (newResidualDot / residualDot) * direction
+        residualDot = newResidualDot
+    return x, maxIterations
+
+def springJacobian(positions, ends, restLengths, stiffness, fixed): # stiffness matrix of every spring, as COO triplets
+    '''
+    ## springJacobian()
+    Outputs the Jacobian of the spring forces with respect to the point coordinates (2N x 2N, x and y of point `i` are rows `2i` and `2i + 1`) as COO triplets `(rows, columns, values)`. The transverse term of compressed springs is dropped so that the matrix stays negative semi-definite. Rows and columns of fixed points are left out, which is what treats them as Dirichlet constraints.
+    '''
+    delta = positions[ends[:, 1]] - positions[ends[:, 0]]
+    lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    safeLengths = np.where(lengths > 0, lengths, 1)
+    direction = delta / safeLengths[:, None] * (lengths > 0)[:, None]
+    outer = direction[:, :, None] * direction[:, None, :] # n n^T
+    transverse = np.clip(1 - restLengths / safeLengths, 0, None)[:, None, None] * (np.eye(2) - outer)
+    blocks = -stiffness * (outer + transverse) # d(force on an end) / d(position of the same end)
+
+    # every spring touches the four 2x2 blocks (a,a) (b,b) (a,b) (b,a), the off-diagonal ones with the opposite sign
+    owners = np.stack([ends[:, 0], ends[:, 1], ends[:, 0], ends[:, 1]], axis=1)
+    others = np.stack([ends[:, 0], ends[:, 1], ends[:, 1], ends[:, 0]], axis=1)
+    signs = np.array([1, 1, -1, -1])
+    axisRow, axisColumn = np.meshgrid(np.arange(2), np.arange(2), indexing="ij")
+    rows = 2 * owners[:, :, None, None] + axisRow
+    columns = 2 * others[:, :, None, None] + axisColumn
+    values = signs[None, :, None, None] * blocks[:, None, :, :]
+    rows, columns, values = np.broadcast_arrays(rows, columns, values)
+    rows, columns, values = rows.ravel(), columns.ravel(), values.ravel()
+
+    free = ~np.repeat(fixed, 2)
+    keep = free[rows] & free[columns]
+    return rows[keep], columns[keep], values[keep]
+
+###### SOLVERS ######
+
+def stepPointsXPBD(positions, velocities, masses, fixed, ends, restLengths, compliances, gravity, damping, simSpeed, dt, closeLimit, groundLevel, pairs=None, iterations=XPBDITERATIONS, outPositions=None, outVelocities=None, colours=None, workers=1): # position-based counterpart of physics.stepPoints()
+    '''
+    ## stepPointsXPBD()
+    Extended position-based dynamics step. Gravity and close pressure are applied to the velocities like in `physics.stepPoints()`, but the springs are solved as distance constraints with per-spring `compliances` (0 is perfectly rigid) over `iterations` sweeps, so stiff structures stay stable at large time steps. Velocities are recovered from the corrected positions afterwards.
+
+    Without `colours` every sweep is vectorized Jacobi: each spring's correction is divided by the larger number of springs at its two ends, so the corrections landing on a point add up to at most one, and its lambda accumulates only the correction that was applied. With the spring colours of `topology.colourSprings()` it is Gauss-Seidel instead, one colour at a time (see `projectColour()`), which converges faster for the same number of sweeps. Colours of more than `COLOURCHUNK` springs are split between `workers` threads.
+    '''
+    count = len(positions)
+    if outPositions is None:
+        outPositions = np.empty_like(positions)
+    if outVelocities is None:
+        outVelocities = np.empty_like(velocities)
+
+    acceleration = np.zeros((count, 2)) + gravity
+    if pairs is not None:
+        acceleration += physics.closePressure(positions, pairs, closeLimit)
+
+    outPositions[:] = positions
+    outVelocities[:] = velocities
+    grounded = outPositions[:, 1] >= groundLevel # ground bounce
+    outPositions[grounded, 1] = groundLevel
+    outVelocities[grounded, 1] *= -1
+    start = outPositions.copy()
+
+    outVelocities += acceleration * simSpeed
+    outVelocities *= damping
+    outVelocities[fixed] = 0
+    predicted = outPositions + outVelocities * dt
+
+    inverseMasses = np.where(fixed, 0, 1 / masses)
+    weights = inverseMasses[ends[:, 0]] + inverseMasses[ends[:, 1]]
+    scaledCompliances = compliances / dt**2
+    lambdas = np.zeros(len(ends))
+    active = weights + scaledCompliances > 0 # springs between two fixed points can not move anything
+    if colours is not None:
+        executor = islands.pool(workers) if workers > 1 else None
+        batches = []
+        for batch in colourBatches(colours):
+            batch = batch[active[batch]]
+            pieces = 1 if executor is None else min(workers, len(batch) // COLOURCHUNK)
+            batches.append([colourBatch(chunk, ends, restLengths, inverseMasses, weights, scaledCompliances) for chunk in np.array_split(batch, max(pieces, 1))])
+        for iteration in range(iterations):
+            for chunks in batches:
+                if len(chunks) == 1:
+                    projectColour(predicted, chunks[0])
+                else: # springs of one colour share no point, so the threads write to different rows
+                    list(executor.map(lambda chunk: projectColour(predicted, chunk), chunks))
+        outVelocities[:] = (predicted - start) / dt
+        outPositions[:] = predicted
+        return outPositions, outVelocities
+
+    constraintCounts = np.maximum(np.bincount(ends[active].ravel(), minlength=count), 1)
+    shares = XPBDRELAXATION / np.maximum(constraintCounts[ends[:, 0]], constraintCounts[ends[:, 1]]) # per spring, so the lambdas add up what the positions actually moved
+
+    for iteration in range(iterations):
+        delta = predicted[ends[:, 1]] - predicted[ends[:, 0]]
+        lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        safeLengths = np.where(lengths > 0, lengths, 1)
+        direction = delta / safeLengths[:, None] * (lengths > 0)[:, None]
+        constraint = lengths - restLengths
+        deltaLambda = shares * np.where(active, (-constraint - scaledCompliances * lambdas) / np.where(active, weights + scaledCompliances, 1), 0)
+        lambdas += deltaLambda
+
+        correction = direction * deltaLambda[:, None] # moves the second end, the first end gets the opposite
+        for axis in range(2):
+            predicted[:, axis] += inverseMasses * (np.bincount(ends[:, 1], correction[:, axis], count) - np.bincount(ends[:, 0], correction[:, axis], count))
+
+    outVelocities[:] = (predicted - start) / dt
+    outPositions[:] = predicted
+    return outPositions, outVelocities
+
+def colourBatch(springs, ends, restLengths, inverseMasses, weights, scaledCompliances): # gathers what projectColour() needs once per step
+    '''
+    ## colourBatch()
+    Gathers everything `projectColour()` reads for the springs of one colour, once per step instead of once per sweep: the two end indices, their inverse masses as columns, the rest lengths, the constraint denominators, the scaled compliances and a fresh array of lambdas.
+    '''
+    first, second = ends[springs, 0], ends[springs, 1]
+    return first, second, inverseMasses[first, None], inverseMasses[second, None], restLengths[springs], weights[springs] + scaledCompliances[springs], scaledCompliances[springs], np.zeros(len(springs))
+
+def projectColour(predicted, batch): # one Gauss-Seidel pass over springs that share no point
+    '''
+    ## projectColour()
+    Projects the distance constraints of one `colourBatch()`, whose springs must not share any point, and moves their ends in `predicted` in place. With no shared ends the corrections can be written with plain fancy indexing and need no averaging. The batch keeps its own lambdas across the sweeps of a step.
+    '''
+    first, second, firstInverseMasses, secondInverseMasses, restLengths, denominators, scaledCompliances, lambdas = batch
+    delta = predicted[second] - predicted[first]
+    lengths = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+    safeLengths = np.where(lengths > 0, lengths, 1)
+    deltaLambda = (restLengths - lengths - scaledCompliances * lambdas) / denominators
+    lambdas += deltaLambda
+    correction = delta * (deltaLambda / safeLengths * (lengths > 0))[:, None] # moves the second end, the first end gets the opposite
+    predicted[second] += secondInverseMasses * correction
+    predicted[first] -= firstInverseMasses * correction
+
+def stepPointsImplicit(positions, velocities, masses, fixed, ends, restLengths, stiffness, gravity, damping, simSpeed, dt, closeLimit, groundLevel, pairs=None, outPositions=None, outVelocities=None): # backward Euler counterpart of physics.stepPoints()
+    '''
+    ## stepPointsImplicit()
+    Backward (implicit) Euler step. Linearizes the spring forces around the current positions, assembles the sparse system `(M - simSpeed * dt * K) dv = simSpeed * (F + dt * K v + M g)` and solves it with conjugate gradient, which stays stable for stiff springs at large time steps. Fixed points are Dirichlet constraints: their rows are replaced by the identity and their velocity change is zero.
+    '''
+    count = len(positions)
+    if outPositions is None:
+        outPositions = np.empty_like(positions)
+    if outVelocities is None:
+        outVelocities = np.empty_like(velocities)
+
+    outPositions[:] = positions
+    outVelocities[:] = velocities
+    grounded = outPositions[:, 1] >= groundLevel # ground bounce
+    outPositions[grounded, 1] = groundLevel
+    outVelocities[grounded, 1] *= -1
+
+    forces = physics.springForces(positions, ends, restLengths, stiffness)
+    accelerations = np.zeros((count, 2)) + gravity
+    if pairs is not None:
+        accelerations += physics.closePressure(positions, pairs, closeLimit)
+    massDiagonal = np.repeat(masses, 2)
+    free = ~np.repeat(fixed, 2)
+
+    rows, columns, values = springJacobian(positions, ends, restLengths, stiffness, fixed)
+    stiffnessMatrix = assembleCSR(rows, columns, values, 2 * count)
+    identity = np.arange(2 * count)
+    system = assembleCSR(np.concatenate([rows, identity]), np.concatenate([columns, identity]), np.concatenate([-simSpeed * dt * values, np.where(free, massDiagonal, 1)]), 2 * count)
+
+    velocityVector = outVelocities.ravel()
+    rightHandSide = simSpeed * (forces.ravel() + dt * csrMultiply(stiffnessMatrix, velocityVector * free) + massDiagonal * accelerations.ravel())
+    rightHandSide[~free] = 0
+    velocityChange, iterations = conjugateGradient(system, rightHandSide)
+
+    outVelocities += velocityChange.reshape(count, 2)
+    outVelocities *= damping
+    movement = outVelocities * dt
+    movement[fixed] = 0 # edge case where point is considered "fixed", if so do not change position
+    outPositions += movement
+    return outPositions, outVelocities
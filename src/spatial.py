@@ -0,0 +1,142 @@
+###### IMPORT ######
+
+import numpy as np
+
+
+###### SPATIAL HASH GRID ######
+
+CELLSTRIDE = 1 << 32 # spacing between grid columns in the packed cell key, big enough that rows never collide
+
+HALFNEIGHBOURHOOD = [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)] # visiting only half of the 3x3 block finds every neighbouring pair exactly once
+
+class SpatialGrid: # uniform-grid broadphase over a set of points
+    '''
+    ## SpatialGrid
+    Uniform grid (cell list) over a position array. Points are bucketed into square cells of `cellSize`, so any two points closer than `cellSize` are always in the same or neighbouring cells. Build it once per substep and share it between the close pressure pass, the car/road contact and mouse picking.
+    '''
+
+    def __init__(self, positions, cellSize):
+        self.cellSize = cellSize
+        self.rebuild(positions)
+
+    def rebuild(self, positions): # re-buckets every point, vectorized
+        '''
+        ## rebuild()
+        Re-buckets every point into its cell. Points are sorted by packed cell key so each occupied cell is one contiguous run of `order`.
+        '''
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        cells = np.floor(self.positions / self.cellSize).astype(np.int64)
+        keys = self.cellKeys(cells[:, 0], cells[:, 1])
+
+        self.order = np.argsort(keys, kind="stable") # point indices grouped by cell
+        sortedKeys = keys[self.order]
+        self.keys, self.starts, self.counts = np.unique(sortedKeys, return_index=True, return_counts=True) # one entry per occupied cell
+        self.cellCoords = cells[self.order[self.starts]]
+
+    def cellKeys(self, cellX, cellY): # packs a pair of integer cell coordinates into one sortable key
+        '''
+        ## cellKeys()
+        Packs integer cell coordinates into one int64 key per cell.
+        '''
+        return cellX * CELLSTRIDE + cellY
+
+    def lookupCells(self, cellX, cellY): # finds the occupied-cell slot of each coordinate, or -1
+        '''
+        ## lookupCells()
+        Outputs the occupied-cell slot for every `(cellX, cellY)` coordinate, or `-1` where that cell holds no points.
+        '''
+        keys = self.cellKeys(cellX, cellY)
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1)
+        slots = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return np.where(self.keys[slots] == keys, slots, -1)
+
+    def neighbourPairs(self, radius=None): # every pair of points in the same or touching cells
+        '''
+        ## neighbourPairs()
+        Outputs an (P, 2) array of unordered point index pairs that share a cell or sit in adjacent cells. When `radius` is given, pairs farther apart than it are dropped.
+        '''
+        pairs = []
+        for offsetX, offsetY in HALFNEIGHBOURHOOD:
+            otherSlots = self.lookupCells(self.cellCoords[:, 0] + offsetX, self.cellCoords[:, 1] + offsetY)
+            slots = np.nonzero(otherSlots >= 0)[0]
+            otherSlots = otherSlots[slots]
+            if len(slots) == 0:
+                continue
+
+            countsA = self.counts[slots]
+            countsB = self.counts[otherSlots]
+            blockSizes = countsA * countsB # every member of cell A against every member of cell B
+            block = np.repeat(np.arange(len(slots)), blockSizes)
+            local = np.arange(blockSizes.sum()) - np.repeat(np.cumsum(blockSizes) - blockSizes, blockSizes)
+            first = self.order[self.starts[slots][block] + local // countsB[block]]
+            second = self.order[self.starts[otherSlots][block] + local % countsB[block]]
+
+            if offsetX == 0 and offsetY == 0: # inside one cell, keep each pair once and skip self pairs
+                keep = first < second
+                first, second = first[keep], second[keep]
+            pairs.append(np.stack([first, second], axis=1))
+
+        if len(pairs) == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        pairs = np.concatenate(pairs)
+        if radius is not None:
+            delta = self.positions[pairs[:, 1]] - self.positions[pairs[:, 0]]
+            pairs = pairs[delta[:, 0] ** 2 + delta[:, 1] ** 2 < radius ** 2]
+        return pairs
+
+    def queryRadius(self, point, radius): # every point within radius of a coordinate
+        '''
+        ## queryRadius()
+        Outputs the indices of every point within `radius` of `point`, only looking at the cells the query circle overlaps.
+        '''
+        point = np.asarray(point[0:2], dtype=float)
+        low = np.floor((point - radius) / self.cellSize)
+        high = np.floor((point + radius) / self.cellSize)
+        if not (np.isfinite(low).all() and np.isfinite(high).all()) or (high - low + 1).prod() > len(self.keys): # the circle covers more cells than are occupied, so just check every point
+            candidates = np.arange(len(self.positions))
+        else:
+            cellX, cellY = np.meshgrid(np.arange(low[0], high[0] + 1, dtype=np.int64), np.arange(low[1], high[1] + 1, dtype=np.int64), indexing="ij")
+            slots = self.lookupCells(cellX.ravel(), cellY.ravel())
+            slots = slots[slots >= 0]
+            if len(slots) == 0:
+                return np.zeros(0, dtype=np.int64)
+            candidates = np.concatenate([self.order[self.starts[slot]:self.starts[slot] + self.counts[slot]] for slot in slots])
+
+        delta = self.positions[candidates] - point
+        return candidates[delta[:, 0] ** 2 + delta[:, 1] ** 2 < radius ** 2]
+
+    def queryPoints(self, points, radius): # queryRadius() for many coordinates at once
+        '''
+        ## queryPoints()
+        Outputs an (P, 2) array of `(query, point)` index pairs, one for every grid point within `radius` of one of the coordinates in `points`, vectorized over all of them. Non-finite coordinates find nothing.
+        '''
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        queries = np.nonzero(np.isfinite(points).all(axis=1))[0]
+        if len(queries) == 0 or len(self.keys) == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        cells = np.floor(points[queries] / self.cellSize).astype(np.int64)
+        reach = int(np.ceil(radius / self.cellSize))
+        pairs = []
+        for offsetX in range(-reach, reach + 1):
+            for offsetY in range(-reach, reach + 1):
+                slots = self.lookupCells(cells[:, 0] + offsetX, cells[:, 1] + offsetY)
+                found = np.nonzero(slots >= 0)[0]
+                counts = self.counts[slots[found]]
+                local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                members = self.order[np.repeat(self.starts[slots[found]], counts) + local]
+                pairs.append(np.stack([np.repeat(queries[found], counts), members], axis=1))
+        pairs = np.concatenate(pairs)
+        delta = self.positions[pairs[:, 1]] - points[pairs[:, 0]]
+        return pairs[delta[:, 0] ** 2 + delta[:, 1] ** 2 < radius ** 2]
+
+    def nearest(self, point, radius): # closest point within radius, used for mouse picking
+        '''
+        ## nearest()
+        Outputs the index of the closest point within `radius` of `point`, or `None` if there is none.
+        '''
+        candidates = self.queryRadius(point, radius)
+        if len(candidates) == 0:
+            return None
+        delta = self.positions[candidates] - np.asarray(point[0:2], dtype=float)
+        return int(candidates[np.argmin(delta[:, 0] ** 2 + delta[:, 1] ** 2)])
@@ -0,0 +1,188 @@
+###### IMPORT ######
+
+import numpy as np
+
+
+###### CONSTANTS ######
+
+MINCAPACITY = 16 # smallest allocation, so a handful of editor clicks never reallocates
+
+POINTFIELDS = ["frontPositions", "frontVelocities", "backPositions", "backVelocities", "massBuffer", "baseMassBuffer", "fixedBuffer"]
+SPRINGFIELDS = ["endBuffer", "restBuffer", "materialBuffer"]
+
+###### OPERATOR FUNCTIONS ######
+
+def growBuffers(owner, fields, live, capacity): # reallocates arrays, keeping the live rows
+    '''
+    ## growBuffers()
+    Replaces each array attribute named in `fields` with a bigger one of `capacity` rows, copying over the first `live` rows.
+    '''
+    for name in fields:
+        old = getattr(owner, name)
+        new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+        new[:live] = old[:live]
+        setattr(owner, name, new)
+
+###### STATE BUFFERS ######
+
+class PointBuffer: # struct-of-arrays storage for every point
+    '''
+    ## PointBuffer
+    Struct-of-arrays point storage. Positions and velocities are double-buffered: the solver reads the front buffers, writes the back buffers and then calls `swap()`, so stepping never allocates. All arrays are preallocated to a capacity that doubles when `append()` runs out of room, so adding points is amortized O(1).
+    '''
+
+    def __init__(self, capacity=MINCAPACITY):
+        self.count = 0
+        self.capacity = 0
+        self.frontPositions = np.zeros((0, 2))
+        self.frontVelocities = np.zeros((0, 2))
+        self.backPositions = np.zeros((0, 2))
+        self.backVelocities = np.zeros((0, 2))
+        self.massBuffer = np.zeros(0)
+        self.baseMassBuffer = np.zeros(0) # masses without any car load on them
+        self.fixedBuffer = np.zeros(0, dtype=bool)
+        self.reserve(capacity)
+
+    def reserve(self, capacity): # grows to at least capacity, doubling
+        '''
+        ## reserve()
+        Makes sure there is room for at least `capacity` points, growing geometrically so repeated appends stay amortized O(1).
+        '''
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2, MINCAPACITY)
+        growBuffers(self, POINTFIELDS, self.count, capacity)
+        self.capacity = capacity
+
+    def append(self, x, y, fixed=False, mass=1, velocity=(0, 0)): # adds one point
+        '''
+        ## append()
+        Adds one point and outputs its index.
+        '''
+        self.reserve(self.count + 1)
+        index = self.count
+        self.frontPositions[index] = (x, y)
+        self.frontVelocities[index] = velocity
+        self.massBuffer[index] = mass
+        self.baseMassBuffer[index] = mass
+        self.fixedBuffer[index] = fixed
+        self.count += 1
+        return index
+
+    def extend(self, positions, velocities, fixed, masses): # adds many points at once
+        '''
+        ## extend()
+        Adds a block of points from arrays (positions and velocities (N, 2), fixed and masses (N,)) with one copy per array, and outputs the index of the first one.
+        '''
+        count = len(positions)
+        self.reserve(self.count + count)
+        start, end = self.count, self.count + count
+        self.frontPositions[start:end] = positions
+        self.frontVelocities[start:end] = velocities
+        self.massBuffer[start:end] = masses
+        self.baseMassBuffer[start:end] = masses
+        self.fixedBuffer[start:end] = fixed
+        self.count = end
+        return start
+
+    def swap(self): # makes the freshly written back buffers current
+        '''
+        ## swap()
+        Swaps the front and back position/velocity buffers after the solver has written the next state into the back buffers.
+        '''
+        self.frontPositions, self.backPositions = self.backPositions, self.frontPositions
+        self.frontVelocities, self.backVelocities = self.backVelocities, self.frontVelocities
+
+    # views of the live part of each array, these change after swap() so always read them fresh
+
+    @property
+    def positions(self):
+        return self.frontPositions[:self.count]
+
+    @property
+    def velocities(self):
+        return self.frontVelocities[:self.count]
+
+    @property
+    def nextPositions(self):
+        return self.backPositions[:self.count]
+
+    @property
+    def nextVelocities(self):
+        return self.backVelocities[:self.count]
+
+    @property
+    def masses(self):
+        return self.massBuffer[:self.count]
+
+    @property
+    def baseMasses(self):
+        return self.baseMassBuffer[:self.count]
+
+    @property
+    def fixed(self):
+        return self.fixedBuffer[:self.count]
+
+class SpringBuffer: # struct-of-arrays storage for every spring
+    '''
+    ## SpringBuffer
+    Struct-of-arrays spring storage: an (M, 2) endpoint index array, a rest length array and a material index array, preallocated with the same amortized doubling as `PointBuffer`.
+    '''
+
+    def __init__(self, capacity=MINCAPACITY):
+        self.count = 0
+        self.capacity = 0
+        self.endBuffer = np.zeros((0, 2), dtype=np.int64)
+        self.restBuffer = np.zeros(0)
+        self.materialBuffer = np.zeros(0, dtype=np.int64) # index into MATERIALS
+        self.reserve(capacity)
+
+    def reserve(self, capacity): # grows to at least capacity, doubling
+        '''
+        ## reserve()
+        Makes sure there is room for at least `capacity` springs, growing geometrically.
+        '''
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2, MINCAPACITY)
+        growBuffers(self, SPRINGFIELDS, self.count, capacity)
+        self.capacity = capacity
+
+    def append(self, index1, index2, restLength, material): # adds one spring
+        '''
+        ## append()
+        Adds one spring and outputs its index.
+        '''
+        self.reserve(self.count + 1)
+        spring = self.count
+        self.endBuffer[spring] = (index1, index2)
+        self.restBuffer[spring] = restLength
+        self.materialBuffer[spring] = material
+        self.count += 1
+        return spring
+
+    def extend(self, ends, restLengths, materials): # adds many springs at once
+        '''
+        ## extend()
+        Adds a block of springs from arrays and outputs the index of the first one.
+        '''
+        count = len(ends)
+        self.reserve(self.count + count)
+        start, end = self.count, self.count + count
+        self.endBuffer[start:end] = ends
+        self.restBuffer[start:end] = restLengths
+        self.materialBuffer[start:end] = materials
+        self.count = end
+        return start
+
+    @property
+    def ends(self):
+        return self.endBuffer[:self.count]
+
+    @property
+    def restLengths(self):
+        return self.restBuffer[:self.count]
+
+    @property
+    def materials(self):
+        return self.materialBuffer[:self.count]
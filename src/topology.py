@@ -0,0 +1,299 @@
+###### IMPORT ######
+
+import numpy as np
+from state import growBuffers
+
+
+###### CONSTANTS ######
+
+ROWSLACK = 4 # free slots left in every row so the editor and breakages can add springs without moving the row
+
+ROWFIELDS = ["rowStarts", "rowCapacities", "rowCounts"]
+SLOTFIELDS = ["neighbourBuffer", "springBuffer"]
+
+###### SPRING ADJACENCY ######
+
+class SpringAdjacency: # compressed per-point spring lists
+    '''
+    ## SpringAdjacency
+    Compressed (CSR-style) adjacency from every point to the springs attached to it. Row `p` lives in `neighbourBuffer`/`springBuffer` from `rowStarts[p]` for `rowCounts[p]` slots, and each row keeps spare capacity so adding, removing or re-targeting a spring is O(degree) instead of a rebuild. A row that fills up is moved to the end with double the room, and the buffers are compacted once more than half of them is abandoned rows.
+    '''
+
+    def __init__(self, ends=None, pointCount=0):
+        if ends is None:
+            ends = np.zeros((0, 2), dtype=np.int64)
+        self.rebuild(ends, pointCount)
+
+    def rebuild(self, ends, pointCount): # builds every row from scratch, vectorized
+        '''
+        ## rebuild()
+        Builds the adjacency of `pointCount` points from an (M, 2) spring endpoint array in one vectorized pass. Row `i` of `ends` is spring `i`; rows holding `-1` are skipped.
+        '''
+        ends = np.asarray(ends, dtype=np.int64).reshape(-1, 2)
+        springIds = np.nonzero((ends >= 0).all(axis=1))[0]
+        ends = ends[springIds]
+        degrees = np.bincount(ends.ravel(), minlength=pointCount)[:pointCount]
+        capacities = degrees + ROWSLACK
+
+        self.pointCount = pointCount
+        self.rowCapacity = max(pointCount, 1) # allocated length of the per-row arrays
+        self.rowStarts = np.zeros(self.rowCapacity, dtype=np.int64)
+        self.rowCapacities = np.zeros(self.rowCapacity, dtype=np.int64)
+        self.rowCounts = np.zeros(self.rowCapacity, dtype=np.int64)
+        self.rowStarts[:pointCount] = np.cumsum(capacities) - capacities
+        self.rowCapacities[:pointCount] = capacities
+        self.rowCounts[:pointCount] = degrees
+
+        self.used = int(capacities.sum()) # slots handed out to rows, live or abandoned
+        self.abandoned = 0 # slots of rows that have been moved to the end
+        self.slotCapacity = max(self.used, 1)
+        self.neighbourBuffer = np.full(self.slotCapacity, -1, dtype=np.int64)
+        self.springBuffer = np.full(self.slotCapacity, -1, dtype=np.int64)
+
+        owners = ends.ravel() # every spring appears once in the row of each of its ends
+        others = ends[:, ::-1].ravel()
+        springIds = np.repeat(springIds, 2)
+        order = np.argsort(owners, kind="stable")
+        owners = owners[order]
+        rank = np.arange(len(owners)) - (np.cumsum(degrees) - degrees)[owners]
+        slots = self.rowStarts[owners] + rank
+        self.neighbourBuffer[slots] = others[order]
+        self.springBuffer[slots] = springIds[order]
+
+    def reserveSlots(self, count): # grows the slot buffers, doubling
+        '''
+        ## reserveSlots()
+        Makes room for at least `count` slots in `neighbourBuffer`/`springBuffer`, growing them to double their size (or `count` if that is more) and keeping the slots handed out so far.
+        '''
+        if count > self.slotCapacity:
+            self.slotCapacity = max(count, self.slotCapacity * 2)
+            growBuffers(self, SLOTFIELDS, self.used, self.slotCapacity)
+
+    def addPoint(self): # gives a new point an empty row at the end
+        '''
+        ## addPoint()
+        Adds an empty row for a newly appended point and outputs its index.
+        '''
+        if self.pointCount == self.rowCapacity:
+            self.rowCapacity *= 2
+            growBuffers(self, ROWFIELDS, self.pointCount, self.rowCapacity)
+        point = self.pointCount
+        self.reserveSlots(self.used + ROWSLACK)
+        self.rowStarts[point] = self.used
+        self.rowCapacities[point] = ROWSLACK
+        self.rowCounts[point] = 0
+        self.used += ROWSLACK
+        self.pointCount += 1
+        return point
+
+    def addPoints(self, count): # gives many new points empty rows at the end
+        '''
+        ## addPoints()
+        Adds empty rows for `count` newly appended points at once and outputs the index of the first one.
+        '''
+        first = self.pointCount
+        if first + count > self.rowCapacity:
+            self.rowCapacity = max(first + count, self.rowCapacity * 2)
+            growBuffers(self, ROWFIELDS, first, self.rowCapacity)
+        self.reserveSlots(self.used + count * ROWSLACK)
+        self.rowStarts[first:first + count] = self.used + np.arange(count) * ROWSLACK
+        self.rowCapacities[first:first + count] = ROWSLACK
+        self.rowCounts[first:first + count] = 0
+        self.used += count * ROWSLACK
+        self.pointCount += count
+        return first
+
+    def rowSlots(self, points): # every live slot of some rows
+        '''
+        ## rowSlots()
+        Outputs `(owners, slots)`: the buffer slot of every entry in the rows of `points`, and the point each one belongs to.
+        '''
+        counts = self.rowCounts[points]
+        offsets = np.cumsum(counts) - counts
+        owners = np.repeat(points, counts)
+        slots = np.repeat(self.rowStarts[points] - offsets, counts) + np.arange(counts.sum())
+        return owners, slots
+
+    def insert(self, point, neighbour, spring): # adds one entry to a row
+        '''
+        ## insert()
+        Records that `spring` connects `point` to `neighbour`. Moves the row to the end with double the room if it is full.
+        '''
+        start, capacity, count = self.rowStarts[point], self.rowCapacities[point], self.rowCounts[point]
+        if count == capacity:
+            newCapacity = capacity * 2
+            self.reserveSlots(self.used + newCapacity)
+            self.neighbourBuffer[self.used:self.used + count] = self.neighbourBuffer[start:start + count]
+            self.springBuffer[self.used:self.used + count] = self.springBuffer[start:start + count]
+            self.rowStarts[point] = start = self.used
+            self.rowCapacities[point] = newCapacity
+            self.used += newCapacity
+            self.abandoned += capacity
+        self.neighbourBuffer[start + count] = neighbour
+        self.springBuffer[start + count] = spring
+        self.rowCounts[point] += 1
+        if self.abandoned > self.used // 2:
+            self.compact()
+
+    def remove(self, point, spring): # drops one entry from a row
+        '''
+        ## remove()
+        Forgets that `spring` is attached to `point`, by moving the last entry of the row into its slot.
+        '''
+        start, count = self.rowStarts[point], self.rowCounts[point]
+        slot = start + int(np.nonzero(self.springBuffer[start:start + count] == spring)[0][0])
+        last = start + count - 1
+        self.neighbourBuffer[slot] = self.neighbourBuffer[last]
+        self.springBuffer[slot] = self.springBuffer[last]
+        self.rowCounts[point] -= 1
+
+    def addSpring(self, spring, index1, index2): # editor "add" tool
+        '''
+        ## addSpring()
+        Adds a spring between two points to both of their rows.
+        '''
+        self.insert(index1, index2, spring)
+        self.insert(index2, index1, spring)
+
+    def removeSpring(self, spring, index1, index2):
+        '''
+        ## removeSpring()
+        Removes a spring from the rows of both of its points.
+        '''
+        self.remove(index1, spring)
+        self.remove(index2, spring)
+
+    def moveSpringEnd(self, spring, oldPoint, newPoint, otherPoint): # used when a breakage gives a spring its own endpoints
+        '''
+        ## moveSpringEnd()
+        Re-attaches one end of `spring` from `oldPoint` to `newPoint`, where `otherPoint` is the spring's other end.
+        '''
+        self.remove(oldPoint, spring)
+        self.insert(newPoint, otherPoint, spring)
+        start, count = self.rowStarts[otherPoint], self.rowCounts[otherPoint]
+        slot = start + int(np.nonzero(self.springBuffer[start:start + count] == spring)[0][0])
+        self.neighbourBuffer[slot] = newPoint
+
+    def detachEnds(self, springs, oldPoints, newPoints, otherPoints): # moveSpringEnd() for many spring ends at once
+        '''
+        ## detachEnds()
+        Vectorized `moveSpringEnd()` for ends that move onto brand new points, ex: a fracture. End `i` of `springs[i]` moves from `oldPoints[i]` onto the new point `newPoints[i]` (whose row must be empty), where `otherPoints[i]` is the spring's other end after every move. The old rows are compacted in place and rows that only lost a neighbour are relabelled, so the cost is the degree of the touched points rather than a rebuild.
+        '''
+        if len(springs) == 0:
+            return
+        rows = np.unique(oldPoints)
+        owners, slots = self.rowSlots(rows)
+        keyBase = max(int(self.springBuffer[slots].max(initial=0)), int(springs.max())) + 1 # (point, spring) pairs as single integers
+        keep = ~np.isin(owners * keyBase + self.springBuffer[slots], oldPoints * keyBase + springs)
+        owners, neighbours, springIds = owners[keep], self.neighbourBuffer[slots[keep]], self.springBuffer[slots[keep]]
+        counts = np.bincount(np.searchsorted(rows, owners), minlength=len(rows))
+        ranks = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts) # position among the kept entries of its row
+        self.neighbourBuffer[self.rowStarts[owners] + ranks] = neighbours
+        self.springBuffer[self.rowStarts[owners] + ranks] = springIds
+        self.rowCounts[rows] = counts
+
+        # the ends that stayed put now point at the moved end's new point
+        owners, slots = self.rowSlots(np.unique(otherPoints))
+        order = np.argsort(springs, kind="stable")
+        found = np.minimum(np.searchsorted(springs[order], self.springBuffer[slots]), len(springs) - 1)
+        relabel = springs[order][found] == self.springBuffer[slots]
+        self.neighbourBuffer[slots[relabel]] = newPoints[order][found[relabel]]
+
+        self.neighbourBuffer[self.rowStarts[newPoints]] = otherPoints
+        self.springBuffer[self.rowStarts[newPoints]] = springs
+        self.rowCounts[newPoints] = 1
+
+    def compact(self): # squeezes out abandoned rows
+        '''
+        ## compact()
+        Rebuilds the buffers without the slots of abandoned rows.
+        '''
+        offsets, neighbours, springIds = self.toCSR()
+        owners = np.repeat(np.arange(self.pointCount), np.diff(offsets))
+        ids, firstSlots = np.unique(springIds, return_index=True) # one of the two entries of each spring is enough to recover its ends
+        ends = np.full((ids.max() + 1 if len(ids) else 0, 2), -1, dtype=np.int64)
+        ends[ids, 0] = owners[firstSlots]
+        ends[ids, 1] = neighbours[firstSlots]
+        self.rebuild(ends, self.pointCount)
+
+    ### QUERIES
+
+    def springsOf(self, point):
+        '''
+        ## springsOf()
+        Outputs the indices of every spring attached to `point`.
+        '''
+        start = self.rowStarts[point]
+        return self.springBuffer[start:start + self.rowCounts[point]].copy()
+
+    def neighboursOf(self, point):
+        '''
+        ## neighboursOf()
+        Outputs the indices of every point connected to `point` by a spring, in the same order as `springsOf()`.
+        '''
+        start = self.rowStarts[point]
+        return self.neighbourBuffer[start:start + self.rowCounts[point]].copy()
+
+    def degrees(self):
+        '''
+        ## degrees()
+        Outputs the number of springs attached to every point.
+        '''
+        return self.rowCounts[:self.pointCount].copy()
+
+    def toCSR(self): # packed copy with no free slots
+        '''
+        ## toCSR()
+        Outputs a tightly packed `(offsets, neighbours, springIds)` copy, where the springs of point `p` are `springIds[offsets[p]:offsets[p + 1]]`.
+        '''
+        counts = self.rowCounts[:self.pointCount]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        slots = np.repeat(self.rowStarts[:self.pointCount] - offsets[:-1], counts) + np.arange(offsets[-1])
+        return offsets, self.neighbourBuffer[slots], self.springBuffer[slots]
+
+###### SPRING PAIRS ######
+
+def newPairs(ends, existing, pointCount): # which springs of a block would join a pair twice
+    '''
+    ## newPairs()
+    Outputs a mask over the rows of `ends` that keeps every spring whose pair of points (in either order) is not joined by a spring of `existing` or by an earlier row of `ends`.
+    '''
+    stride = max(pointCount, 1)
+    keys = ends.min(axis=1, initial=stride) * stride + ends.max(axis=1, initial=-1) # one key per unordered pair
+    existingKeys = existing.min(axis=1, initial=stride) * stride + existing.max(axis=1, initial=-1)
+    keep = np.zeros(len(ends), dtype=bool)
+    keep[np.unique(keys, return_index=True)[1]] = True # first of every pair in the block
+    return keep & ~np.isin(keys, existingKeys)
+
+###### SPRING COLOURING ######
+
+def colourSprings(ends, pointCount, seed=0): # colours with no shared endpoint inside a colour
+    '''
+    ## colourSprings()
+    Edge colouring of the spring graph, vectorized: gives every spring a colour so that no two springs of one colour share a point, so a whole colour can be projected or scattered at once without write conflicts. Each colour is a maximal matching of the springs not coloured yet, grown in rounds where every candidate holding the lowest random priority at both of its ends joins the colour and the other candidates at those ends drop out. Maximal matchings keep the number of colours at most `2 * maxDegree - 1`. Outputs the colour of every spring.
+    '''
+    colours = np.full(len(ends), -1, dtype=np.int64)
+    priorities = np.random.default_rng(seed).permutation(len(ends))
+    uncoloured = np.arange(len(ends))
+    colour = 0
+    while len(uncoloured) != 0:
+        candidates = uncoloured
+        taken = np.zeros(pointCount, dtype=bool)
+        while len(candidates) != 0:
+            lowest = np.full(pointCount, len(ends))
+            np.minimum.at(lowest, ends[candidates].ravel(), np.repeat(priorities[candidates], 2))
+            chosen = candidates[(lowest[ends[candidates]] == priorities[candidates, None]).all(axis=1)]
+            colours[chosen] = colour
+            taken[ends[chosen].ravel()] = True
+            candidates = candidates[~taken[ends[candidates]].any(axis=1)]
+        uncoloured = uncoloured[colours[uncoloured] == -1]
+        colour += 1
+    return colours
+
+def colourBatches(colours): # springs grouped by colour
+    '''
+    ## colourBatches()
+    Outputs one array of spring indices per colour, in colour order.
+    '''
+    order = np.argsort(colours, kind="stable")
+    return np.split(order, np.cumsum(np.bincount(colours))[:-1]) if len(colours) != 0 else []
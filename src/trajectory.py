@@ -0,0 +1,241 @@
+###### IMPORT ######
+
+import numpy as np
+from scene import writeBlock, readBlockHeader, blockArrays, sceneHeader, sceneToArrays
+
+
+###### CONSTANTS ######
+
+MAGIC = b"BRIDGT\x00\x01" # first 8 bytes of a trajectory file, the last byte is the format version
+COMPRESSIONS = [
+    "none", # float64 positions and stress, lossless
+    "quantized", # positions rounded to QUANTUM as int32, stress as float16
+    "delta" # quantized, and between keyframes only the change since the previous frame, as int16 when it fits
+]
+QUANTUM = 1 / 64 # px, position resolution of the quantized formats
+CHUNKFRAMES = 60 # frames buffered in memory before they are appended to the file as one chunk
+KEYFRAMEINTERVAL = 30 # a delta recording stores full positions at least this often, so a seek decodes at most this many frames
+MISSING = np.iinfo(np.int32).min # quantized value of a non-finite position
+QUANTIZEDLIMIT = np.iinfo(np.int32).max - 1 # quantized positions are clipped to this
+
+###### FUNCTIONS ######
+
+def quantize(positions, quantum): # px -> int32 steps of quantum
+    '''
+    ## quantize()
+    Rounds positions to multiples of `quantum` and outputs them as int32 step counts. Non-finite positions become `MISSING` and far away ones are clipped.
+    '''
+    steps = np.rint(np.clip(np.nan_to_num(positions / quantum), -QUANTIZEDLIMIT, QUANTIZEDLIMIT)).astype(np.int32)
+    steps[~np.isfinite(positions)] = MISSING
+    return steps
+
+def dequantize(steps, quantum): # inverse of quantize()
+    positions = steps * quantum
+    positions[steps == MISSING] = np.nan
+    return positions
+
+def indexType(count): # smallest index dtype, like the binary scene format
+    return "<i4" if count < 2**31 else "<i8"
+
+###### RECORDER ######
+
+class TrajectoryRecorder: # streams frames of a running world to a file
+    '''
+    ## TrajectoryRecorder
+    Appends the state of a world after every `write()` to a trajectory file: point positions, spring stress, thing positions and the springs that snapped since the previous frame (with their new ends). The file starts with the starting scene as one `writeBlock()` (so it can be replayed on its own) and frames follow in chunks of `chunkFrames`, each chunk one more block appended to the end of the file. Nothing already written is ever rewritten, so a recording cut off mid-run is readable up to its last complete chunk. See `COMPRESSIONS` for the storage formats.
+    '''
+
+    def __init__(self, path, sim, compression="delta", quantum=QUANTUM, chunkFrames=CHUNKFRAMES, keyframeInterval=KEYFRAMEINTERVAL):
+        if compression not in COMPRESSIONS:
+            raise ValueError("unknown compression " + repr(compression) + ", expected one of " + str(COMPRESSIONS))
+        self.path = path
+        self.compression = compression
+        self.quantum = quantum
+        self.chunkFrames = chunkFrames
+        self.keyframeInterval = keyframeInterval
+        self.frames = [] # frame numbers of the chunk being buffered
+        self.keyframes = []
+        self.arrays = {} # "<frame in chunk>.<name>" -> array
+        self.previousEnds = sim.springEnds.copy()
+        self.previousSteps = None # quantized positions of the last frame, for delta
+        self.sinceKeyframe = 0
+        self.written = 0 # frames appended to the file so far
+
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        writeBlock(self.file, dict(sceneHeader(sim), compression=compression, quantum=quantum), sceneToArrays(sim))
+        self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+        return False
+
+    def write(self, sim): # records the current frame
+        '''
+        ## write()
+        Records the current state of `sim` as the next frame. The chunk is appended to the file once `chunkFrames` frames are buffered.
+        '''
+        local = str(len(self.frames)) + "."
+        ends = sim.springEnds
+        shared = min(len(ends), len(self.previousEnds))
+        snapped = np.concatenate([np.nonzero((ends[:shared] != self.previousEnds[:shared]).any(axis=1))[0], np.arange(shared, len(ends))])
+        self.previousEnds = ends.copy()
+        self.arrays[local + "snapped"] = snapped.astype(indexType(len(ends)))
+        self.arrays[local + "snappedEnds"] = ends[snapped].astype(indexType(len(sim.positions)))
+        self.arrays[local + "things"] = np.reshape([thing[0:2] for thing in sim.things], (-1, 2)).astype("<f8")
+        stress = sim.springStress()
+        self.arrays[local + "stress"] = stress.astype("<f8" if self.compression == "none" else "<f2")
+
+        keyframe = True
+        if self.compression == "none":
+            self.arrays[local + "positions"] = sim.positions.astype("<f8")
+        else:
+            steps = quantize(sim.positions, self.quantum)
+            if self.compression == "delta" and len(self.frames) != 0 and self.sinceKeyframe < self.keyframeInterval and (steps != MISSING).all():
+                previous = self.previousSteps[:len(steps)]
+                delta = steps[:len(previous)].astype(np.int64) - previous
+                if np.abs(delta).max(initial=0) <= QUANTIZEDLIMIT:
+                    keyframe = False
+                    small = np.abs(delta).max(initial=0) <= np.iinfo(np.int16).max
+                    self.arrays[local + "delta"] = delta.astype("<i2" if small else "<i4")
+                    self.arrays[local + "added"] = steps[len(previous):] # points that appeared this frame, ex: from a breakage
+            if keyframe:
+                self.arrays[local + "positions"] = steps.astype("<i4")
+            self.previousSteps = steps
+        self.sinceKeyframe = 0 if keyframe else self.sinceKeyframe + 1
+
+        self.frames.append(int(sim.frame))
+        self.keyframes.append(keyframe)
+        if len(self.frames) >= self.chunkFrames:
+            self.flush()
+
+    def flush(self): # appends the buffered frames as one chunk
+        '''
+        ## flush()
+        Appends the buffered frames to the file as one chunk block.
+        '''
+        if len(self.frames) == 0:
+            return
+        writeBlock(self.file, {"frames": self.frames, "keyframes": self.keyframes}, self.arrays)
+        self.file.flush()
+        self.written += len(self.frames)
+        self.frames, self.keyframes, self.arrays = [], [], {}
+
+    def close(self):
+        '''
+        ## close()
+        Appends whatever is still buffered and closes the file.
+        '''
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+###### REPLAY ######
+
+class Trajectory: # random access to a recorded run
+    '''
+    ## Trajectory
+    Opens a file written by `TrajectoryRecorder`. The file is memory-mapped and only the chunk headers are read up front, so any frame can be fetched with `frame()` without simulating anything and without reading the frames around it (apart from at most `KEYFRAMEINTERVAL` deltas back to the last keyframe). Playing forward reuses the last decoded positions and spring ends, so each frame only decodes its own changes.
+    '''
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(path + " is not a trajectory file")
+            block = readBlockHeader(file)
+            if block is None:
+                raise ValueError(path + " is truncated")
+            self.header, sceneStart = block
+            chunks = []
+            while True:
+                block = readBlockHeader(file)
+                if block is None: # end of the file, or a chunk that was cut off
+                    break
+                chunks.append(block)
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        self.scene = blockArrays(buffer, self.header, sceneStart) # the world when recording started
+        self.compression = self.header["compression"]
+        self.quantum = self.header["quantum"]
+
+        self.frameNumbers = []
+        self.entries = [] # per frame, name -> array view
+        keyframes = []
+        for header, dataStart in chunks:
+            arrays = blockArrays(buffer, header, dataStart)
+            frameArrays = [{} for frame in header["frames"]]
+            for name, array in arrays.items():
+                local, field = name.split(".", 1)
+                frameArrays[int(local)][field] = array
+            self.frameNumbers += header["frames"]
+            keyframes += header["keyframes"]
+            self.entries += frameArrays
+        self.keyframeOf = np.maximum.accumulate(np.where(keyframes, np.arange(len(keyframes)), 0)) if len(keyframes) != 0 else np.zeros(0, dtype=np.int64) # nearest keyframe at or before every frame
+        self.breakFrames = np.array([index for index, entry in enumerate(self.entries) if len(entry["snapped"]) != 0], dtype=np.int64)
+        self.decoded = None # (index, quantized or float positions) of the last decoded frame
+        self.endsCache = (-1, np.array(self.scene["springEnds"], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def positions(self, index): # point positions of one frame
+        '''
+        ## positions()
+        Outputs the (N, 2) point positions of frame `index`, decoding forward from the nearest keyframe for delta recordings.
+        '''
+        entry = self.entries[index]
+        if self.compression == "none":
+            return np.array(entry["positions"], dtype=float)
+        if self.decoded is not None and self.decoded[0] == index:
+            steps = self.decoded[1]
+        elif "positions" in entry:
+            steps = np.array(entry["positions"], dtype=np.int64)
+        else:
+            start = self.keyframeOf[index]
+            if self.decoded is not None and start <= self.decoded[0] < index: # playing forward
+                start, steps = self.decoded
+            else:
+                steps = np.array(self.entries[start]["positions"], dtype=np.int64)
+            for frame in range(start + 1, index + 1):
+                delta = self.entries[frame]
+                steps = np.concatenate([steps[:len(delta["delta"])] + delta["delta"], delta["added"]])
+        self.decoded = (index, steps)
+        return dequantize(steps, self.quantum)
+
+    def springEnds(self, index): # spring ends of one frame, after its breakages
+        '''
+        ## springEnds()
+        Outputs the (M, 2) spring ends at frame `index` by replaying the recorded breakages onto the starting ends. Only frames with breakages are visited.
+        '''
+        cachedIndex, ends = self.endsCache
+        if index < cachedIndex:
+            cachedIndex, ends = -1, np.array(self.scene["springEnds"], dtype=np.int64)
+        first, last = np.searchsorted(self.breakFrames, [cachedIndex + 1, index + 1])
+        if last > first and cachedIndex != -1:
+            ends = ends.copy() # the cached array may have been handed out
+        for frame in self.breakFrames[first:last].tolist():
+            entry = self.entries[frame]
+            snapped = np.asarray(entry["snapped"], dtype=np.int64)
+            if len(snapped) != 0 and snapped.max() >= len(ends):
+                ends = np.concatenate([ends, np.zeros((snapped.max() + 1 - len(ends), 2), dtype=np.int64)])
+            ends[snapped] = entry["snappedEnds"]
+        self.endsCache = (index, ends)
+        return ends
+
+    def frame(self, index): # one recorded frame, like Simulation.snapshot()
+        '''
+        ## frame()
+        Outputs frame `index` as a dictionary: the simulation frame number, point positions, spring ends, spring stress, thing positions and the springs that snapped on that frame.
+        '''
+        entry = self.entries[index]
+        return {
+            "frame": self.frameNumbers[index],
+            "positions": self.positions(index),
+            "springEnds": self.springEnds(index),
+            "stress": np.array(entry["stress"], dtype=float),
+            "things": np.array(entry["things"], dtype=float),
+            "snapped": np.array(entry["snapped"], dtype=np.int64),
+        }
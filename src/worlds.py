@@ -0,0 +1,170 @@
+###### IMPORT ######
+
+import numpy as np
+import physics
+import contact
+from simulation import MATERIALS
+from spatial import SpatialGrid
+
+
+###### FUNCTIONS ######
+
+def perWorld(value, count, width=None): # broadcasts a setting to one value per world
+    '''
+    ## perWorld()
+    Outputs `value` as an array with one entry per world (shape `(count,)`, or `(count, width)` for vectors), so a setting can be given once for every world or once per world.
+    '''
+    shape = (count,) if width is None else (count, width)
+    return np.broadcast_to(np.asarray(value, dtype=float), shape).copy()
+
+def batchSpringForces(positions, ends, restLengths, stiffness): # springForces() over K worlds at once
+    '''
+    ## batchSpringForces()
+    Computes the net spring force on every point of K worlds that share one topology. `positions` is (K, N, 2) and `stiffness` holds one value per world. The springs of all worlds are scattered with a single `np.bincount` by offsetting every world's point indices by `N`.
+    '''
+    worlds, count = positions.shape[0], positions.shape[1]
+    forces = np.zeros((worlds, count, 2))
+    if len(ends) == 0:
+        return forces
+
+    delta = positions[:, ends[:, 1]] - positions[:, ends[:, 0]] # (K, M, 2)
+    lengths = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+    safeLengths = np.where(lengths > 0, lengths, 1)
+    direction = delta / safeLengths[..., None] * (lengths > 0)[..., None]
+    springVectors = direction * (stiffness[:, None] * (restLengths - lengths))[..., None]
+
+    offsets = (np.arange(worlds) * count)[:, None]
+    first = (ends[:, 0] + offsets).ravel()
+    second = (ends[:, 1] + offsets).ravel()
+    for axis in range(2):
+        vectors = springVectors[..., axis].ravel()
+        forces[..., axis] = (np.bincount(second, vectors, worlds * count) - np.bincount(first, vectors, worlds * count)).reshape(worlds, count)
+    return forces
+
+###### WORLD BATCH ######
+
+class WorldBatch: # K copies of one structure, stepped together
+    '''
+    ## WorldBatch
+    K independent copies of one world that share its topology (points, springs, things) but can each have their own `stiffness`, `damping`, `gravity` and car mass. The state is stored as (K, N, 2) arrays and every substep runs the same spring force / Verlet update as `physics.stepPoints()` for all worlds in one vectorized pass, which amortizes the Python overhead of small worlds across a parameter sweep. Ground lines and swept collisions (`Simulation.sweepCollisions()`) are not batched; every world only has the flat `groundLevel` floor.
+    '''
+
+    def __init__(self, template, count, stiffness=None, damping=None, gravity=None, thingMass=None):
+        self.count = count
+        self.simSpeed = template.simSpeed
+        self.dt = template.dt
+        self.closeLimit = template.closeLimit
+        self.groundLevel = template.groundLevel
+        self.substeps = template.substeps
+
+        self.stiffness = perWorld(template.stiffness if stiffness is None else stiffness, count)
+        self.damping = perWorld(template.damping if damping is None else damping, count)
+        self.gravity = perWorld(template.gravity if gravity is None else gravity, count, 2)
+
+        self.positions = np.repeat(template.positions[None], count, axis=0)
+        self.velocities = np.repeat(template.velocities[None], count, axis=0)
+        self.baseMasses = template.baseMasses.copy()
+        self.masses = np.repeat(self.baseMasses[None], count, axis=0)
+        self.fixed = template.fixed.copy()
+
+        self.springEnds = template.springEnds.copy()
+        self.restLengths = template.restLengths.copy()
+        self.springMaterials = template.springMaterials.copy()
+        self.roadSprings = np.nonzero(self.springMaterials == MATERIALS.index("road"))[0]
+
+        things = template.things
+        self.thingPositions = np.repeat(np.array([thing[0:2] for thing in things], dtype=float).reshape(1, -1, 2), count, axis=0)
+        self.thingVelocities = np.repeat(np.array([thing[2:4] for thing in things], dtype=float).reshape(1, -1, 2), count, axis=0)
+        self.thingMasses = np.repeat(np.array([thing[4] for thing in things], dtype=float).reshape(1, -1), count, axis=0)
+        if thingMass is not None:
+            self.thingMasses[:] = perWorld(thingMass, count)[:, None]
+        self.thingRadii = np.array([thing[5] for thing in things], dtype=float)
+        self.thingAccelerations = np.array([thing[6] for thing in things], dtype=float).reshape(-1, 2)
+
+        self.grid = SpatialGrid(np.zeros((0, 2)), self.closeLimit + 5)
+
+    def closePairs(self): # close pressure candidates of every world from one grid
+        '''
+        ## closePairs()
+        Outputs the close pressure candidate pairs of all worlds as indices into the flattened (K * N) point array. The worlds are laid side by side in x, far enough apart that no cell holds points of two worlds, so one `SpatialGrid` serves them all.
+        '''
+        worlds, count = self.positions.shape[0], self.positions.shape[1]
+        shifted = self.positions.reshape(-1, 2).copy()
+        finite = np.isfinite(shifted).all(axis=1)
+        if not finite.any():
+            return shifted, np.zeros((0, 2), dtype=np.int64)
+        span = np.ptp(shifted[finite, 0]) + 4 * self.grid.cellSize
+        shifted[:, 0] += np.repeat(np.arange(worlds) * span, count)
+        self.grid.rebuild(np.where(finite[:, None], shifted, 0))
+        pairs = self.grid.neighbourPairs(self.closeLimit + 5)
+        return shifted, pairs[finite[pairs].all(axis=1)]
+
+    def transformThings(self): # transformThings() of every world at once
+        '''
+        ## transformThings()
+        Moves the things of every world and loads the road springs they rest on, like `Simulation.transformThings()`, with the exact contact test vectorized over worlds and road springs.
+        '''
+        self.masses[:] = self.baseMasses
+        if self.thingPositions.shape[1] == 0:
+            return
+
+        acceleration = np.broadcast_to(self.thingAccelerations, self.thingPositions.shape).copy()
+        radii = self.thingRadii[None, :]
+        grounded = self.thingPositions[..., 1] >= self.groundLevel - radii
+        self.thingPositions[..., 1] = np.where(grounded, self.groundLevel - radii, self.thingPositions[..., 1])
+        self.thingVelocities[..., 1] = np.where(grounded, -self.thingVelocities[..., 1], self.thingVelocities[..., 1])
+
+        roads = self.springEnds[self.roadSprings]
+        if len(roads) != 0:
+            worlds, count = self.positions.shape[0], self.positions.shape[1]
+            starts = self.positions[:, roads[:, 0]] # (K, R, 2)
+            ends = self.positions[:, roads[:, 1]]
+            offsets = (np.arange(worlds) * count)[:, None]
+            for thing in range(self.thingPositions.shape[1]):
+                t, normals, depths = contact.circleSegmentContacts(self.thingPositions[:, thing][:, None, :], self.thingRadii[thing], starts, ends)
+                push = contact.contactPush(normals, depths) # (K, 2)
+                self.thingPositions[:, thing] += push
+                acceleration[:, thing] += push
+
+                total = depths.sum(axis=1, keepdims=True)
+                shares = self.thingMasses[:, thing][:, None] * depths / np.where(total > 0, total, 1)
+                loads = np.bincount((roads[:, 0] + offsets).ravel(), (shares * (1 - t)).ravel(), worlds * count) + np.bincount((roads[:, 1] + offsets).ravel(), (shares * t).ravel(), worlds * count)
+                self.masses += loads.reshape(worlds, count)
+
+        acceleration *= self.simSpeed
+        self.thingVelocities += acceleration
+        self.thingVelocities *= self.damping[:, None, None]
+        self.thingPositions += self.thingVelocities * self.dt + 0.5 * acceleration * self.dt**2 # VERLET integration
+
+    def step(self, n=1): # advances every world by n substeps
+        '''
+        ## step()
+        Advances every world by `n` substeps: things, then spring forces, close pressure, ground bounce and Verlet integration for all K worlds in one pass.
+        '''
+        worlds, count = self.positions.shape[0], self.positions.shape[1]
+        for substep in range(n):
+            self.transformThings()
+            acceleration = batchSpringForces(self.positions, self.springEnds, self.restLengths, self.stiffness) / self.masses[..., None]
+            shifted, pairs = self.closePairs()
+            acceleration += physics.closePressure(shifted, pairs, self.closeLimit).reshape(worlds, count, 2)
+            acceleration += self.gravity[:, None, :]
+
+            grounded = self.positions[..., 1] >= self.groundLevel # ground bounce
+            self.positions[..., 1] = np.where(grounded, self.groundLevel, self.positions[..., 1])
+            self.velocities[..., 1] = np.where(grounded, -self.velocities[..., 1], self.velocities[..., 1])
+
+            acceleration *= self.simSpeed
+            self.velocities += acceleration
+            self.velocities *= self.damping[:, None, None]
+
+            movement = self.velocities * self.dt + 0.5 * acceleration * self.dt**2 # VERLET integration
+            movement[:, self.fixed] = 0
+            self.positions += movement
+
+    def springStress(self):
+        '''
+        ## springStress()
+        Outputs how far every spring of every world is stretched or compressed away from its rest length, as a (K, M) array.
+        '''
+        delta = self.positions[:, self.springEnds[:, 1]] - self.positions[:, self.springEnds[:, 0]]
+        return np.abs(np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2) - self.restLengths)
@@ -0,0 +1,57 @@
+###### IMPORT ######
+
+import os
+import sys
+from math import ceil, log
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from adaptive import SubstepController, CFL
+
+
+###### HELPERS ######
+
+def freshBridge(stiffness=60): # the default bridge with its car, not stepped yet
+    sim = Simulation(stiffness=stiffness)
+    sim.initializePoints()
+    sim.createSprings()
+    sim.createThings()
+    return sim
+
+###### TESTS ######
+
+@pytest.mark.parametrize("stiffness, substeps", [(60, 7), (6000, 70)])
+def testStabilityLimitPicksSubsteps(stiffness, substeps):
+    sim = freshBridge(stiffness)
+    sim.adaptive = SubstepController(sim)
+    sim.stepFrame()
+    stats = sim.adaptive.stats
+    assert stats["limit"] == "stability"
+    assert stats["substeps"] == substeps
+    assert stats["substeps"] == ceil(sim.adaptive.frameTime / stats["stableStep"])
+
+def testCflLimitPicksSubsteps():
+    sim = freshBridge()
+    sim.velocities[~sim.fixed] = [1000, 0] # fast enough that CFL of the 100 px trusses asks for more substeps than stability
+    controller = SubstepController(sim)
+    controller.begin(sim)
+    stats = controller.stats
+    assert stats["limit"] == "cfl"
+    assert stats["cflStep"] == pytest.approx(CFL * sim.restLengths.min() / 1000)
+    assert stats["substeps"] == ceil(controller.frameTime / stats["cflStep"])
+
+def testFrameTimeIsPreserved():
+    sim = freshBridge(6000)
+    frameTime, acceleration, dampingRate = sim.dt * sim.substeps, sim.simSpeed / sim.dt, log(sim.damping) / sim.dt
+    sim.adaptive = SubstepController(sim)
+    for _ in range(5):
+        sim.stepFrame()
+        assert sim.substeps != 10
+        assert sim.dt * sim.substeps == pytest.approx(frameTime)
+        assert sim.simSpeed / sim.dt == pytest.approx(acceleration)
+        assert log(sim.damping) / sim.dt == pytest.approx(dampingRate)
+    assert np.isfinite(sim.positions).all()
+    sim.adaptive.detach(sim)
+    assert (sim.dt, sim.substeps) == (0.1, 10)
@@ -0,0 +1,129 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import getIntersectionPoint
+from intersection import batchIntersections, allPairIntersections, boxPairs, gridPairs
+
+
+###### HELPERS ######
+
+def scalarResults(segments1, segments2): # the reference, one getIntersectionPoint() call per pair
+    return [getIntersectionPoint(line1, line2) for line1, line2 in zip(segments1.tolist(), segments2.tolist())]
+
+def assertMatchesScalar(segments1, segments2):
+    hits, points, t, u = batchIntersections(segments1, segments2)
+    for index, expected in enumerate(scalarResults(segments1, segments2)):
+        assert hits[index] == (expected is not None)
+        if expected is not None:
+            assert points[index].tolist() == pytest.approx(list(expected), abs=1e-9)
+
+###### TESTS ######
+
+def testRandomPairsMatchScalar():
+    generator = np.random.default_rng(0)
+    segments1 = generator.uniform(0, 100, (5000, 2, 2))
+    segments2 = generator.uniform(0, 100, (5000, 2, 2))
+    assertMatchesScalar(segments1, segments2)
+
+def testIntegerGridPairsMatchScalar(): # lots of shared coordinates, so touching and collinear cases come up by chance
+    generator = np.random.default_rng(1)
+    segments1 = generator.integers(0, 4, (5000, 2, 2)).astype(float)
+    segments2 = generator.integers(0, 4, (5000, 2, 2)).astype(float)
+    assertMatchesScalar(segments1, segments2)
+
+def testAllPairsMatchScalar():
+    generator = np.random.default_rng(2)
+    segments1 = generator.uniform(0, 100, (40, 2, 2))
+    segments2 = generator.uniform(0, 100, (60, 2, 2))
+    hits, points, t, u = allPairIntersections(segments1, segments2)
+    assert hits.shape == (40, 60) and points.shape == (40, 60, 2)
+    for row in range(40):
+        for column in range(60):
+            expected = getIntersectionPoint(segments1[row].tolist(), segments2[column].tolist())
+            assert hits[row, column] == (expected is not None)
+            if expected is not None:
+                assert points[row, column].tolist() == pytest.approx(list(expected), abs=1e-9)
+
+def testParametersLocateThePointOnBothSegments():
+    generator = np.random.default_rng(3)
+    segments1 = generator.uniform(0, 100, (1000, 2, 2))
+    segments2 = generator.uniform(0, 100, (1000, 2, 2))
+    hits, points, t, u = batchIntersections(segments1, segments2)
+    alongFirst = segments1[:, 0] + t[:, None] * (segments1[:, 1] - segments1[:, 0])
+    alongSecond = segments2[:, 0] + u[:, None] * (segments2[:, 1] - segments2[:, 0])
+    assert np.allclose(alongFirst[hits], points[hits])
+    assert np.allclose(alongSecond[hits], points[hits])
+    assert ((t[hits] >= 0) & (t[hits] <= 1) & (u[hits] >= 0) & (u[hits] <= 1)).all()
+
+def testParallelSegmentsMiss():
+    hits, points, t, u = batchIntersections([[[0, 0], [10, 0]]], [[[0, 5], [10, 5]]])
+    assert not hits[0]
+    assert np.isnan(t[0]) and np.isnan(u[0]) and np.isnan(points[0]).all()
+
+def testCollinearOverlapMissesLikeScalar(): # an overlap has no single intersection point, the scalar version calls it parallel
+    segments1 = np.array([[[0, 0], [10, 0]]], dtype=float)
+    segments2 = np.array([[[5, 0], [15, 0]]], dtype=float)
+    assert getIntersectionPoint(segments1[0].tolist(), segments2[0].tolist()) is None
+    assert not batchIntersections(segments1, segments2)[0][0]
+
+@pytest.mark.parametrize("other, expected, expectedT, expectedU", [
+    ([[10, 0], [10, 10]], [10, 0], 1, 0), # end meets start
+    ([[10, 10], [10, 0]], [10, 0], 1, 1), # end meets end
+    ([[5, 0], [5, 10]], [5, 0], 0.5, 0), # T junction
+    ([[0, -5], [0, 5]], [0, 0], 0, 0.5), # start on the middle of the other one
+])
+def testEndpointTouchingHits(other, expected, expectedT, expectedU):
+    hits, points, t, u = batchIntersections([[[0, 0], [10, 0]]], [other])
+    assert hits[0]
+    assert points[0].tolist() == pytest.approx(expected)
+    assert t[0] == pytest.approx(expectedT) and u[0] == pytest.approx(expectedU)
+    assert getIntersectionPoint([[0, 0], [10, 0]], other) == pytest.approx(tuple(expected))
+
+def testJustMissingTheEndpointMisses():
+    hits = batchIntersections([[[0, 0], [10, 0]]], [[[10.000001, -5], [10.000001, 5]]])[0]
+    assert not hits[0]
+    assert getIntersectionPoint([[0, 0], [10, 0]], [[10.000001, -5], [10.000001, 5]]) is None
+
+def testZeroLengthSegmentsMiss():
+    hits = batchIntersections([[[3, 0], [3, 0]], [[0, 0], [10, 0]]], [[[0, 0], [10, 0]], [[4, 4], [4, 4]]])[0]
+    assert not hits.any()
+
+def testScalarVersionAlwaysReturnsNoneOnMiss():
+    assert getIntersectionPoint([[0, 0], [10, 0]], [[0, 5], [10, 5]]) is None # parallel
+    assert getIntersectionPoint([[0, 0], [10, 0]], [[20, -5], [20, 5]]) is None # lines cross outside the segments
+
+def testEmptyInputs():
+    hits, points, t, u = batchIntersections(np.zeros((0, 2, 2)), np.zeros((0, 2, 2)))
+    assert hits.shape == (0,) and points.shape == (0, 2)
+    hits, points, t, u = allPairIntersections(np.zeros((0, 2, 2)), np.ones((3, 2, 2)))
+    assert hits.shape == (0, 3)
+
+def testBoxPairsMatchesBruteForce():
+    generator = np.random.default_rng(4)
+    lows1 = generator.uniform(0, 100, (300, 2))
+    highs1 = lows1 + generator.uniform(0, 10, (300, 2))
+    lows2 = generator.uniform(0, 100, (200, 2))
+    highs2 = lows2 + generator.uniform(0, 30, (200, 2))
+    lows1[7] = np.nan # a blown up point overlaps nothing
+    expected = np.argwhere(((lows1[:, None] <= highs2[None]) & (lows2[None] <= highs1[:, None])).all(axis=2))
+    pairs = boxPairs(lows1, highs1, lows2, highs2)
+    assert sorted(map(tuple, pairs.tolist())) == sorted(map(tuple, expected.tolist()))
+
+def testGridPairsMatchesBruteForce():
+    generator = np.random.default_rng(5)
+    lows1 = generator.uniform(0, 100, (300, 2))
+    highs1 = lows1 + generator.uniform(0, 10, (300, 2))
+    highs1[:5] += 60 # bigger than any box of the second set, these go through boxPairs()
+    lows2 = generator.uniform(0, 100, (200, 2))
+    highs2 = lows2 + generator.uniform(0, 8, (200, 2))
+    lows1[7] = np.nan
+    highs2[3] = np.inf
+    expected = np.argwhere(((lows1[:, None] <= highs2[None]) & (lows2[None] <= highs1[:, None])).all(axis=2))
+    expected = expected[expected[:, 1] != 3]
+    pairs = gridPairs(lows1, highs1, lows2, highs2)
+    assert sorted(map(tuple, pairs.tolist())) == sorted(map(tuple, expected.tolist()))
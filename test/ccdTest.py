@@ -0,0 +1,47 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import ccd
+from simulation import Simulation, MATERIALS
+
+
+###### HELPERS ######
+
+def countSweepHits(monkeypatch): # wraps ccd.sweep() to count the crossings it reports
+    hits = []
+    sweep = ccd.sweep
+    def counted(*arguments):
+        result = sweep(*arguments)
+        hits.append(len(result[0]))
+        return result
+    monkeypatch.setattr(ccd, "sweep", counted)
+    return hits
+
+###### TESTS ######
+
+def testIntactLatticeHasNoSweepHits(monkeypatch):
+    sim = Simulation(resolution=4)
+    sim.initializePoints("grid")
+    sim.createSprings()
+    sim.fixed[sim.positions[:, 1] == sim.positions[:, 1].min()] = True # hangs from its top row
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses}
+    assert (sim.springMaterials == MATERIALS.index("road")).any()
+    hits = countSweepHits(monkeypatch)
+    for _ in range(20):
+        sim.stepFrame()
+    assert len(hits) == 20 * sim.substeps
+    assert sum(hits) == 0
+
+def testFastPointStopsOnAnotherIslandsRoad():
+    sim = Simulation(substeps=1)
+    sim.addPoint(500, 400, True)
+    sim.addPoint(700, 400, True)
+    sim.addSpring(0, 1, material="road")
+    point = sim.addPoint(600, 300, velocity=(0, 400)) # crosses the road in one substep
+    for _ in range(5):
+        sim.stepFrame()
+    assert sim.positions[point, 1] < 400
@@ -0,0 +1,39 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from topology import colourSprings, colourBatches
+
+
+###### HELPERS ######
+
+def assertNoSharedPoint(ends, colours): # the invariant the coloured sweep's threads rely on
+    assert (colours >= 0).all()
+    for batch in colourBatches(colours):
+        points = ends[batch].ravel()
+        assert len(np.unique(points)) == len(points)
+
+###### TESTS ######
+
+def testColoursShareNoPoint():
+    generator = np.random.default_rng(0)
+    ends = generator.integers(0, 300, (3000, 2))
+    ends = ends[ends[:, 0] != ends[:, 1]]
+    colours = colourSprings(ends, 300)
+    assertNoSharedPoint(ends, colours)
+    assert colours.max() + 1 <= 2 * np.bincount(ends.ravel()).max() - 1
+
+def testColoursStayValidThroughBreakage():
+    sim = Simulation(resolution=6)
+    sim.initializePoints("grid")
+    sim.createSprings()
+    colours = sim.springColours()
+    assertNoSharedPoint(sim.springEnds, colours)
+    sim.fractures.push(np.random.default_rng(0).choice(len(sim.springEnds), len(sim.springEnds) // 3, replace=False))
+    assert len(sim.breakSprings()) != 0
+    assert sim.springColours() is colours # kept, not recomputed
+    assertNoSharedPoint(sim.springEnds, colours)
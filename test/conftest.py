@@ -0,0 +1 @@
+collect_ignore = ["intersectionTest.py"] # the interactive pygame demo, not a test suite
@@ -0,0 +1,56 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from topology import SpringAdjacency
+
+
+###### HELPERS ######
+
+def shatteredGrid(frames=5): # a grid lattice half torn apart by a hard shake
+    sim = Simulation(resolution=8)
+    sim.initializePoints("grid")
+    sim.createSprings()
+    sim.fixed[sim.positions[:, 1] == sim.positions[:, 1].min()] = True
+    sim.breakStresses = {material: 5 for material in sim.breakStresses}
+    sim.ccd = False
+    sim.sleep = False
+    free = ~sim.fixed
+    sim.velocities[free] = np.random.default_rng(0).normal(0, 20, (free.sum(), 2))
+    snapped = []
+    breakSprings = sim.breakSprings
+    def recordBreaks(active=None): # every spring step() snaps
+        snapped.append(breakSprings(active))
+        return snapped[-1]
+    sim.breakSprings = recordBreaks
+    for frame in range(frames):
+        sim.stepFrame()
+    return sim, np.unique(np.concatenate(snapped))
+
+def sortedRows(adjacency): # toCSR() with every row ordered by spring index
+    offsets, neighbours, springIds = adjacency.toCSR()
+    rows = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    order = np.lexsort((springIds, rows))
+    return offsets, neighbours[order], springIds[order]
+
+###### TESTS ######
+
+def testPatchedAdjacencyMatchesRebuild():
+    sim, snapped = shatteredGrid()
+    assert 100 < len(snapped) < len(sim.springEnds) - 100 # intact and snapped springs side by side
+    patched = sortedRows(sim.adjacency)
+    rebuilt = sortedRows(SpringAdjacency(sim.springEnds, len(sim.positions)))
+    for ours, theirs in zip(patched, rebuilt):
+        assert np.array_equal(ours, theirs)
+
+def testNoOrphanOrSharedDebrisPoints():
+    sim, snapped = shatteredGrid()
+    degrees = np.bincount(sim.springEnds.ravel(), minlength=len(sim.positions))
+    assert (degrees > 0).all() # every copy made for a break is used
+    assert (sim.springEnds[:, 0] != sim.springEnds[:, 1]).all()
+    assert (degrees[sim.springEnds[snapped]] == 1).all() # snapped springs own both their ends
+    assert sim.points.count == len(sim.positions) == sim.adjacency.pointCount
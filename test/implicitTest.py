@@ -0,0 +1,64 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import physics
+import solvers
+
+
+###### HELPERS ######
+
+def randomTriplets(size, count, seed=0): # COO triplets with many entries landing on the same spot
+    generator = np.random.default_rng(seed)
+    return generator.integers(0, size, count), generator.integers(0, size, count), generator.normal(0, 1, count)
+
+def denseOf(rows, columns, values, size): # the same triplets summed into a dense matrix
+    dense = np.zeros((size, size))
+    np.add.at(dense, (rows, columns), values)
+    return dense
+
+###### TESTS ######
+
+def testCsrMultiplyMatchesDense():
+    rows, columns, values = randomTriplets(40, 300)
+    matrix = solvers.assembleCSR(rows, columns, values, 40)
+    dense = denseOf(rows, columns, values, 40)
+    vector = np.random.default_rng(1).normal(0, 1, 40)
+    assert np.allclose(solvers.csrMultiply(matrix, vector), dense @ vector, rtol=1e-12, atol=1e-12)
+    assert np.allclose(solvers.csrDiagonal(matrix), np.diag(dense), rtol=1e-12, atol=1e-12)
+    indptr, indices, data = matrix
+    assert indptr[-1] == len(indices) == len(data) == len(np.unique(rows * 40 + columns)) # duplicates were summed into single entries
+
+def testConjugateGradientMatchesSolve():
+    generator = np.random.default_rng(2)
+    basis = generator.normal(0, 1, (30, 30))
+    dense = basis @ basis.T + 30 * np.eye(30) # symmetric positive definite
+    dense[np.abs(dense) < 2] = 0 # sparse, and still SPD since the diagonal dominates what was dropped
+    dense = (dense + dense.T) / 2
+    assert (np.linalg.eigvalsh(dense) > 0).all()
+    rows, columns = np.nonzero(dense)
+    matrix = solvers.assembleCSR(rows, columns, dense[rows, columns], 30)
+    rightHandSide = generator.normal(0, 1, 30)
+    x, iterations = solvers.conjugateGradient(matrix, rightHandSide, tolerance=1e-12, maxIterations=200)
+    assert iterations < 200
+    assert np.allclose(x, np.linalg.solve(dense, rightHandSide), rtol=1e-9, atol=1e-10)
+
+def testSpringJacobianMatchesFiniteDifferences(): # stretched springs, where the Jacobian is exact
+    generator = np.random.default_rng(3)
+    positions = generator.uniform(0, 100, (6, 2))
+    ends = np.array([[0, 1], [1, 2], [2, 3], [3, 0], [4, 5], [0, 2]])
+    delta = positions[ends[:, 1]] - positions[ends[:, 0]]
+    restLengths = 0.5 * np.sqrt((delta ** 2).sum(axis=1))
+    rows, columns, values = solvers.springJacobian(positions, ends, restLengths, 60, np.zeros(6, dtype=bool))
+    dense = denseOf(rows, columns, values, 12)
+    step = 1e-6
+    for column in range(12):
+        plus, minus = positions.copy(), positions.copy()
+        plus.flat[column] += step
+        minus.flat[column] -= step
+        difference = (physics.springForces(plus, ends, restLengths, 60) - physics.springForces(minus, ends, restLengths, 60)).ravel() / (2 * step)
+        assert np.allclose(dense[:, column], difference, rtol=1e-5, atol=1e-5)
+    assert np.allclose(dense, dense.T, rtol=1e-12, atol=1e-12)
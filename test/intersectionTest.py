@@ -48,12 +48,12 @@ def getIntersectionPoint(line1, line2):
     if 0 <= t <= 1 and 0 <= u <= 1:
         return (x, y)  # Return the intersection point
     else:
-        return None, None # No intersection within line segments (lines are not parallel, but they don't intersect in the specified segments)
+        return None # No intersection within line segments (lines are not parallel, but they don't intersect in the specified segments)
     
 ###### INITIALIZE ######
 
 def initialize():
-    global pointX1,pointX2,pointY1,pointY2,pointX3,pointX4,pointY3,pointY4,x5,y5
+    global pointX1,pointX2,pointY1,pointY2,pointX3,pointX4,pointY3,pointY4,intersection
     pointX1 = random.randint(340,940)
     pointY1 = random.randint(160,560)
     pointX2 = random.randint(340,940)
@@ -64,7 +64,7 @@ def initialize():
     pointX4 = random.randint(340,940)
     pointY4 = random.randint(160,560)
 
-    x5,y5 = getIntersectionPoint((pointX1,pointY1,pointX2,pointY2),(pointX3,pointY3,pointX4,pointY4))
+    intersection = getIntersectionPoint((pointX1,pointY1,pointX2,pointY2),(pointX3,pointY3,pointX4,pointY4))
 
 
 ###### MAINLOOP ######
@@ -72,11 +72,11 @@ running = True # Runs the game loop
 while running:
 
     initialize()
-    if (x5, y5) == (None, None):
+    if intersection is None:
         screen.fill((255,0,0))
     else:
         screen.fill((0,0,0))
-        pygame.draw.circle(screen, (255, 255, 255), (x5, y5), 5)
+        pygame.draw.circle(screen, (255, 255, 255), intersection, 5)
 
     pygame.draw.aaline(screen, (255, 255, 255), (pointX1, pointY1), (pointX2, pointY2), 5)
     pygame.draw.aaline(screen, (255, 255, 255), (pointX3, pointY3), (pointX4, pointY4), 5)
@@ -0,0 +1,44 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from islands import connectedComponents
+
+
+###### HELPERS ######
+
+def assertSamePartition(sim): # incremental labels against a full recompute
+    labels = sim.islands.labels
+    components, count = connectedComponents(len(sim.positions), sim.springEnds)
+    assert len(labels) == len(sim.positions)
+    assert len(np.unique(labels)) == count
+    assert len(np.unique(np.stack([labels, components], axis=1), axis=0)) == count # one island label per component and back
+    lowest = np.full(count, len(labels))
+    np.minimum.at(lowest, components, np.arange(len(labels)))
+    assert np.array_equal(labels, lowest[components]) # every label is its island's lowest point
+
+###### TESTS ######
+
+def testLabelsMatchRecomputeAfterAddsAndBreaks():
+    generator = np.random.default_rng(0)
+    sim = Simulation()
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses} # only the springs pushed below snap
+    for round in range(40):
+        count = len(sim.positions)
+        added = int(generator.integers(1, 20))
+        sim.addPoints(generator.uniform(0, 1000, (added, 2)))
+        total = count + added
+        springs = int(generator.integers(0, 30))
+        ends = generator.integers(0, total, (springs, 2))
+        ends = ends[ends[:, 0] != ends[:, 1]]
+        if len(ends) != 0:
+            sim.addSprings(ends, np.full(len(ends), 40.0), np.zeros(len(ends), dtype=np.int64))
+        if round % 2 == 1 and len(sim.springEnds) != 0:
+            sim.fractures.push(generator.choice(len(sim.springEnds), min(8, len(sim.springEnds)), replace=False))
+            sim.breakSprings()
+        assertSamePartition(sim)
+    assert sim.breakages > 0
@@ -0,0 +1,62 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import multirate
+import physics
+from simulation import Simulation
+
+
+###### HELPERS ######
+
+def mixedGrid(seed=0): # the grid lattice with masses spread over four decades and some fast points
+    sim = Simulation(resolution=5)
+    sim.initializePoints("grid")
+    sim.createSprings()
+    sim.fixed[sim.positions[:, 1] == sim.positions[:, 1].min()] = True
+    generator = np.random.default_rng(seed)
+    sim.baseMasses[:] = sim.masses[:] = 10.0 ** generator.uniform(-3, 1, len(sim.positions))
+    sim.velocities[:] = generator.normal(0, 5, sim.velocities.shape)
+    sim.velocities[sim.fixed] = 0
+    return sim
+
+def stepArguments(sim): # physics.stepPoints() arguments for the current state of sim, without the outputs
+    pairs = sim.grid.neighbourPairs(sim.closeLimit) if len(sim.positions) != 0 else np.zeros((0, 2), dtype=np.int64)
+    return [sim.positions.copy(), sim.velocities.copy(), sim.masses.copy(), sim.fixed.copy(), sim.springEnds, sim.restLengths, sim.gravity, sim.stiffness, sim.damping, sim.simSpeed, sim.dt, sim.closeLimit, sim.groundLevel, pairs]
+
+###### TESTS ######
+
+@pytest.mark.parametrize("maxLevel", [1, 3, 5])
+def testNeighbouringLevelsDifferByAtMostOne(maxLevel):
+    sim = mixedGrid()
+    levels = multirate.rateLevels(sim.velocities, sim.masses, sim.fixed, sim.springEnds, sim.restLengths, sim.stiffness, sim.simSpeed / sim.dt, sim.dt, maxLevel)
+    assert len(np.unique(levels)) > 1 # the masses really spread the points over several classes
+    assert levels.min() >= 0 and levels.max() <= maxLevel
+    assert (levels[sim.fixed] == 0).all()
+    free = ~sim.fixed[sim.springEnds].any(axis=1) # fixed points never move, so they can border any level
+    assert (np.abs(levels[sim.springEnds[free, 0]] - levels[sim.springEnds[free, 1]]) <= 1).all()
+
+def testLevelZeroIsStepPoints():
+    sim = mixedGrid()
+    sim.grid.rebuild(sim.positions)
+    arguments = stepArguments(sim)
+    expected = physics.stepPoints(*arguments)
+    result = multirate.stepPointsMultirate(*arguments, np.zeros(len(sim.positions), dtype=np.int64))
+    for ours, theirs in zip(result, expected):
+        assert np.array_equal(ours, theirs)
+
+def testOneSharedLevelIsHalfSteps(): # every point at level 1 takes the same two half steps as stepPoints()
+    sim = mixedGrid()
+    sim.grid.rebuild(sim.positions)
+    arguments = stepArguments(sim)
+    result = multirate.stepPointsMultirate(*arguments, np.ones(len(sim.positions), dtype=np.int64))
+    half = list(arguments)
+    half[8], half[9], half[10] = sim.damping ** 0.5, sim.simSpeed / 2, sim.dt / 2
+    for _ in range(2):
+        half[0], half[1] = physics.stepPoints(*half)
+    for ours, theirs in zip(result, half[:2]):
+        assert np.allclose(ours, theirs, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,75 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import physics
+from simulation import Simulation
+from topology import SpringAdjacency
+
+
+###### HELPERS ######
+
+def randomSprings(seed=0, count=60, springs=150): # scattered points joined by random springs, some of zero length
+    generator = np.random.default_rng(seed)
+    positions = generator.uniform(0, 200, (count, 2))
+    ends = generator.integers(0, count, (springs, 2))
+    ends = ends[ends[:, 0] != ends[:, 1]]
+    positions[ends[0, 1]] = positions[ends[0, 0]] # a zero-length spring pushes nothing
+    restLengths = generator.uniform(5, 80, len(ends))
+    return positions, ends, restLengths
+
+###### TESTS ######
+
+def testSpringForcesMatchesPerSpringLoop():
+    positions, ends, restLengths = randomSprings()
+    expected = np.zeros_like(positions)
+    for (first, second), restLength in zip(ends.tolist(), restLengths.tolist()):
+        delta = positions[second] - positions[first]
+        length = np.hypot(*delta)
+        if length == 0:
+            continue
+        force = delta / length * 3.0 * (restLength - length) # on the second end
+        expected[second] += force
+        expected[first] -= force
+    assert np.allclose(physics.springForces(positions, ends, restLengths, 3.0), expected, rtol=1e-12, atol=1e-9)
+
+def testPointSpringForceMatchesSpringForces():
+    positions, ends, restLengths = randomSprings(1)
+    forces = physics.springForces(positions, ends, restLengths, 3.0)
+    adjacency = SpringAdjacency(ends, len(positions))
+    for point in range(len(positions)):
+        force = physics.pointSpringForce(point, positions, adjacency.neighboursOf(point), adjacency.springsOf(point), restLengths, 3.0)
+        assert np.allclose(force, forces[point], rtol=1e-12, atol=1e-9)
+
+def testClosePressureMatchesPerPairLoop():
+    generator = np.random.default_rng(2)
+    positions = generator.uniform(0, 100, (80, 2))
+    closeLimit = 20
+    expected = np.zeros_like(positions)
+    for first, second in physics.allPairs(len(positions)).tolist():
+        delta = positions[second] - positions[first]
+        distance = np.hypot(*delta)
+        if 0 < distance < closeLimit + 5 and distance != closeLimit:
+            push = delta / distance * (1 / (distance - closeLimit) - 1/5)
+            expected[first] += push
+            expected[second] -= push
+    pressure = physics.closePressure(positions, physics.allPairs(len(positions)), closeLimit)
+    assert np.allclose(pressure, expected, rtol=1e-12, atol=1e-9)
+
+def testStepPointsGridMatchesAllPairs():
+    sim = Simulation()
+    sim.initializePoints()
+    sim.createSprings()
+    generator = np.random.default_rng(3)
+    sim.addPoints(generator.uniform(500, 580, (30, 2))) # a loose cluster, well inside each other's close pressure range
+    sim.velocities[:] = generator.normal(0, 2, sim.velocities.shape)
+    assert len(physics.closePressure(sim.positions, physics.allPairs(len(sim.positions)), sim.closeLimit).nonzero()[0]) > 0
+    arguments = [sim.positions, sim.velocities, sim.masses, sim.fixed, sim.springEnds, sim.restLengths, sim.gravity, sim.stiffness, sim.damping, sim.simSpeed, sim.dt, sim.closeLimit, sim.groundLevel]
+    gridPositions, gridVelocities = physics.stepPoints(*arguments)
+    allPositions, allVelocities = physics.stepPoints(*arguments, physics.allPairs(len(sim.positions)))
+    assert np.allclose(gridPositions, allPositions, rtol=1e-12, atol=1e-9)
+    assert np.allclose(gridVelocities, allVelocities, rtol=1e-12, atol=1e-9)
+    assert np.array_equal(gridPositions[sim.fixed], sim.positions[sim.fixed])
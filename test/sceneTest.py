@@ -0,0 +1,61 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from scene import saveScene, loadScene, CONSTANTS, SETTINGS
+
+
+###### HELPERS ######
+
+def terrainBridge(): # the default bridge with its car, some motion and two ground lines
+    sim = Simulation(stiffness=75, substeps=12)
+    sim.initializePoints()
+    sim.createSprings()
+    sim.createThings()
+    sim.addGroundLine(0, 500, 300, 540)
+    sim.addGroundLine(900, 520, 1280, 480, True)
+    sim.springMaterials[::3] = 1 # some road
+    sim.baseMasses[2] = 4
+    sim.solver = "xpbd" # every setting away from its default
+    sim.sweep = "coloured"
+    sim.iterations = 4
+    sim.compliance = {"wood": 5e-4, "road": 3e-3}
+    sim.breakStresses = {"wood": 7, "road": np.inf}
+    sim.sleep = False
+    sim.ccd = False
+    sim.multirate = 2
+    sim.stepFrame()
+    return sim
+
+###### TESTS ######
+
+@pytest.mark.parametrize("extension", [".json", ".scene"])
+def testSceneRoundTrip(tmp_path, extension):
+    sim = terrainBridge()
+    path = str(tmp_path / ("bridge" + extension))
+    saveScene(sim, path)
+    loaded = loadScene(path)
+    for name in ["positions", "velocities", "fixed", "baseMasses", "springEnds", "restLengths", "springMaterials", "groundLines", "groundFlipped", "groundNormals"]:
+        assert np.array_equal(getattr(loaded, name), getattr(sim, name)), name
+    assert loaded.things == sim.things
+    for name in CONSTANTS + SETTINGS:
+        assert getattr(loaded, name) == getattr(sim, name), name
+
+@pytest.mark.parametrize("extension", [".json", ".scene"])
+def testDuplicateSpringsMergeOnLoad(tmp_path, extension):
+    sim = Simulation()
+    sim.initializePoints()
+    sim.createSprings()
+    pairs = len(sim.springEnds)
+    sim.springs.extend(sim.springEnds[:, ::-1].copy(), sim.restLengths.copy(), sim.springMaterials.copy()) # every pair twice, like scenes written before the spring dedupe
+    path = str(tmp_path / ("doubled" + extension))
+    saveScene(sim, path)
+    loaded = loadScene(path)
+    assert len(loaded.springEnds) == pairs
+    assert loaded.addSpring(*loaded.springEnds[0]) == 0 # joining a joined pair again gives the existing spring
+    assert len(loaded.springEnds) == pairs
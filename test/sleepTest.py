@@ -0,0 +1,45 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+
+
+###### HELPERS ######
+
+def sleepingBridge(): # the default bridge, stepped until its islands fall asleep
+    sim = Simulation()
+    sim.initializePoints()
+    sim.createSprings()
+    sim.ccd = False
+    for _ in range(2000):
+        sim.stepFrame()
+        if not sim.islands.allAwake():
+            break
+    return sim
+
+###### TESTS ######
+
+def testFallingPointWakesSleepingBridge():
+    sim = sleepingBridge()
+    free = np.nonzero(~sim.fixed)[0]
+    top = free[sim.positions[free, 1].argmin()]
+    assert not sim.islands.awake[sim.islands.labels[top]]
+
+    sim.addPoint(sim.positions[top, 0] + 3, sim.positions[top, 1] - 60, velocity=(0, 30)) # falls onto the bridge from above
+    for _ in range(10):
+        sim.stepFrame()
+    assert sim.islands.awake[sim.islands.labels[top]]
+
+def testPointFarAwayLeavesBridgeAsleep():
+    sim = sleepingBridge()
+    free = np.nonzero(~sim.fixed)[0]
+    top = free[sim.positions[free, 1].argmin()]
+
+    sim.addPoint(sim.positions[top, 0], sim.positions[top, 1] - 400, velocity=(30, 0)) # moves sideways, well out of close pressure range
+    for _ in range(3):
+        sim.stepFrame()
+    assert not sim.islands.awake[sim.islands.labels[top]]
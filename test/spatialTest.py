@@ -0,0 +1,54 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from physics import allPairs
+from spatial import SpatialGrid
+
+
+###### HELPERS ######
+
+def scatteredPoints(seed=0, count=400): # clumps and gaps, negative coordinates and points exactly on cell borders
+    generator = np.random.default_rng(seed)
+    positions = np.concatenate([generator.uniform(-300, 300, (count - 100, 2)), generator.normal(50, 8, (80, 2)), np.arange(20)[:, None] * [25.0, 0]])
+    return positions
+
+def bruteForcePairs(positions, radius): # allPairs() filtered by distance, as sorted tuples
+    pairs = allPairs(len(positions))
+    delta = positions[pairs[:, 1]] - positions[pairs[:, 0]]
+    pairs = pairs[delta[:, 0] ** 2 + delta[:, 1] ** 2 < radius ** 2]
+    return sorted(map(tuple, pairs.tolist()))
+
+###### TESTS ######
+
+@pytest.mark.parametrize("cellSize", [25, 40, 90])
+def testNeighbourPairsMatchAllPairs(cellSize):
+    positions = scatteredPoints()
+    pairs = SpatialGrid(positions, cellSize).neighbourPairs(cellSize)
+    assert len(pairs) == len(np.unique(np.sort(pairs, axis=1), axis=0)) # every pair once
+    assert sorted(map(tuple, np.sort(pairs, axis=1).tolist())) == bruteForcePairs(positions, cellSize)
+
+def testNeighbourPairsWithoutRadiusKeepAllCloseOnes():
+    positions = scatteredPoints(1)
+    pairs = set(map(tuple, np.sort(SpatialGrid(positions, 30).neighbourPairs(), axis=1).tolist()))
+    assert set(bruteForcePairs(positions, 30)) <= pairs
+
+def testRebuildFollowsTheMovedPoints():
+    grid = SpatialGrid(scatteredPoints(2), 40)
+    moved = scatteredPoints(3)
+    grid.rebuild(moved)
+    assert sorted(map(tuple, np.sort(grid.neighbourPairs(40), axis=1).tolist())) == bruteForcePairs(moved, 40)
+
+def testQueryRadiusAndNearestMatchBruteForce():
+    positions = scatteredPoints(4)
+    grid = SpatialGrid(positions, 30)
+    for point in [(0, 0), (50, 50), (-299, 299), (1000, 1000), (10, 3)]:
+        for radius in [5, 30, 75, 2000]:
+            distances = np.sqrt(((positions - point) ** 2).sum(axis=1))
+            assert sorted(grid.queryRadius(point, radius).tolist()) == np.nonzero(distances < radius)[0].tolist()
+            nearest = grid.nearest(point, radius)
+            assert nearest == (int(np.argmin(distances)) if distances.min() < radius else None)
@@ -0,0 +1,50 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from simulation import Simulation
+from trajectory import TrajectoryRecorder, Trajectory, COMPRESSIONS, QUANTUM
+
+
+###### HELPERS ######
+
+def recordRun(path, compression, frames=40): # a breaking bridge recorded over several chunks
+    sim = Simulation()
+    sim.initializePoints()
+    sim.createSprings()
+    sim.createThings()
+    sim.breakStresses = {material: 0.3 for material in sim.breakStresses}
+    expected = []
+    with TrajectoryRecorder(path, sim, compression, chunkFrames=7, keyframeInterval=5) as recorder:
+        for frame in range(frames):
+            sim.stepFrame()
+            recorder.write(sim)
+            expected.append((sim.frame, sim.positions.copy(), sim.springEnds.copy(), sim.springStress(), np.array([thing[0:2] for thing in sim.things])))
+    return sim, expected
+
+###### TESTS ######
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def testRecordAndReplay(tmp_path, compression):
+    path = str(tmp_path / "run.traj")
+    sim, expected = recordRun(path, compression)
+    assert sim.breakages > 0
+    trajectory = Trajectory(path)
+    assert len(trajectory) == len(expected)
+    order = list(range(len(expected)))
+    for index in order[::-1] + order: # seeking backwards, then playing forwards
+        frame = trajectory.frame(index)
+        number, positions, springEnds, stress, things = expected[index]
+        assert frame["frame"] == number
+        assert np.array_equal(frame["springEnds"], springEnds)
+        if compression == "none":
+            assert np.array_equal(frame["positions"], positions)
+            assert np.array_equal(frame["stress"], stress)
+        else:
+            assert np.abs(frame["positions"] - positions).max() <= QUANTUM / 2 + 1e-9
+            assert frame["stress"] == pytest.approx(stress, rel=1e-3, abs=1e-3)
+        assert frame["things"] == pytest.approx(things)
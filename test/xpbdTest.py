@@ -0,0 +1,43 @@
+###### IMPORT ######
+
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import solvers
+from simulation import Simulation, STIFFNESS, SIMSPEED, DT
+
+
+###### HELPERS ######
+
+def hangingGrid(sweep, resolution=4): # the grid lattice hanging from its top row, undamped, with the force solver material
+    sim = Simulation(resolution=resolution, damping=1.0, groundLevel=1e9, solver="xpbd")
+    sim.initializePoints("grid")
+    sim.createSprings()
+    sim.fixed[sim.positions[:, 1] == sim.positions[:, 1].min()] = True
+    sim.sweep = sweep
+    sim.sleep = False
+    sim.ccd = False
+    compliance = solvers.equivalentCompliance(STIFFNESS, SIMSPEED, DT)
+    sim.compliance = {material: compliance for material in sim.compliance}
+    sim.breakStresses = {material: np.inf for material in sim.breakStresses}
+    return sim
+
+def kineticEnergy(sim): # of the free points, in per unit time units
+    free = ~sim.fixed
+    return 0.5 * (sim.masses[free] * (sim.velocities[free] ** 2).sum(axis=1)).sum()
+
+###### TESTS ######
+
+@pytest.mark.parametrize("sweep", solvers.XPBDSWEEPS)
+def testSoftGridSettlesWithoutEnergyGain(sweep):
+    sim = hangingGrid(sweep)
+    kinetics = []
+    for frame in range(100):
+        sim.stepFrame()
+        kinetics.append(kineticEnergy(sim))
+    assert max(kinetics[20:]) <= max(kinetics[:20]) # the drop from rest is the most energy it ever has
+    assert max(kinetics[-20:]) < 0.01 * max(kinetics[:20]) # settled
+    assert np.abs(sim.springLengths() - sim.restLengths).max() < 1